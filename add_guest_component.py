@@ -1,37 +1,265 @@
 import datetime
+import time
 import streamlit as st
 
+from brother_resolver import BrotherResolver
+from checkin_queue import CONFIRMED, FAILED
+from checkin_tokens import qr_sheet, token_csv
+from dedup import duplicates_table, guest_duplicates
+from guest_importer import (
+    CAMPUS_FILES,
+    apply_import,
+    brother_ids,
+    iter_wide_guest_rows,
+    plan_import,
+    unresolved_hosts,
+)
 
-def create_add_guest_component(supabase):
-    """Component to add a new guest to the database."""
+GENDER_OPTIONS = ["Auto", "M", "F"]
+
+# How long an add form waits for the server before reporting the guest as
+# saved offline
+ADD_GUEST_WAIT = 3.0
+
+
+def resolve_gender(choice, guest_name, gender_index):
+    """The picked gender, or the inferred one when "Auto" is picked."""
+    if choice != "Auto":
+        return choice
+    if gender_index is None:
+        return None
+    return gender_index.infer_one(guest_name)
+
+
+def host_params(brother_resolver, host_name: str):
+    """``add_guest`` arguments naming the host.
+
+    With a ``brother_resolver`` the typed name is resolved here and the
+    call gets the brother's id (or full name, for a roster whose ids aren't
+    the database's), so a misspelled host never reaches the server; when
+    it doesn't resolve, the closest names are shown and None is returned.
+    Without one the name is sent as typed.
+    """
+    if brother_resolver is None:
+        return {"host_name": host_name}
+    brother = brother_resolver.resolve(host_name)
+    if brother is not None:
+        st.caption(f"Host: {brother['name']}")
+        if brother_resolver.by_id:
+            return {"brother_id": brother["id"]}
+        return {"host_name": brother["name"]}
+    suggestions = brother_resolver.suggest(host_name)
+    if suggestions:
+        st.error(
+            f"'{host_name}' matches more than one brother: "
+            f"{', '.join(suggestions)}. Please type more of the name."
+        )
+    else:
+        st.error(f"No brother matches '{host_name}'. Please check the spelling.")
+    return None
+
+
+def add_guest_through_queue(checkin_queue, params: dict):
+    """Journal an ``add_guest`` call and report how it went.
+
+    The call is on local disk before this waits for the server, so a lost
+    connection leaves the guest queued rather than the form failing.
+    """
+    seq = checkin_queue.add_guest(params)
+    state, error = checkin_queue.add_result(seq, timeout=ADD_GUEST_WAIT)
+    if state == CONFIRMED:
+        st.success(f"Guest {params['guest_name']} added successfully!")
+    elif state == FAILED and "brother" in (error or ""):
+        if "host_name" in params:
+            st.error(
+                f"Could not add guest: Brother '{params['host_name']}' not found "
+                "in the system. Please check the spelling."
+            )
+        else:
+            st.error(
+                f"Could not add guest: brother id {params['brother_id']} is no "
+                "longer in the system. Please reload the page and try again."
+            )
+    elif state == FAILED:
+        st.error(f"Could not add guest: {error}")
+    else:
+        st.info(
+            f"No connection: {params['guest_name']} is saved on this device and "
+            "will be added when the connection returns."
+        )
+
+
+def create_add_guest_component(
+    supabase, gender_index=None, checkin_queue=None, brother_resolver=None
+):
+    """Component to add a new guest to the database.
+
+    With a ``checkin_queue`` the add goes through its journal; with a
+    ``brother_resolver`` the host is checked before anything is sent.
+    """
     with st.form("add_guest_form"):
         guest_name = st.text_input("Guest Name").strip()
         host_name = st.text_input("Brother Name (Check Spelling)").strip()
         campus_status = st.selectbox("Campus Status", ["On Campus", "Off Campus"])
-        gender = st.selectbox("Gender", ["M", "F"])
+        gender = st.selectbox("Gender", GENDER_OPTIONS)
         submit_button = st.form_submit_button("Add Guest")
 
         if submit_button and guest_name and host_name:
+            gender = resolve_gender(gender, guest_name, gender_index)
+            if gender is None:
+                st.error(
+                    "Couldn't tell gender from the first name; please pick M or F."
+                )
+                return
+            host = host_params(brother_resolver, host_name)
+            if host is None:
+                return
+            params = {
+                "guest_name": guest_name.upper(),
+                **host,
+                "campus_status": campus_status,
+                "gender": gender,
+                "check_in_time": datetime.datetime.utcnow().strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),  # Ensure timestamp format
+            }
+            if checkin_queue is not None:
+                add_guest_through_queue(checkin_queue, params)
+                return
             try:
-                response = supabase.rpc(
-                    "add_guest",
-                    {
-                        "guest_name": guest_name.upper(),
-                        "host_name": host_name,
-                        "campus_status": campus_status,
-                        "gender": gender,
-                        "check_in_time": datetime.datetime.utcnow().strftime(
-                            "%Y-%m-%d %H:%M:%S"
-                        ),  # Ensure timestamp format
-                    },
-                ).execute()
+                response = supabase.rpc("add_guest", params).execute()
 
                 st.write(response)  # Print full response to debug
 
                 if response.data is True:  # Ensure correct response handling
                     st.success(f"Guest {guest_name.upper()} added successfully!")
-                    st.rerun()
                 else:
                     st.error("Failed to add guest. Please try again.")
             except Exception as e:
                 st.error(f"Unexpected error: {str(e)}")  # Print full error message
+
+
+def create_bulk_import_component(
+    supabase, guest_data, gender_index=None, event_id=None
+):
+    """Import the wide on/off-campus guest sheets with a dry-run preview."""
+    uploads = {
+        campus_status: st.file_uploader(
+            f"{campus_status} guest list (Brother, Guest1, Guest2, ...)",
+            type="csv",
+            key=f"import_{campus_status}",
+        )
+        for campus_status in CAMPUS_FILES
+    }
+    use_bundled = st.checkbox("Use the bundled CSVs for lists not uploaded")
+    sources = {
+        campus_status: upload or (CAMPUS_FILES[campus_status] if use_bundled else None)
+        for campus_status, upload in uploads.items()
+    }
+    sources = {campus: source for campus, source in sources.items() if source}
+    if not sources:
+        return
+
+    dry_run = st.button("Preview Import", key="import_preview")
+    run_import = st.button("Import", key="import_apply", type="primary")
+    if not (dry_run or run_import):
+        return
+
+    for source in sources.values():
+        if hasattr(source, "seek"):
+            source.seek(0)
+    rows = (
+        row
+        for campus_status, source in sources.items()
+        for row in iter_wide_guest_rows(source, campus_status)
+    )
+    # Hosts are matched against the brothers table, whose ids the guest
+    # rows reference
+    try:
+        brothers = BrotherResolver.from_supabase(supabase)
+    except Exception as e:
+        st.error(f"Could not read the brothers table: {str(e)}")
+        return
+    if not brothers.brothers:
+        st.error("The brothers table is empty; add the brothers before importing.")
+        return
+    plan = plan_import(rows, brother_ids(brothers), guest_data, gender_index)
+    st.write(plan.summary())
+    if plan.unresolved:
+        st.warning(
+            "Hosts not in the brothers table (their guests are not imported): "
+            + "; ".join(
+                (
+                    f"{name} (did you mean {' / '.join(suggestions)}?)"
+                    if suggestions
+                    else name
+                )
+                for name, suggestions in unresolved_hosts(plan, brothers).items()
+            )
+        )
+    if plan.possible_duplicates:
+        st.warning(
+            f"{len(plan.possible_duplicates)} new guest(s) may already be on a "
+            "list under another spelling or brother:"
+        )
+        st.dataframe(
+            {"names": [" / ".join(names) for names in plan.possible_duplicates]},
+            use_container_width=True,
+        )
+    if dry_run:
+        if plan.new:
+            st.dataframe(plan.new, use_container_width=True)
+        return
+
+    try:
+        requests = apply_import(supabase, plan, event_id=event_id)
+        st.success(
+            f"Imported {len(plan.new)} new guests and {len(plan.moved)} campus "
+            f"changes in {requests} request(s)."
+        )
+    except Exception as e:
+        st.error(f"Import failed: {str(e)}")
+
+
+def create_duplicates_component(guest_data):
+    """On-demand scan of the whole guest list for likely duplicates."""
+    if not st.button("Find duplicate guests", key="find_duplicates"):
+        return
+    start = time.perf_counter()
+    report = guest_duplicates(guest_data)
+    elapsed = time.perf_counter() - start
+    if not report.groups:
+        st.success(f"No likely duplicates among {len(guest_data)} guests.")
+        return
+    st.write(report.summary())
+    st.caption(
+        f"Scanned in {elapsed:.1f} s. Suggested keeps are checked-in guests, "
+        "else the earliest added; nothing is changed automatically."
+    )
+    st.dataframe(duplicates_table(report, guest_data), use_container_width=True)
+
+
+def create_pass_export_component(guest_data):
+    """Downloads for the check-in passes: token list and printable QR sheet."""
+    if guest_data.empty or "checkin_token" not in guest_data.columns:
+        st.info("No guest passes yet.")
+        return
+    st.download_button(
+        "Download tokens (CSV)",
+        token_csv(guest_data),
+        file_name="guest_passes.csv",
+        mime="text/csv",
+    )
+    # Rendering thousands of QR codes takes a moment, so only on request
+    if st.button("Build QR sheet", key="build_qr_sheet"):
+        try:
+            sheet = qr_sheet(guest_data)
+        except ImportError:
+            st.error("The QR sheet needs the segno package (pip install segno).")
+            return
+        st.download_button(
+            "Download QR sheet (HTML, print from the browser)",
+            sheet,
+            file_name="guest_passes.html",
+            mime="text/html",
+        )
@@ -0,0 +1,128 @@
+import threading
+from collections import Counter
+
+import pandas as pd
+
+CHECKED_IN = "Checked In"
+# Counted dimension -> guest frame column
+DIMENSIONS = {
+    "status": "check_in_status",
+    "campus": "campus_status",
+    "gender": "gender",
+    "brother": "brother_name",
+    "year": "brother_year",
+}
+# Also counted over checked-in guests only
+CHECKED_IN_DIMENSIONS = {
+    "checked_in_campus": "campus_status",
+    "checked_in_gender": "gender",
+}
+
+
+def _row_keys(values: dict):
+    """(dimension, value) pairs a guest row counts towards."""
+    keys = [(dimension, values[column]) for dimension, column in DIMENSIONS.items()]
+    if values["check_in_status"] == CHECKED_IN:
+        keys += [
+            (dimension, values[column])
+            for dimension, column in CHECKED_IN_DIMENSIONS.items()
+        ]
+    # Missing values come through as None, NaN or pd.NA
+    return [key for key in keys if not pd.isna(key[1])]
+
+
+def _frame_counts(frame: pd.DataFrame) -> Counter:
+    """All counters for a frame at once, with vectorized ``value_counts``."""
+    counts = Counter()
+    checked_in = frame[frame["check_in_status"] == CHECKED_IN]
+    for source, dimensions in (
+        (frame, DIMENSIONS),
+        (checked_in, CHECKED_IN_DIMENSIONS),
+    ):
+        for dimension, column in dimensions.items():
+            for value, count in source[column].value_counts().items():
+                if count:
+                    counts[dimension, value] = int(count)
+    return counts
+
+
+class GuestAggregates:
+    """Dashboard counters kept in step with a ``GuestRepository``.
+
+    Counts guests per check-in status, campus, gender, brother and class
+    year, plus the campus and gender split of checked-in guests. As a
+    repository listener it is rebuilt on a full resync and otherwise patched
+    per changed row, so a check-in costs a handful of counter updates rather
+    than a pass over every guest. ``verify`` recomputes from a frame as a
+    consistency check.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = 0
+        self.total = 0
+        self._counts = Counter()
+
+    def _count(self, frame: pd.DataFrame, sign: int):
+        columns = list(DIMENSIONS.values())
+        for row in zip(*(frame[column].tolist() for column in columns)):
+            for key in _row_keys(dict(zip(columns, row))):
+                self._counts[key] += sign
+                if not self._counts[key]:
+                    del self._counts[key]
+        self.total += sign * len(frame)
+
+    def reset(self, frame: pd.DataFrame):
+        with self.lock:
+            self.total = len(frame)
+            self._counts = _frame_counts(frame) if not frame.empty else Counter()
+            self.version += 1
+
+    def upsert(self, rows: pd.DataFrame, previous: pd.DataFrame):
+        with self.lock:
+            if not previous.empty:
+                self._count(previous, -1)
+            self._count(rows, 1)
+            self.version += 1
+
+    def remove(self, rows: pd.DataFrame):
+        with self.lock:
+            self._count(rows, -1)
+            self.version += 1
+
+    def count(self, dimension: str, value) -> int:
+        return self._counts.get((dimension, value), 0)
+
+    @property
+    def checked_in(self) -> int:
+        return self.count("status", CHECKED_IN)
+
+    def counts(self, dimension: str) -> pd.Series:
+        """Counts per value of a dimension, largest first (as ``value_counts``)."""
+        with self.lock:
+            counts = {
+                value: count
+                for (name, value), count in self._counts.items()
+                if name == dimension
+            }
+        return pd.Series(counts, dtype="int64").sort_values(
+            ascending=False, kind="stable"
+        )
+
+    def verify(self, frame: pd.DataFrame) -> list:
+        """Keys whose count differs from a full recompute over ``frame``.
+
+        The recompute uses ``value_counts`` rather than the per-row path, so
+        it also checks the incremental bookkeeping.
+        """
+        expected = GuestAggregates()
+        expected.reset(frame)
+        with self.lock:
+            keys = self._counts.keys() | expected._counts.keys()
+            mismatched = sorted(
+                (key for key in keys if self._counts[key] != expected._counts[key]),
+                key=str,
+            )
+            if self.total != expected.total:
+                mismatched.insert(0, ("total", None))
+        return mismatched
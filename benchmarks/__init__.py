@@ -0,0 +1,9 @@
+"""Offline benchmarks against synthetic guest lists, one module per area.
+
+Run them with ``python -m benchmarks`` (see ``benchmarks.cli``). The
+invariants they rely on are asserted in ``tests/``.
+"""
+
+from benchmarks.data import load_brothers, synthetic_guests, synthetic_repository
+
+__all__ = ["load_brothers", "synthetic_guests", "synthetic_repository"]
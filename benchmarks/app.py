@@ -0,0 +1,262 @@
+"""Whole-app benchmarks: cold starts and concurrent doors through AppTest."""
+
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.data import (
+    DATA_DIR,
+    load_brothers,
+    percentiles,
+    synthetic_guests,
+    typo,
+)
+
+VIEWS = {
+    "dashboard": "📊 Dashboard",
+    "checkin": "📜 Guest List & Check-In",
+    "add": "Add Guest",
+}
+# Modules worth watching at startup: the app's own and its heavy dependencies
+STARTUP_MODULES = (
+    "streamlit",
+    "pandas",
+    "supabase",
+    "plotly.graph_objects",
+    "visualization",
+    "dashboard_component",
+    "search_component",
+    "add_guest_component",
+    "gender_inference",
+)
+
+
+def _import_times(modules) -> dict:
+    """Cumulative import time (ms) of each module in a fresh interpreter,
+    from ``python -X importtime``, in the order the app imports them."""
+    code = "; ".join(f"import {module}" for module in modules)
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=DATA_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        if cumulative.strip().isdigit():
+            times.setdefault(name.strip(), int(cumulative) / 1000)
+    return {module: times.get(module, 0.0) for module in modules}
+
+
+def _serve_app(client):
+    """Point the app's Supabase client and realtime subscription at the
+    fake ``client``."""
+    import change_feed
+    import supabase
+
+    supabase.create_client = lambda url, key: client
+
+    class Transport(change_feed.InProcessTransport):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            client.add_change_listener(self.publish)
+
+    change_feed.SupabaseRealtimeTransport = Transport
+
+
+def _app_session(view: str):
+    """A logged-in browser session of the full app, opened on ``view``."""
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(DATA_DIR / "streamlit_app.py"), default_timeout=60)
+    app.secrets["supabase"] = {"url": "http://localhost", "key": "key"}
+    app.secrets["journal_path"] = ":memory:"
+    app.session_state["authenticated"] = True
+    app.session_state["view"] = VIEWS[view]
+    return app
+
+
+def _startup_child(view: str, guests: int):
+    """First render of one view in this (fresh) interpreter, printed as
+    JSON for ``bench_startup``."""
+    from fake_supabase import FakeSupabaseClient
+
+    _serve_app(FakeSupabaseClient(load_brothers(), synthetic_guests(guests)))
+    before = set(sys.modules)
+    app = _app_session(view)
+    start = time.perf_counter()
+    app.run()
+    first_s = time.perf_counter() - start
+    start = time.perf_counter()
+    app.run()
+    rerun_s = time.perf_counter() - start
+    loaded = set(sys.modules) - before
+    print(
+        json.dumps(
+            {
+                "first_render_ms": first_s * 1000,
+                "rerun_ms": rerun_s * 1000,
+                "modules_loaded": len(loaded),
+                "watched_loaded": [m for m in STARTUP_MODULES if m in loaded],
+                "exceptions": [str(e.value) for e in app.exception],
+            }
+        )
+    )
+
+
+def bench_startup(guests: int, repeats=3) -> dict:
+    """Import time of the app's modules and the first render of each view,
+    each in a fresh interpreter, so lazy loading regressions show up.
+    Render times are the median of ``repeats`` cold starts."""
+    results = {"guests": guests, "import_ms": _import_times(STARTUP_MODULES)}
+    for view in VIEWS:
+        runs = []
+        for _ in range(repeats):
+            stdout = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    "from benchmarks.app import _startup_child; "
+                    f"_startup_child({view!r}, {guests})",
+                ],
+                cwd=DATA_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            runs.append(json.loads(stdout.splitlines()[-1]))
+        results[view] = {
+            **runs[0],
+            "first_render_ms": statistics.median(r["first_render_ms"] for r in runs),
+            "rerun_ms": statistics.median(r["rerun_ms"] for r in runs),
+        }
+    return results
+
+
+def door_events(guests: list, rng: random.Random, typo_rate=0.2, undo_rate=0.05):
+    """Arrivals at one door as ``(guest_id, typed)``: each guest in
+    ``guests`` (``(id, name)`` pairs) arrives once and the volunteer types
+    their name, with a typo ``typo_rate`` of the time. Now and then
+    (``undo_rate``) an earlier guest comes up again, as when a check-in is
+    undone."""
+    arrived = []
+    for guest_id, name in guests:
+        if arrived and rng.random() < undo_rate:
+            yield rng.choice(arrived)
+        typed = typo(name, rng) if rng.random() < typo_rate else name
+        arrived.append((guest_id, name))
+        yield guest_id, typed
+
+
+def _settle(client, quiet=0.5, timeout=30.0):
+    """Wait until background writers stop sending requests."""
+    deadline = time.monotonic() + timeout
+    seen = client.query_count
+    while time.monotonic() < deadline:
+        time.sleep(quiet + client.latency)
+        if client.query_count == seen:
+            return
+        seen = client.query_count
+
+
+def bench_doors(guests: int, doors=4, arrivals=25, latency_ms=20.0, seed=0) -> dict:
+    """``doors`` volunteers checking guests in at once through the full app
+    (search, then click), against the fake backend with ``latency_ms`` per
+    request.
+
+    Each door is its own browser session on the check-in tab; the process
+    wide resources (snapshot, search index, write queue) are shared as in
+    production. AppTest isn't thread-safe, so script runs take turns; the
+    background writer, change feed and server latency overlap freely.
+    Reports per-rerun latency, requests sent per check-in and the peak RSS
+    of the process (getrusage; tracemalloc would slow reruns 2-4x).
+    """
+    import resource
+    import threading
+
+    from fake_supabase import FakeSupabaseClient
+
+    rng = random.Random(seed)
+    rows = synthetic_guests(guests, seed)
+    client = FakeSupabaseClient(load_brothers(), rows, latency=latency_ms / 1000)
+    _serve_app(client)
+    arriving = rng.sample(
+        [(i, row["name"]) for i, row in enumerate(rows, 1)], doors * arrivals
+    )
+    run_lock = threading.Lock()
+    sessions = []
+    for _ in range(doors):
+        app = _app_session("checkin")
+        start = time.perf_counter()
+        app.run()
+        first_s = time.perf_counter() - start
+        sessions.append(app)
+    _settle(client)
+    client.reset_counters()
+    searches, clicks, missed, errors = [], [], [], []
+
+    def door(app, events):
+        for guest_id, typed in events:
+            with run_lock:
+                start = time.perf_counter()
+                app.text_input(key="search_input").input(typed).run()
+                searches.append(time.perf_counter() - start)
+                try:
+                    button = app.button(key=f"button_{guest_id}")
+                except KeyError:
+                    # Typo not matched, or past the first page
+                    missed.append(guest_id)
+                    continue
+                start = time.perf_counter()
+                button.click().run()
+                clicks.append(time.perf_counter() - start)
+                errors.extend(str(e.value) for e in app.exception)
+
+    threads = [
+        threading.Thread(
+            target=door,
+            args=(
+                app,
+                list(
+                    door_events(
+                        arriving[d * arrivals : (d + 1) * arrivals],
+                        random.Random(seed + d),
+                    )
+                ),
+            ),
+        )
+        for d, app in enumerate(sessions)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed_s = time.perf_counter() - start
+    _settle(client)
+    server = client.table("guests").select("check_in_status").execute().data
+    return {
+        "guests": guests,
+        "doors": doors,
+        "latency_ms": latency_ms,
+        "first_render_ms": first_s * 1000,
+        "search_rerun": percentiles(searches),
+        "click_rerun": percentiles(clicks),
+        "clicks": len(clicks),
+        "missed_searches": len(missed),
+        "clicks_per_min": len(clicks) / elapsed_s * 60,
+        "requests_per_checkin": (client.query_count - 1) / max(len(clicks), 1),
+        # ru_maxrss is in KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "checked_in_on_server": sum(
+            row["check_in_status"] == "Checked In" for row in server
+        ),
+        "errors": errors,
+    }
@@ -0,0 +1,152 @@
+"""Check-in write path benchmarks: queued, offline and scanned check-ins."""
+
+import random
+import time
+from pathlib import Path
+
+from benchmarks.data import percentiles, synthetic_repository
+
+
+def bench_checkin(guests: int, clicks=500, latency_ms=20.0, seed=0) -> dict:
+    """Click latency and request count for a burst of check-ins, written
+    synchronously per click against the write-behind queue, with
+    ``latency_ms`` per backend round trip. For the queue, also the time
+    until every click is confirmed."""
+    from checkin_queue import CheckInQueue, status_update
+
+    rng = random.Random(seed)
+    results = {"guests": guests, "clicks": clicks, "latency_ms": latency_ms}
+
+    client, repository = synthetic_repository(guests, seed)
+    client.latency = latency_ms / 1000
+    ids = rng.sample(list(repository.frame.index), clicks)
+    client.reset_counters()
+    timings = []
+    for guest_id in ids:
+        start = time.perf_counter()
+        response = (
+            client.table("guests")
+            .update(status_update("Checked In"))
+            .eq("id", guest_id)
+            .execute()
+        )
+        repository.apply_records(response.data)
+        timings.append(time.perf_counter() - start)
+    results["sync"] = {**percentiles(timings), "requests": client.query_count}
+
+    client, repository = synthetic_repository(guests, seed)
+    client.latency = latency_ms / 1000
+    queue = CheckInQueue(client, repository).start()
+    client.reset_counters()
+    timings = []
+    burst = time.perf_counter()
+    for guest_id in ids:
+        start = time.perf_counter()
+        queue.submit(guest_id, "Checked In")
+        timings.append(time.perf_counter() - start)
+    queue.stop(timeout=60)
+    results["queued"] = {
+        **percentiles(timings),
+        "requests": client.query_count,
+        "confirmed_s": time.perf_counter() - burst,
+    }
+    return results
+
+
+def bench_offline(guests: int, clicks=500, seed=0) -> dict:
+    """Check-ins made while the backend is unreachable: click latency with
+    the on-disk journal, then time and requests to replay once it's back."""
+    import tempfile
+
+    from checkin_queue import CheckInQueue
+    from journal import IntentJournal
+
+    rng = random.Random(seed)
+    client, repository = synthetic_repository(guests, seed)
+    ids = rng.sample(list(repository.frame.index), clicks)
+    with tempfile.TemporaryDirectory() as tmp:
+        scratch = IntentJournal(Path(tmp) / "scratch.sqlite3")
+        start = time.perf_counter()
+        for guest_id in ids:
+            scratch.append("status", guest_id, {}, "")
+        append_s = (time.perf_counter() - start) / clicks
+        scratch.close()
+
+        journal = IntentJournal(Path(tmp) / "journal.sqlite3")
+        queue = CheckInQueue(client, repository, max_backoff=0.2, journal=journal)
+        queue.start()
+        client.offline = True
+        timings = []
+        for guest_id in ids:
+            start = time.perf_counter()
+            queue.submit(guest_id, "Checked In")
+            timings.append(time.perf_counter() - start)
+        time.sleep(0.5)
+        client.offline = False
+        client.reset_counters()
+        start = time.perf_counter()
+        queue.stop(timeout=60)
+        replay_s = time.perf_counter() - start
+        journal.close()
+    server = client.table("guests").select("id, check_in_status").execute().data
+    return {
+        "guests": guests,
+        "clicks": clicks,
+        "journal_append_ms": append_s * 1000,
+        "offline_click": percentiles(timings),
+        "replay_ms": replay_s * 1000,
+        "replay_requests": client.query_count - 1,
+        "checked_in_on_server": sum(
+            row["check_in_status"] == "Checked In" for row in server
+        ),
+    }
+
+
+def bench_scan(guests: int, scans=1000, seed=0) -> dict:
+    """Per-check-in cost of scanning a pass (token lookup, queued write)
+    against searching the full name and checking in the top hit."""
+    from checkin_queue import CheckInQueue
+    from checkin_tokens import QR_PREFIX, TokenIndex
+    from search_index import GuestSearchIndex
+
+    rng = random.Random(seed)
+    results = {"guests": guests, "scans": scans}
+
+    client, repository = synthetic_repository(guests, seed)
+    index = repository.add_listener(GuestSearchIndex())
+    ids = rng.sample(list(repository.frame.index), scans)
+    names = [repository.frame.at[guest_id, "name"] for guest_id in ids]
+    queue = CheckInQueue(client, repository).start()
+    timings = []
+    for name in names:
+        start = time.perf_counter()
+        queue.submit(index.search(name)[0], "Checked In")
+        timings.append(time.perf_counter() - start)
+    queue.stop()
+    results["name_search"] = percentiles(timings)
+
+    client, repository = synthetic_repository(guests, seed)
+    start = time.perf_counter()
+    tokens = repository.add_listener(TokenIndex())
+    results["index_build_ms"] = (time.perf_counter() - start) * 1000
+    codes = [
+        QR_PREFIX + repository.frame.at[guest_id, "checkin_token"] for guest_id in ids
+    ]
+    queue = CheckInQueue(client, repository).start()
+    client.reset_counters()
+    timings = []
+    for code in codes:
+        start = time.perf_counter()
+        queue.submit(tokens.resolve(code), "Checked In")
+        timings.append(time.perf_counter() - start)
+    queue.stop()
+    scan = percentiles(timings)
+    results["scan"] = {
+        **scan,
+        "scans_per_min": int(60_000 / scan["p99_ms"]),
+        "requests": client.query_count,
+    }
+    results["checked_in"] = int(
+        (repository.frame["check_in_status"] == "Checked In").sum()
+    )
+    return results
@@ -0,0 +1,121 @@
+"""Offline benchmarks against synthetic guest lists.
+
+Usage: python -m benchmarks search --guests 20000
+       python -m benchmarks doors --doors 8 --latency-ms 50 --json new.json
+       python -m benchmarks doors --json new.json --compare baseline.json
+"""
+
+import argparse
+import inspect
+import json
+import platform
+import sys
+from pathlib import Path
+
+from benchmarks import app, checkins, dashboard, search, storage
+
+BENCHMARKS = {
+    "arrivals": dashboard.bench_arrivals,
+    "aggregates": dashboard.bench_aggregates,
+    "charts": dashboard.bench_charts,
+    "checkin": checkins.bench_checkin,
+    "click": dashboard.bench_click,
+    "dedup": search.bench_dedup,
+    "doors": app.bench_doors,
+    "events": storage.bench_events,
+    "gender": search.bench_gender,
+    "hosts": search.bench_hosts,
+    "memory": storage.bench_memory,
+    "offline": checkins.bench_offline,
+    "pushdown": search.bench_pushdown,
+    "scan": checkins.bench_scan,
+    "search": search.bench_search,
+    "startup": app.bench_startup,
+    "typing": search.bench_typing,
+}
+
+
+# Result keys that are costs (lower is better); everything else is context
+COST_SUFFIXES = ("_ms", "_mb", "requests", "_per_checkin", "comparisons")
+
+
+def _flatten(results: dict, prefix="") -> dict:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(baseline: dict, results: dict, tolerance=0.2) -> list:
+    """Costs in ``results`` more than ``tolerance`` (a fraction) above the
+    same run of ``baseline``, as ``(key, before, after)``."""
+    before = _flatten(baseline["results"])
+    regressions = []
+    for key, after in _flatten(results).items():
+        if not key.endswith(COST_SUFFIXES) or not isinstance(after, (int, float)):
+            continue
+        old = before.get(key)
+        if isinstance(old, (int, float)) and after > old * (1 + tolerance):
+            regressions.append((key, old, after))
+    return regressions
+
+
+def _json_value(value):
+    """numpy scalars and anything else JSON can't encode."""
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS))
+    parser.add_argument("--guests", type=int, default=5000)
+    parser.add_argument("--doors", type=int, help="concurrent door sessions")
+    parser.add_argument("--latency-ms", type=float, help="fake backend round trip")
+    parser.add_argument("--json", type=Path, help="write results to this file")
+    parser.add_argument("--compare", type=Path, help="baseline results file")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed cost increase"
+    )
+    args = parser.parse_args()
+    benchmark = BENCHMARKS[args.benchmark]
+    options = {
+        name: value
+        for name, value in {"doors": args.doors, "latency_ms": args.latency_ms}.items()
+        if value is not None
+    }
+    unsupported = set(options) - set(inspect.signature(benchmark).parameters)
+    if unsupported:
+        parser.error(f"{args.benchmark} does not take {', '.join(sorted(unsupported))}")
+    results = benchmark(args.guests, **options)
+    for key, value in results.items():
+        print(f"{key:>24}: {value}")
+    if args.json:
+        record = {
+            "benchmark": args.benchmark,
+            "guests": args.guests,
+            "options": options,
+            "python": platform.python_version(),
+            "results": results,
+        }
+        args.json.write_text(json.dumps(record, indent=2, default=_json_value))
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if (baseline["benchmark"], baseline["guests"], baseline["options"]) != (
+            args.benchmark,
+            args.guests,
+            options,
+        ):
+            parser.error(f"{args.compare} is a different benchmark, size or options")
+        regressions = compare(baseline, results, args.tolerance)
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: {before:.4g} -> {after:.4g}")
+        if regressions:
+            sys.exit(1)
+        print(f"No cost more than {args.tolerance:.0%} above {args.compare}")
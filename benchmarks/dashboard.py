@@ -0,0 +1,177 @@
+"""Dashboard benchmarks: reruns, charts, arrival series and counters."""
+
+import random
+import time
+
+import pandas as pd
+
+from benchmarks.data import percentiles, synthetic_repository
+
+
+def _render_page(client, repository, sections):
+    import streamlit as st
+
+    from aggregates import GuestAggregates
+    from dashboard_component import create_charts_component, create_metrics_component
+    from search_component import (
+        SearchState,
+        create_guest_list_component,
+        load_filtered_data,
+    )
+
+    frame = repository.frame
+    aggregates = GuestAggregates()
+    aggregates.reset(frame)
+    if "metrics" in sections:
+        create_metrics_component(aggregates)
+    if "charts" in sections:
+        create_charts_component(frame, aggregates)
+    if "list" in sections:
+        filtered = load_filtered_data(frame, SearchState())
+        create_guest_list_component(client, filtered, repository)
+
+
+def bench_click(guests: int, clicks=20) -> dict:
+    """Server time of the rerun a check-in click causes: the whole page (as
+    before fragments) against the guest-list fragment alone."""
+    from streamlit.testing.v1 import AppTest
+
+    client, repository = synthetic_repository(guests)
+    results = {"guests": guests}
+    for label, sections in {
+        "full_page": ("metrics", "charts", "list"),
+        "list_fragment": ("list",),
+    }.items():
+        app = AppTest.from_function(
+            _render_page, args=(client, repository, sections), default_timeout=60
+        ).run()
+        timings = []
+        for i in range(clicks):
+            start = time.perf_counter()
+            app.button(key=f"button_{repository.frame.index[i % 5]}").click().run()
+            timings.append(time.perf_counter() - start)
+        results[label] = percentiles(timings)
+    return results
+
+
+def _render_charts(repository, aggregates, figure_cache):
+    from dashboard_component import create_charts_component
+
+    create_charts_component(repository.frame, aggregates, figure_cache)
+
+
+def bench_charts(guests: int, reruns=20) -> dict:
+    """Chart section reruns with unchanged data, with and without the figure
+    cache, plus the cache's hit/miss counts."""
+    from streamlit.testing.v1 import AppTest
+
+    from aggregates import GuestAggregates
+    from figure_cache import FigureCache
+
+    client, repository = synthetic_repository(guests)
+    client.table("guests").update(
+        {"check_in_status": "Checked In", "check_in_time": "2024-01-01T23:00:00+00:00"}
+    ).lt("id", guests // 3).execute()
+    repository.sync(force=True)
+    aggregates = repository.add_listener(GuestAggregates())
+    results = {"guests": guests}
+    figure_cache = FigureCache()
+    for label, cache in {"uncached": None, "cached": figure_cache}.items():
+        app = AppTest.from_function(
+            _render_charts, args=(repository, aggregates, cache), default_timeout=60
+        ).run()
+        timings = []
+        for _ in range(reruns):
+            start = time.perf_counter()
+            app.run()
+            timings.append(time.perf_counter() - start)
+        results[label] = percentiles(timings)
+    results["cache"] = figure_cache.stats()
+    return results
+
+
+def bench_arrivals(guests: int, repeats=20, seed=0) -> dict:
+    """The check-ins-over-time series from rollup buckets against a point
+    per checked-in guest, for few and for many arrivals."""
+    import plotly.graph_objects as go
+
+    from dashboard_component import plot_cumulative_checkins
+    from rollups import CheckInRollup
+
+    rng = random.Random(seed)
+    results = {"guests": guests}
+    for arrived in (50, guests):
+        _, repository = synthetic_repository(guests, seed)
+        frame = repository.frame.copy()
+        ids = rng.sample(list(frame.index), arrived)
+        # Arrivals spread over a four-hour party
+        offsets = pd.to_timedelta([rng.randrange(4 * 3600) for _ in ids], unit="s")
+        frame.loc[ids, "check_in_status"] = "Checked In"
+        frame.loc[ids, "check_in_time"] = pd.Timestamp("2024-01-01 23:00Z") + offsets
+
+        per_guest = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            times = frame.loc[frame["check_in_status"] == "Checked In", "check_in_time"]
+            times = times.dropna().dt.tz_convert("US/Eastern").sort_values()
+            pd.Series(range(1, len(times) + 1), index=times)
+            per_guest.append(time.perf_counter() - start)
+        # What the browser is sent, as st.plotly_chart serializes it
+        per_guest_json = go.Figure(
+            go.Scatter(x=times, y=list(range(1, len(times) + 1)))
+        ).to_json()
+
+        rollup = CheckInRollup()
+        rollup.reset(frame)
+        series, figure = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            rollup.series(5)
+            series.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            plot_cumulative_checkins(rollup, 5)
+            figure.append(time.perf_counter() - start)
+        results[f"{arrived}_arrived"] = {
+            "per_guest_series_ms": percentiles(per_guest)["p50_ms"],
+            "points_per_guest": len(times),
+            "rollup_series_ms": percentiles(series)["p50_ms"],
+            "points_rollup": len(rollup.series(5)),
+            "rollup_figure_ms": percentiles(figure)["p50_ms"],
+            "per_guest_json_kb": len(per_guest_json) / 1024,
+            "rollup_json_kb": len(plot_cumulative_checkins(rollup, 5).to_json()) / 1024,
+        }
+    return results
+
+
+def bench_aggregates(guests: int, checkins=500, seed=0) -> dict:
+    """Dashboard counters patched per check-in against a full recompute."""
+    from aggregates import GuestAggregates
+
+    _, repository = synthetic_repository(guests, seed)
+    frame = repository.frame.copy()
+    aggregates = GuestAggregates()
+    aggregates.reset(frame)
+    rng = random.Random(seed)
+
+    timings = []
+    for _ in range(checkins):
+        guest_id = rng.choice(frame.index)
+        previous = frame.loc[[guest_id]]
+        rows = previous.copy()
+        rows["check_in_status"] = rng.choice(["Checked In", "Not Checked In"])
+        start = time.perf_counter()
+        aggregates.upsert(rows, previous)
+        timings.append(time.perf_counter() - start)
+        frame.loc[guest_id, "check_in_status"] = rows["check_in_status"].iloc[0]
+
+    recompute = []
+    for _ in range(20):
+        start = time.perf_counter()
+        GuestAggregates().reset(frame)
+        recompute.append(time.perf_counter() - start)
+    return {
+        "guests": guests,
+        "incremental": percentiles(timings),
+        "full_recompute": percentiles(recompute),
+        "mismatches": len(aggregates.verify(frame)),
+    }
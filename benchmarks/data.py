@@ -0,0 +1,79 @@
+"""Synthetic guest lists and timing helpers shared by the benchmarks."""
+
+import csv
+import itertools
+import random
+import statistics
+from pathlib import Path
+
+import pandas as pd
+
+# The app's modules and data files live at the repository root
+DATA_DIR = Path(__file__).parent.parent
+
+
+def load_brothers() -> list:
+    with open(DATA_DIR / "brothers.csv", encoding="utf-8-sig") as f:
+        return [
+            {"id": int(row["id"]), "name": row["name"], "year": int(row["year"])}
+            for row in csv.DictReader(f)
+        ]
+
+
+def load_ssa_names() -> pd.DataFrame:
+    return pd.read_csv(DATA_DIR / "processed_ssa_names.csv", keep_default_na=False)
+
+
+def synthetic_guests(n: int, seed=0) -> list:
+    """Guest rows shaped like the ``guests`` table: SSA first names, surnames
+    drawn from SSA names and the brothers roster, random hosts.
+
+    The SSA table is ordered by popularity, so names are drawn with Zipf-like
+    weights to get a realistic vocabulary rather than 62k equally rare names.
+    """
+    rng = random.Random(seed)
+    ssa = load_ssa_names()
+    brothers = load_brothers()
+    first_names = list(zip(ssa["name"], ssa["gender"]))
+    weights = list(itertools.accumulate(1 / (rank + 10) for rank in range(len(ssa))))
+    surnames = [b["name"].split()[-1] for b in brothers] + list(ssa["name"][:5000])
+    guests = []
+    for _ in range(n):
+        first, gender = rng.choices(first_names, cum_weights=weights)[0]
+        surname = rng.choices(surnames, cum_weights=weights[: len(surnames)])[0]
+        guests.append(
+            {
+                "name": f"{first} {surname}".upper(),
+                "brother_id": rng.choice(brothers)["id"],
+                "campus_status": rng.choice(["On Campus", "Off Campus"]),
+                "gender": gender if gender in ("M", "F") else rng.choice("MF"),
+                "check_in_status": "Not Checked In",
+                "check_in_time": None,
+            }
+        )
+    return guests
+
+
+def synthetic_repository(n: int, seed=0):
+    """A ``GuestRepository`` loaded from a fake database of ``n`` guests."""
+    from fake_supabase import FakeSupabaseClient
+    from guest_repository import GuestRepository
+
+    client = FakeSupabaseClient(load_brothers(), synthetic_guests(n, seed))
+    repository = GuestRepository(client)
+    repository.full_resync()
+    return client, repository
+
+
+def percentiles(samples) -> dict:
+    samples = sorted(samples)
+    return {
+        "p50_ms": statistics.median(samples) * 1000,
+        "p99_ms": samples[int(len(samples) * 0.99) - 1] * 1000,
+        "max_ms": samples[-1] * 1000,
+    }
+
+
+def typo(name: str, rng: random.Random) -> str:
+    i = rng.randrange(1, len(name))
+    return name[:i] + rng.choice("aeiouy") + name[i + 1 :]
@@ -0,0 +1,268 @@
+"""Search, host name and duplicate matching benchmarks."""
+
+import random
+import time
+
+import pandas as pd
+
+from benchmarks.data import (
+    load_brothers,
+    load_ssa_names,
+    percentiles,
+    synthetic_guests,
+    synthetic_repository,
+    typo,
+)
+
+
+def _contains_search(lowered: pd.DataFrame, query: str) -> list:
+    """The ``str.contains`` search the index replaced, on the same fields
+    and with the same ranking order (guest-name matches first, by name)."""
+    from name_utils import tokenize
+
+    matched = pd.Series(True, index=lowered.index)
+    by_name = pd.Series(True, index=lowered.index)
+    for token in tokenize(query):
+        in_name = lowered["name"].str.contains(token, regex=False)
+        in_brother = lowered["brother_name"].str.contains(token, regex=False)
+        matched &= in_name | in_brother
+        by_name &= in_name
+    hits = lowered.loc[matched, ["name"]].assign(brother_only=~by_name[matched])
+    return list(hits.sort_values(["brother_only", "name"]).index)
+
+
+def bench_search(guests: int, queries=500, seed=0) -> dict:
+    """The search index against ``str.contains`` over the same fields, on
+    the same prefixes (1-4 letters), full names and misspelled names."""
+    from search_index import GuestSearchIndex
+
+    _, repository = synthetic_repository(guests, seed)
+    frame = repository.frame
+    rng = random.Random(seed)
+
+    start = time.perf_counter()
+    index = GuestSearchIndex()
+    index.reset(frame)
+    build_s = time.perf_counter() - start
+
+    names = frame["name"].sample(queries, replace=True, random_state=seed)
+    workloads = {
+        "prefix": [name[: rng.randint(1, 4)] for name in names],
+        "full_name": list(names),
+        "misspelled": [typo(name, rng) for name in names],
+    }
+    lowered = pd.DataFrame(
+        {
+            "name": frame["name"].str.lower(),
+            "brother_name": frame["brother_name"].str.lower(),
+        }
+    )
+    paths = {
+        "index": index.search,
+        "str_contains": lambda query: _contains_search(lowered, query),
+    }
+    results = {"guests": guests, "build_ms": build_s * 1000}
+    for label, workload in workloads.items():
+        for path, search in paths.items():
+            timings = []
+            for query in workload:
+                start = time.perf_counter()
+                search(query)
+                timings.append(time.perf_counter() - start)
+            results[f"{label}.{path}"] = percentiles(timings)
+    return results
+
+
+def bench_typing(guests: int, names=50, reruns=2, seed=0) -> dict:
+    """Search-as-you-type: ``load_filtered_data`` per keystroke (plus the
+    reruns that follow it) without and with the per-session search cache."""
+    from search_cache import SearchCache
+    from search_component import SearchState, load_filtered_data
+    from search_index import GuestSearchIndex
+
+    _, repository = synthetic_repository(guests, seed)
+    index = repository.add_listener(GuestSearchIndex())
+    snapshot = repository.snapshot()
+    typed = snapshot.frame["name"].sample(names, random_state=seed).str.lower()
+    results = {"guests": guests}
+    cache = SearchCache()
+    mismatches = 0
+    for label, search_cache in {"uncached": None, "cached": cache}.items():
+        timings = []
+        for name in typed:
+            for end in range(1, len(name) + 1):
+                state = SearchState(query=name[:end], status_filter="not-checked-in")
+                for _ in range(1 + reruns):
+                    start = time.perf_counter()
+                    df = load_filtered_data(
+                        snapshot.frame, state, index, search_cache, snapshot.version
+                    )
+                    timings.append(time.perf_counter() - start)
+                if search_cache is not None:
+                    expected = load_filtered_data(snapshot.frame, state, index)
+                    mismatches += list(df.index) != list(expected.index)
+        results[label] = percentiles(timings)
+        results[label]["total_ms"] = sum(timings) * 1000
+    results["cache"] = {**cache.stats(), "mismatches": mismatches}
+    return results
+
+
+def bench_pushdown(guests: int, repeats=20, seed=0) -> dict:
+    """First page of typical searches evaluated on the local snapshot against
+    pushed down to the (fake) database, with rows transferred per page.
+
+    The fake database scans in Python, so pushdown timings here are an upper
+    bound; with the indexes in migrations/004 Postgres only touches matches.
+    """
+    from query_planner import GuestQueryPlanner
+    from search_component import SearchState, load_filtered_data
+    from search_index import GuestSearchIndex
+
+    client, repository = synthetic_repository(guests, seed)
+    index = repository.add_listener(GuestSearchIndex())
+    planner = GuestQueryPlanner(client, repository)
+    frame = repository.frame
+    sample = frame.iloc[len(frame) // 2]
+    states = {
+        "all": SearchState(),
+        "name": SearchState(query=sample["name"].split()[0][:4]),
+        "status": SearchState(status_filter="not-checked-in"),
+        "brother": SearchState(brother_filter=sample["brother_name"]),
+        "name+location": SearchState(
+            query=sample["name"].split()[-1], location_filter="on-campus"
+        ),
+    }
+    results = {"guests": guests}
+    for label, state in states.items():
+        local, pushdown = [], []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            load_filtered_data(frame, state, index).iloc[:25]
+            local.append(time.perf_counter() - start)
+            client.reset_counters()
+            start = time.perf_counter()
+            page, cursor = planner.fetch_page(state)
+            if cursor is not None:
+                planner.fetch_page(state, cursor)
+            pushdown.append((time.perf_counter() - start) / 2)
+        results[label] = {
+            "local_p50_ms": percentiles(local)["p50_ms"],
+            "pushdown_p50_ms": percentiles(pushdown)["p50_ms"],
+            "rows_per_page": client.rows_transferred / 2,
+        }
+    return results
+
+
+def bench_hosts(guests: int, seed=0) -> dict:
+    """How often a typed host name gets a guest added on the first try:
+    sent as typed (the server matches names exactly, ignoring case)
+    against resolved locally to a brother id. ``guests`` is unused."""
+    from brother_resolver import BrotherResolver
+
+    rng = random.Random(seed)
+    brothers = load_brothers()
+    resolver = BrotherResolver(brothers)
+    workloads = {
+        "exact": [b["name"] for b in brothers],
+        "lowercase": [b["name"].lower() for b in brothers],
+        "last_name": [b["name"].split()[-1] for b in brothers],
+        "first_and_initial": [
+            f"{b['name'].split()[0]} {b['name'].split()[-1][0]}" for b in brothers
+        ],
+        "typo": [typo(b["name"], rng) for b in brothers],
+    }
+    results = {"brothers": len(brothers)}
+    for label, typed in workloads.items():
+        as_typed = resolved = ambiguous = wrong = 0
+        timings = []
+        for brother, text in zip(brothers, typed):
+            as_typed += text.lower() == brother["name"].lower()
+            start = time.perf_counter()
+            match = resolver.resolve(text)
+            timings.append(time.perf_counter() - start)
+            if match is None:
+                ambiguous += bool(resolver.suggest(text))
+            elif match["id"] == brother["id"]:
+                resolved += 1
+            else:
+                wrong += 1
+        results[label] = {
+            "sent_as_typed_ok": as_typed,
+            "resolved": resolved,
+            "ambiguous": ambiguous,
+            "wrong": wrong,
+            "p99_ms": percentiles(timings)["p99_ms"],
+        }
+    return results
+
+
+def _variant(name: str, rng: random.Random) -> str:
+    """The same person written differently: casing, spacing or one typo."""
+    style = rng.randrange(3)
+    if style == 0:
+        return name.title()
+    if style == 1:
+        return "  ".join(name.split()).lower()
+    return typo(name, rng)
+
+
+def bench_dedup(guests: int, duplicates=0.02, seed=0) -> dict:
+    """Duplicate detection over ``guests`` synthetic names with a share of
+    them re-entered under another spelling, against comparing every pair."""
+    from dedup import find_duplicates
+
+    rng = random.Random(seed)
+    rows = synthetic_guests(guests, seed)
+    records = [(i, row["name"]) for i, row in enumerate(rows)]
+    planted = {}
+    for i in rng.sample(range(guests), int(guests * duplicates)):
+        planted[len(records)] = i
+        records.append((len(records), _variant(rows[i]["name"], rng)))
+
+    start = time.perf_counter()
+    report = find_duplicates(records)
+    elapsed = time.perf_counter() - start
+    group_of = {i: n for n, group in enumerate(report.groups) for i in group.ids}
+    found = sum(
+        copy in group_of and group_of.get(copy) == group_of.get(original)
+        for copy, original in planted.items()
+    )
+    n = len(records)
+    return {
+        **report.summary(),
+        "all_pairs": n * (n - 1) // 2,
+        "planted": len(planted),
+        "planted_found": found,
+        "seconds": elapsed,
+    }
+
+
+def bench_gender(guests: int, seed=0) -> dict:
+    """Gender table build/load cost and bulk inference over guest names."""
+    import tempfile
+
+    from gender_inference import GenderIndex
+
+    start = time.perf_counter()
+    built = GenderIndex.from_csv()
+    build_s = time.perf_counter() - start
+    with tempfile.TemporaryDirectory() as cache_dir:
+        GenderIndex.load(cache_dir=cache_dir)
+        start = time.perf_counter()
+        index = GenderIndex.load(cache_dir=cache_dir)
+        load_s = time.perf_counter() - start
+
+        names = [row["name"] for row in synthetic_guests(guests, seed)]
+        start = time.perf_counter()
+        inferred = index.infer(names)
+        infer_s = time.perf_counter() - start
+        del index
+    return {
+        "guests": guests,
+        "csv_build_ms": build_s * 1000,
+        "mmap_load_ms": load_s * 1000,
+        "index_mb": built.nbytes / 2**20,
+        "pandas_table_mb": load_ssa_names().memory_usage(deep=True).sum() / 2**20,
+        "infer_ms": infer_s * 1000,
+        "unknown_pct": inferred["gender"].isna().mean() * 100,
+    }
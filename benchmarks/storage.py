@@ -0,0 +1,117 @@
+"""Snapshot memory and event partitioning benchmarks."""
+
+import random
+import time
+
+import pandas as pd
+
+from benchmarks.data import (
+    load_brothers,
+    percentiles,
+    synthetic_guests,
+    synthetic_repository,
+)
+
+
+def bench_memory(guests: int, seed=0) -> dict:
+    """Guest frame memory as decoded from JSON (nested brother dicts, object
+    strings) against the normalized frame the repository keeps."""
+    import json
+
+    from guest_repository import GUEST_SELECT, normalize_guests
+
+    client, _ = synthetic_repository(guests, seed)
+    payload = json.dumps(client.table("guests").select(GUEST_SELECT).execute().data)
+
+    raw = pd.DataFrame(json.loads(payload)).set_index("id", drop=False)
+    rows = json.loads(payload)
+    start = time.perf_counter()
+    frame = normalize_guests(rows)
+    normalize_s = time.perf_counter() - start
+    return {
+        "guests": guests,
+        "raw_mb": raw.memory_usage(deep=True).sum() / 2**20,
+        "normalized_mb": frame.memory_usage(deep=True).sum() / 2**20,
+        "normalize_ms": normalize_s * 1000,
+        "dtypes": dict(frame.dtypes.astype(str)),
+    }
+
+
+def bench_events(guests: int, events=8, repeats=5, seed=0) -> dict:
+    """Live load cost with ``events`` past events of ``guests`` guests each:
+    all in one flat table, filtered to the open event, and archived to
+    Parquet (and deleted), plus archive write and history scan times.
+
+    The fake database filters in Python, so "partitioned" still scans the
+    whole table here; Postgres reads only the open event through the
+    (event_id, ...) indexes of migrations/008. "archived" shows the live
+    cost once history is out of the table.
+    """
+    import shutil
+    import tempfile
+
+    from event_archive import EventArchive, archive_event
+    from fake_supabase import FakeSupabaseClient
+    from guest_repository import GuestRepository
+
+    rng = random.Random(seed)
+    pool = synthetic_guests(guests * 2, seed)
+    rows, past = [], []
+    for event_id in range(1, events + 2):
+        for guest in rng.sample(pool, guests):
+            status = "Checked In" if rng.random() < 0.7 else "Not Checked In"
+            rows.append({**guest, "event_id": event_id, "check_in_status": status})
+        if event_id <= events:
+            past.append({"id": event_id, "name": f"Event {event_id}"})
+    live = {"id": events + 1, "name": "Live"}
+    client = FakeSupabaseClient(load_brothers(), rows, events=[*past, live])
+
+    def load(event_id):
+        timings = []
+        for _ in range(repeats):
+            repository = GuestRepository(client, event_id=event_id)
+            client.reset_counters()
+            start = time.perf_counter()
+            repository.full_resync()
+            timings.append(time.perf_counter() - start)
+        snapshot_bytes = repository.frame.memory_usage(deep=True).sum()
+        return {
+            "full_resync_ms": percentiles(timings)["p50_ms"],
+            "rows": client.rows_transferred,
+            "snapshot_mb": float(snapshot_bytes) / 2**20,
+        }
+
+    results = {"guests": guests, "events": events}
+    results["flat"] = load(None)
+    results["partitioned"] = load(live["id"])
+
+    archive_dir = tempfile.mkdtemp(prefix="snowyowl_archive_")
+    try:
+        timings = []
+        for event in past:
+            start = time.perf_counter()
+            archive_event(client, event, archive_dir)
+            timings.append(time.perf_counter() - start)
+        results["archived"] = load(live["id"])
+        archive = EventArchive(archive_dir)
+        sizes = archive.events()["size_bytes"]
+        results["archive"] = {
+            "write_p50_ms": percentiles(timings)["p50_ms"],
+            "mb_per_event": float(sizes.mean()) / 2**20,
+        }
+        scans = {
+            "guests_per_brother": lambda: archive.guests_per_brother(),
+            "repeat_guests": lambda: archive.repeat_guests(),
+            "one_event": lambda: archive.guests_per_brother([past[-1]["id"]]),
+        }
+        for label, scan in scans.items():
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                scan()
+                timings.append(time.perf_counter() - start)
+            results["archive"][f"{label}_ms"] = percentiles(timings)["p50_ms"]
+        results["repeat_guests"] = len(archive.repeat_guests())
+    finally:
+        shutil.rmtree(archive_dir)
+    return results
@@ -0,0 +1,189 @@
+import csv
+import logging
+import threading
+import time
+from pathlib import Path
+
+from name_utils import (
+    edit_budget,
+    levenshtein,
+    normalize_name,
+    prefix_edit_distance,
+    soundex,
+)
+
+logger = logging.getLogger(__name__)
+
+BROTHERS_CSV = Path(__file__).parent / "brothers.csv"
+# Backoff between attempts to read the brothers table, seconds
+RETRY_MIN = 5.0
+RETRY_MAX = 300.0
+
+# Match kinds, best first
+EXACT = 0
+PREFIX = 1
+TYPO = 2
+SOUNDS_LIKE = 3
+
+
+class BrotherResolver:
+    """Turns a typed host name into a brother, before anything is sent.
+
+    The roster is small (about a hundred brothers), so everything is
+    precomputed once: normalized full names, their words, and the Soundex
+    code of every word. A typed name matches a brother when every typed word
+    matches one of the brother's words, by prefix ("cam d"), within the
+    search index's typo budget ("schlets") or by sound ("shletz"). The best
+    kind of match wins; a name that leaves more than one brother at that
+    level is ambiguous and not resolved.
+
+    ``by_id`` says whether the roster's ids are the database's, so a
+    resolved host can be sent as ``brother_id``; otherwise it is sent by
+    its full name for the server to look up.
+    """
+
+    def __init__(self, brothers, by_id=True):
+        self.by_id = by_id
+        self.brothers = sorted(
+            ({**b, "id": int(b["id"])} for b in brothers), key=lambda b: b["name"]
+        )
+        self._by_key = {}
+        self._keys = []
+        self._words = []
+        self._sounds = []
+        for brother in self.brothers:
+            key = normalize_name(brother["name"])
+            self._by_key.setdefault(key, brother)
+            self._keys.append(key)
+            self._words.append(key.split())
+            self._sounds.append({soundex(word) for word in key.split()})
+
+    @classmethod
+    def from_csv(cls, path=BROTHERS_CSV):
+        """The bundled roster; its ids may not match the database's."""
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            return cls(csv.DictReader(f), by_id=False)
+
+    @classmethod
+    def from_supabase(cls, supabase):
+        response = supabase.table("brothers").select("id, name, year").execute()
+        return cls(response.data or [])
+
+    @property
+    def names(self) -> list:
+        return [brother["name"] for brother in self.brothers]
+
+    def _word_match(self, token: str, words: list, sounds: set):
+        """Best (kind, distance) of one typed word against a brother's words."""
+        best = None
+        for word in words:
+            if word.startswith(token):
+                return PREFIX, 0
+            distance = prefix_edit_distance(token, word, edit_budget(len(token)))
+            if distance is not None and (best is None or distance < best[1]):
+                best = (TYPO, distance)
+        if best is None and soundex(token) in sounds:
+            best = (SOUNDS_LIKE, 0)
+        return best
+
+    def matches(self, text: str) -> list:
+        """``(kind, distance, brother)`` for every brother ``text`` could
+        mean, best first."""
+        key = normalize_name(text)
+        if not key:
+            return []
+        if key in self._by_key:
+            return [(EXACT, 0, self._by_key[key])]
+        tokens = key.split()
+        budget = edit_budget(len(key))
+        found = []
+        for brother, brother_key, words, sounds in zip(
+            self.brothers, self._keys, self._words, self._sounds
+        ):
+            # A close typo of the whole name counts even when the words
+            # don't line up ("camdorsey")
+            if abs(len(key) - len(brother_key)) <= budget:
+                whole = levenshtein(key, brother_key)
+            else:
+                whole = budget + 1
+            if whole <= budget:
+                found.append((TYPO, whole, brother))
+                continue
+            kind, distance = PREFIX, 0
+            for token in tokens:
+                match = self._word_match(token, words, sounds)
+                if match is None:
+                    break
+                kind, distance = max(kind, match[0]), distance + match[1]
+            else:
+                found.append((kind, distance, brother))
+        return sorted(found, key=lambda match: (match[0], match[1], match[2]["name"]))
+
+    def resolve(self, text: str):
+        """The one brother ``text`` means, or None if none or several."""
+        found = self.matches(text)
+        if not found:
+            return None
+        best = found[0][:2]
+        if len(found) > 1 and found[1][:2] == best:
+            return None
+        return found[0][2]
+
+    def suggest(self, text: str, limit=5) -> list:
+        """Brother names to offer when ``text`` doesn't resolve."""
+        return [brother["name"] for _, _, brother in self.matches(text)[:limit]]
+
+
+class BrotherLookup:
+    """The resolver for the add forms, shared by every session.
+
+    The brothers table is read once it can be; until then the bundled
+    roster checks typed names (and, with ``by_id`` off, sends them by
+    name). A failed read is retried with exponential backoff, never while
+    the caller says the backend is offline, and by one session at a time,
+    so a stalled connection doesn't block every rerun.
+    """
+
+    def __init__(self, supabase, retry_min=RETRY_MIN, retry_max=RETRY_MAX):
+        self._supabase = supabase
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.failures = 0
+        self._retry_at = 0.0
+        self._database = None
+        self._roster = None
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            resolver = BrotherResolver.from_supabase(self._supabase)
+            if not resolver.brothers:
+                raise RuntimeError("The brothers table is empty")
+        except Exception:
+            self.failures += 1
+            delay = min(self.retry_min * 2 ** (self.failures - 1), self.retry_max)
+            self._retry_at = time.monotonic() + delay
+            logger.warning(
+                "Could not read the brothers table; retrying in %.0f s",
+                delay,
+                exc_info=True,
+            )
+            return None
+        self.failures = 0
+        return resolver
+
+    def resolver(self, offline=False) -> BrotherResolver:
+        if self._database is not None:
+            return self._database
+        if not offline and time.monotonic() >= self._retry_at:
+            if self._lock.acquire(blocking=False):
+                try:
+                    if self._database is None:
+                        self._database = self._read()
+                finally:
+                    self._lock.release()
+                if self._database is not None:
+                    return self._database
+        if self._roster is None:
+            self._roster = BrotherResolver.from_csv()
+        return self._roster
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Backoff between attempts to (re)open the realtime subscription, or to
+# sync again after a failed sync, seconds
+RETRY_MIN = 1.0
+RETRY_MAX = 60.0
+
+
+@dataclass
+class ChangeEvent:
+    """One insert/update/delete on the guests table."""
+
+    type: str
+    record: Optional[dict] = None
+    old_record: Optional[dict] = None
+    commit_timestamp: Optional[str] = None
+    published_at: float = field(default_factory=time.perf_counter)
+
+
+class InProcessTransport:
+    """Delivers events published in the same process.
+
+    Stand-in for Supabase realtime when running offline: pass ``publish`` to
+    ``FakeSupabaseClient.add_change_listener`` and every write to the fake
+    database reaches the feed the way a realtime message would.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.connected = False
+        self._on_event = None
+        self._on_connect = None
+
+    def start(self, on_event: Callable[[ChangeEvent], None], on_connect=None):
+        self._on_event = on_event
+        self._on_connect = on_connect
+        self.connect()
+
+    def connect(self):
+        """(Re)join: events flow again, after ``on_connect`` catches up."""
+        self.connected = True
+        if self._on_connect is not None:
+            self._on_connect()
+
+    def disconnect(self):
+        """Drop the subscription; events published meanwhile are lost."""
+        self.connected = False
+
+    def publish(self, event_type: str, record=None, old_record=None):
+        if not self.connected:
+            return
+        event = ChangeEvent(event_type, record, old_record)
+        if self.delay:
+            threading.Timer(self.delay, self._on_event, args=(event,)).start()
+        else:
+            self._on_event(event)
+
+    def stop(self):
+        self.connected = False
+
+
+class SupabaseRealtimeTransport:
+    """Postgres change events from Supabase realtime.
+
+    Runs its own event loop on a daemon thread, since Streamlit script runs
+    are synchronous. ``on_connect`` is called every time the channel
+    becomes SUBSCRIBED, including rejoins after a drop. A failed subscribe
+    is logged and retried with exponential backoff.
+    """
+
+    def __init__(self, url: str, key: str, table="guests", schema="public"):
+        self._url = url.rstrip("/")
+        self._key = key
+        self._table = table
+        self._schema = schema
+        self._loop = None
+        self._client = None
+        self._on_event = None
+        self._on_connect = None
+        self._stopped = False
+        self.connected = False
+
+    def start(self, on_event: Callable[[ChangeEvent], None], on_connect=None):
+        self._on_event = on_event
+        self._on_connect = on_connect
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self._run, name=f"{self._table}-realtime", daemon=True
+        ).start()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        delay = RETRY_MIN
+        while not self._stopped:
+            try:
+                self._loop.run_until_complete(self._subscribe())
+                break
+            except Exception:
+                logger.exception(
+                    "Realtime subscription to %s failed; retrying in %.0f s",
+                    self._table,
+                    delay,
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, RETRY_MAX)
+        self._loop.run_forever()
+
+    async def _subscribe(self):
+        from realtime import AsyncRealtimeClient
+
+        self._client = AsyncRealtimeClient(f"{self._url}/realtime/v1", self._key)
+        await self._client.connect()
+        channel = self._client.channel(f"{self._table}-changes")
+        channel.on_postgres_changes(
+            "*", table=self._table, schema=self._schema, callback=self._dispatch
+        )
+        await channel.subscribe(self._on_subscribe_state)
+
+    def _on_subscribe_state(self, state, error):
+        was_connected = self.connected
+        self.connected = str(getattr(state, "value", state)) == "SUBSCRIBED"
+        if error is not None:
+            logger.warning("Realtime channel %s: %s", state, error)
+        if self.connected and not was_connected and self._on_connect is not None:
+            self._on_connect()
+
+    def _dispatch(self, payload):
+        data = payload.get("data", payload)
+        self._on_event(
+            ChangeEvent(
+                type=str(getattr(data["type"], "value", data["type"])),
+                record=data.get("record"),
+                old_record=data.get("old_record"),
+                commit_timestamp=data.get("commit_timestamp"),
+            )
+        )
+
+    def stop(self):
+        self._stopped = True
+        self.connected = False
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+class ChangeFeed:
+    """Applies guest change events to a process-wide ``GuestRepository``.
+
+    One feed runs per server process. Sessions compare the repository
+    ``version`` with the one they last rendered and pick up the new snapshot
+    on their next rerun, without querying the database. While the transport
+    is disconnected, ``snapshot()`` falls back to a delta sync.
+
+    Events are lost while the channel is down, so every time it (re)joins
+    the repository catches up with a delta sync. An event that can't be
+    applied (e.g. a refetch that fails) is logged and leaves the feed
+    ``needs_sync`` until a catch-up sync succeeds. While the database
+    can't be reached, ``snapshot()`` serves the last snapshot marked
+    ``stale`` and retries the sync with exponential backoff (from
+    ``retry_min`` up to ``retry_max`` seconds), so the door keeps working.
+    """
+
+    def __init__(
+        self,
+        repository,
+        transport,
+        latency_window=1000,
+        retry_min=RETRY_MIN,
+        retry_max=RETRY_MAX,
+    ):
+        self.repository = repository
+        self.transport = transport
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.events_applied = 0
+        self.events_failed = 0
+        self.needs_sync = False
+        self.sync_failures = 0
+        self._retry_at = 0.0
+        self.latencies = deque(maxlen=latency_window)
+
+    def start(self):
+        if self.repository.high_water_mark is None:
+            self.repository.full_resync()
+        self.transport.start(self.apply, self.catch_up)
+        return self
+
+    def stop(self):
+        self.transport.stop()
+
+    @property
+    def healthy(self) -> bool:
+        return self.transport.connected
+
+    def apply(self, event: ChangeEvent):
+        """Apply one change event to the repository."""
+        try:
+            if event.type == "DELETE":
+                self.repository.remove_ids([(event.old_record or {}).get("id")])
+            elif event.record:
+                self.repository.apply_records([event.record])
+        except Exception:
+            logger.exception("Could not apply %s event; catching up", event.type)
+            self.events_failed += 1
+            self.catch_up()
+            return
+        self.events_applied += 1
+        self.latencies.append(time.perf_counter() - event.published_at)
+
+    def _sync(self, force) -> bool:
+        try:
+            self.repository.sync(force=force)
+        except Exception:
+            self.sync_failures += 1
+            delay = min(self.retry_min * 2 ** (self.sync_failures - 1), self.retry_max)
+            self._retry_at = time.monotonic() + delay
+            self.needs_sync = True
+            logger.warning(
+                "Sync failed; serving the last snapshot, retrying in %.0f s",
+                delay,
+                exc_info=True,
+            )
+            return False
+        self.sync_failures = 0
+        self.needs_sync = False
+        return True
+
+    def catch_up(self) -> bool:
+        """Delta sync now, after a (re)subscribe or a failed event. On
+        failure ``snapshot()`` tries again after a backoff."""
+        return self._sync(force=True)
+
+    def snapshot(self):
+        """Current ``GuestSnapshot``; only hits the database if the feed is
+        down or behind. Never raises for an unreachable database: the last
+        snapshot comes back with ``stale`` set instead."""
+        if self.needs_sync:
+            if time.monotonic() >= self._retry_at:
+                self._sync(force=True)
+        elif not self.healthy:
+            self._sync(force=False)
+        snapshot = self.repository.snapshot()
+        return replace(snapshot, stale=True) if self.needs_sync else snapshot
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "healthy": self.healthy,
+            "version": self.repository.version,
+            "events_applied": self.events_applied,
+            "events_failed": self.events_failed,
+            "needs_sync": self.needs_sync,
+            "sync_failures": self.sync_failures,
+            "latency_p50_ms": (
+                latencies[len(latencies) // 2] * 1000 if latencies else None
+            ),
+            "latency_max_ms": latencies[-1] * 1000 if latencies else None,
+        }
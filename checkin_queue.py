@@ -0,0 +1,494 @@
+import itertools
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+import journal
+import perf
+
+PENDING = "pending"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+SUPERSEDED = "superseded"
+
+logger = logging.getLogger(__name__)
+
+
+def status_update(new_status: str, now=None) -> dict:
+    """Column values for a check-in status change.
+
+    Check-in times are kept to the second, so clicks within the same second
+    share a payload and go out as one batched update.
+    """
+    if new_status != "Checked In":
+        return {"check_in_status": new_status, "check_in_time": None}
+    now = now or datetime.now(timezone.utc)
+    return {
+        "check_in_status": new_status,
+        "check_in_time": now.replace(microsecond=0).isoformat(),
+    }
+
+
+def is_rejection(error: Exception) -> bool:
+    """Whether the backend answered and refused the request (an API error),
+    as opposed to not being reachable at all."""
+    return hasattr(error, "error") or hasattr(error, "code")
+
+
+@dataclass(frozen=True)
+class _Write:
+    values: dict
+    # Click time to the second; an intent replayed from the journal (which
+    # doesn't know the row version) only applies to rows nobody changed
+    # after it
+    clicked_at: datetime
+    seqs: tuple = ()
+    replayed: bool = False
+    version: Optional[int] = None
+
+    def key(self):
+        """``(values, condition)``: writes sharing a key go in one request.
+
+        The condition is ``("version", n)``, the row version the click saw
+        (migrations/007); an ``updated_at`` cutoff for replays; or None
+        (unconditional, for a table without the version column).
+        """
+        condition = None
+        if self.version is not None:
+            condition = ("version", self.version)
+        elif self.replayed:
+            condition = (self.clicked_at + timedelta(seconds=1)).isoformat()
+        return tuple(sorted(self.values.items())), condition
+
+
+class CheckInQueue:
+    """Write-behind queue for check-in status changes and added guests.
+
+    ``submit`` patches the guest in the shared ``GuestRepository`` straight
+    away and returns; a background worker writes the change later. Writes
+    are keyed by guest id, so clicking a guest twice before a flush only
+    sends the last status, and guests with the same new values (and row
+    version) are written with one ``update().in_("id", ids)`` request.
+    Failed requests are retried with exponential backoff; after
+    ``max_attempts`` the guest is marked failed and its row refetched.
+
+    With a ``journal.IntentJournal`` every change and every ``add_guest``
+    call is recorded on local disk before it is queued. Requests that fail
+    because the backend can't be reached are then retried until it can
+    (only API errors count towards ``max_attempts``), and a restarted
+    process replays whatever the last one didn't get to, in order.
+
+    Status changes are compare-and-set on ``(id, version)``: the write only
+    applies if the guest's row version is still the one the click saw, and
+    the returned row patches the snapshot in place. Clicking the same guest
+    again before the first write returns chains onto that write's version.
+    On a conflict only the conflicting guests are refetched; the newer
+    change wins and the guest is marked "superseded" (or "confirmed" if it
+    already has our values). A change replayed from the journal after a
+    restart doesn't know the version it saw, so it only applies if the
+    guest wasn't changed after the click (``updated_at`` against the click
+    time, both to the second).
+
+    ``state(guest_id)`` is "pending", "confirmed", "failed", "superseded"
+    or None for guests with no write through the queue.
+    """
+
+    def __init__(
+        self,
+        supabase,
+        repository,
+        table="guests",
+        batch_window=0.05,
+        max_attempts=5,
+        backoff=0.5,
+        max_backoff=10.0,
+        journal=None,
+    ):
+        self._supabase = supabase
+        self.repository = repository
+        self._table = table
+        self.batch_window = batch_window
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.journal = journal
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._in_flight = {}
+        self._attempts = defaultdict(int)
+        self._states = {}
+        self._errors = {}
+        self._adds = deque()
+        self._add_results = {}
+        self._add_seqs = itertools.count(1)
+        self._failures_in_a_row = 0
+        self._stopping = threading.Event()
+        self._worker = None
+        self.requests = 0
+        self.retries = 0
+        self.written = 0
+        self.worker_errors = 0
+
+    def start(self):
+        if self._worker is None:
+            if self.journal is not None:
+                self._recover()
+            self._worker = threading.Thread(
+                target=self._run, name=f"{self._table}-checkins", daemon=True
+            )
+            self._worker.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Flush what is queued, then stop the worker."""
+        self.flush(timeout)
+        self._stopping.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+            self._worker = None
+
+    def _apply_locally(self, guest_id, values: dict) -> bool:
+        return self.repository.update_values(guest_id, values)
+
+    @perf.timed("checkin.submit")
+    def submit(self, guest_id, new_status: str, version=None) -> bool:
+        """Apply a status change locally and queue its write.
+
+        ``version`` is the row version the click saw (the one displayed),
+        else the snapshot's. Returns False if the guest isn't in the
+        snapshot.
+        """
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        values = status_update(new_status, now)
+        if version is None:
+            version = self.repository.row_version(guest_id)
+        if not self._apply_locally(guest_id, values):
+            return False
+        seqs = ()
+        if self.journal is not None:
+            seqs = (self.journal.append("status", guest_id, values, now.isoformat()),)
+        with self._cond:
+            queued = self._pending.get(guest_id)
+            if queued is not None:
+                # The earlier click is superseded; finish its intents with ours
+                seqs = queued.seqs + seqs
+            self._pending[guest_id] = _Write(values, now, seqs, version=version)
+            self._attempts.pop(guest_id, None)
+            self._states[guest_id] = PENDING
+            self._errors.pop(guest_id, None)
+            self._cond.notify_all()
+        return True
+
+    def add_guest(self, params: dict) -> int:
+        """Queue an ``add_guest`` RPC call; returns a sequence number for
+        ``add_result``. Adds are sent one at a time, in order."""
+        if self.journal is not None:
+            seq = self.journal.append(
+                "add_guest", None, params, datetime.now(timezone.utc).isoformat()
+            )
+        else:
+            seq = next(self._add_seqs)
+        with self._cond:
+            self._adds.append((seq, params))
+            self._cond.notify_all()
+        return seq
+
+    def add_result(self, seq: int, timeout=0.0):
+        """``(state, error)`` of a queued add, waiting up to ``timeout``
+        seconds for it to leave the pending state."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while seq not in self._add_results:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return PENDING, None
+                self._cond.wait(remaining)
+            return self._add_results[seq]
+
+    def state(self, guest_id):
+        return self._states.get(guest_id)
+
+    def error(self, guest_id):
+        return self._errors.get(guest_id)
+
+    @property
+    def offline(self) -> bool:
+        """Whether the last attempt to reach the backend failed."""
+        return self._failures_in_a_row > 0
+
+    def flush(self, timeout=None) -> bool:
+        """Wait until every queued write is confirmed or failed."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._in_flight or self._adds:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            states = defaultdict(int)
+            for state in self._states.values():
+                states[state] += 1
+            return {
+                "queued": len(self._pending) + len(self._in_flight),
+                "adds_queued": len(self._adds),
+                "requests": self.requests,
+                "retries": self.retries,
+                "written": self.written,
+                "worker_errors": self.worker_errors,
+                **states,
+            }
+
+    # -- journal -----------------------------------------------------------
+    def _recover(self):
+        """Requeue what the journal holds from before this process started."""
+        latest = {}
+        for intent in self.journal.pending("status"):
+            earlier = latest.get(intent.key)
+            seqs = (earlier.seqs if earlier else ()) + (intent.seq,)
+            clicked_at = datetime.fromisoformat(intent.created_at)
+            latest[intent.key] = _Write(intent.payload, clicked_at, seqs, True)
+        for guest_id, write in latest.items():
+            self._apply_locally(guest_id, write.values)
+        adds = [(i.seq, i.payload) for i in self.journal.pending("add_guest")]
+        with self._cond:
+            for guest_id, write in latest.items():
+                self._pending[guest_id] = write
+                self._states[guest_id] = PENDING
+            self._adds.extend(adds)
+
+    def _finish(self, seqs, state=journal.DONE, error=None):
+        if self.journal is not None:
+            self.journal.finish(seqs, state, error)
+
+    # -- worker ------------------------------------------------------------
+    def _run(self):
+        errors_in_a_row = 0
+        while not self._stopping.is_set():
+            with self._cond:
+                while (
+                    not self._pending and not self._adds and not self._stopping.is_set()
+                ):
+                    self._cond.wait()
+            # Let a burst of clicks coalesce into fewer requests
+            self._stopping.wait(self.batch_window)
+            try:
+                failed = self._send()
+            except Exception:
+                # A bug or a bad record must not kill the worker: the batch
+                # is back in the queue, so try it again after a pause
+                logger.exception("Check-in batch failed; retrying")
+                self.worker_errors += 1
+                errors_in_a_row += 1
+                delay = self.backoff * 2 ** (errors_in_a_row - 1)
+                self._stopping.wait(min(delay, self.max_backoff))
+                continue
+            errors_in_a_row = 0
+            if failed:
+                self._failures_in_a_row += 1
+                delay = self.backoff * 2 ** (self._failures_in_a_row - 1)
+                self._stopping.wait(min(delay, self.max_backoff))
+            else:
+                self._failures_in_a_row = 0
+
+    def _send(self) -> bool:
+        """Send queued adds, then the queued writes as one batch; returns
+        True if a request failed."""
+        if self._send_adds():
+            return True
+        with self._cond:
+            self._in_flight, self._pending = self._pending, {}
+        try:
+            return self._write(self._in_flight)
+        except Exception:
+            self._requeue(self._in_flight)
+            raise
+        finally:
+            with self._cond:
+                self._in_flight = {}
+                self._cond.notify_all()
+
+    def _requeue(self, batch: dict):
+        """Put back the writes of a batch that weren't settled; a newer
+        click queued since takes precedence."""
+        with self._cond:
+            for guest_id, write in batch.items():
+                if self._states.get(guest_id) == PENDING:
+                    self._pending.setdefault(guest_id, write)
+
+    def _send_adds(self) -> bool:
+        """Send queued adds in order; returns True if the backend is
+        unreachable (the add stays at the head of the queue)."""
+        while True:
+            with self._cond:
+                if not self._adds:
+                    return False
+                seq, params = self._adds[0]
+            self.requests += 1
+            perf.count_query()
+            try:
+                with perf.span("db.add_guest"):
+                    response = self._supabase.rpc("add_guest", params).execute()
+                if response.data:
+                    result = (CONFIRMED, None)
+                else:
+                    result = (FAILED, "the guest was not added")
+            except Exception as e:
+                perf.count("db.errors")
+                if not is_rejection(e) and self.journal is not None:
+                    return True
+                details = getattr(e, "error", None)
+                if isinstance(details, dict):
+                    result = (FAILED, f"{e} {details.get('details', '')}".strip())
+                else:
+                    result = (FAILED, str(e))
+            state, error = result
+            self._finish(
+                [seq], journal.DONE if state == CONFIRMED else journal.FAILED, error
+            )
+            with self._cond:
+                self._adds.popleft()
+                self._add_results[seq] = result
+                self._cond.notify_all()
+
+    def _write(self, batch: dict) -> bool:
+        """Send one request per distinct payload; returns True on any failure."""
+        groups = defaultdict(list)
+        for guest_id, write in batch.items():
+            groups[write.key()].append(guest_id)
+        any_failed = False
+        for (payload, condition), ids in groups.items():
+            self.requests += 1
+            query = self._supabase.table(self._table).update(dict(payload))
+            query = query.in_("id", ids)
+            if isinstance(condition, tuple):
+                query = query.eq(*condition)
+            elif condition is not None:
+                query = query.lt("updated_at", condition)
+            perf.count_query()
+            try:
+                with perf.span("db.write"):
+                    response = query.execute()
+            except Exception as e:
+                perf.count("db.errors")
+                any_failed = True
+                self._retry_or_fail(ids, batch, e)
+                continue
+            records = response.data or []
+            perf.count("db.rows", len(records))
+            written = {record["id"] for record in records}
+            with self._cond:
+                # Don't undo a newer click that is still queued; it was made
+                # on top of this write, so it now expects this write's version
+                current = []
+                for record in records:
+                    newer = self._pending.get(record["id"])
+                    if newer is None:
+                        current.append(record)
+                    elif (
+                        newer.version is not None
+                        and newer.version == batch[record["id"]].version
+                    ):
+                        self._pending[record["id"]] = replace(
+                            newer, version=record.get("version")
+                        )
+            self.repository.apply_records(current)
+            self.written += len(written)
+            missing = [guest_id for guest_id in ids if guest_id not in written]
+            if condition is not None and missing:
+                self._resolve_conflicts(missing, dict(payload), batch)
+                missing = []
+            with self._cond:
+                for guest_id in ids:
+                    if guest_id in self._pending:
+                        continue
+                    self._attempts.pop(guest_id, None)
+                    if guest_id in missing:
+                        self._states[guest_id] = FAILED
+                        self._errors[guest_id] = "guest no longer exists"
+                    elif guest_id in written:
+                        self._states[guest_id] = CONFIRMED
+            self._finish(s for guest_id in written for s in batch[guest_id].seqs)
+            self._finish(
+                (s for guest_id in missing for s in batch[guest_id].seqs),
+                journal.FAILED,
+                "guest no longer exists",
+            )
+        return any_failed
+
+    def _resolve_conflicts(self, ids, payload: dict, batch: dict):
+        """Settle conditional writes the database turned down by refetching
+        just those guests: each was deleted, changed by someone else, or
+        already has our values (an earlier attempt did land but its response
+        was lost)."""
+        with self._cond:
+            ids = [guest_id for guest_id in ids if guest_id not in self._pending]
+        try:
+            frame = self.repository.fetch_rows(ids)
+        except Exception:
+            # Can't tell yet; try the write again later
+            with self._cond:
+                for guest_id in ids:
+                    self._pending.setdefault(guest_id, batch[guest_id])
+            return
+        status = payload["check_in_status"]
+        for guest_id in ids:
+            seqs = batch[guest_id].seqs
+            if guest_id not in frame.index:
+                state, error = FAILED, "guest no longer exists"
+                self._finish(seqs, journal.FAILED, error)
+            elif frame.at[guest_id, "check_in_status"] == status:
+                state, error = CONFIRMED, None
+                self._finish(seqs)
+            else:
+                state, error = SUPERSEDED, "changed on another device"
+                self._finish(seqs, journal.DONE, error)
+            with self._cond:
+                if guest_id not in self._pending:
+                    self._states[guest_id] = state
+                    if error:
+                        self._errors[guest_id] = error
+
+    def _retry_or_fail(self, ids, batch: dict, error: Exception):
+        # With a journal, an unreachable backend is waited out rather than
+        # counted as a failed attempt
+        keep_trying = self.journal is not None and not is_rejection(error)
+        given_up = []
+        with self._cond:
+            for guest_id in ids:
+                newer = self._pending.get(guest_id)
+                if newer is not None:
+                    # A newer click for this guest supersedes the failed write
+                    seqs = batch[guest_id].seqs + newer.seqs
+                    self._pending[guest_id] = replace(newer, seqs=seqs)
+                    continue
+                self._errors[guest_id] = str(error)
+                if not keep_trying:
+                    self._attempts[guest_id] += 1
+                if keep_trying or self._attempts[guest_id] < self.max_attempts:
+                    self._pending[guest_id] = replace(batch[guest_id], replayed=True)
+                    self.retries += 1
+                else:
+                    del self._attempts[guest_id]
+                    self._states[guest_id] = FAILED
+                    given_up.append(guest_id)
+        self._finish(
+            (s for guest_id in given_up for s in batch[guest_id].seqs),
+            journal.FAILED,
+            str(error),
+        )
+        if given_up:
+            # Put the server's version back in place of the optimistic one
+            try:
+                self.repository.fetch_rows(given_up)
+            except Exception:
+                pass
@@ -0,0 +1,118 @@
+import csv
+import html
+import io
+import re
+import threading
+
+import pandas as pd
+
+# QR payloads are "SNOWYOWL:<token>" so a stray scan of another code is
+# recognisably not ours; bare tokens typed by hand are accepted too.
+QR_PREFIX = "SNOWYOWL:"
+_TOKEN = re.compile(r"[0-9a-f]{8,32}")
+
+
+def parse_scan(text: str):
+    """The token in a scanned or typed string, or None if it isn't one."""
+    text = (text or "").strip()
+    if text.upper().startswith(QR_PREFIX):
+        text = text[len(QR_PREFIX) :]
+    token = text.strip().lower()
+    return token if _TOKEN.fullmatch(token) else None
+
+
+class TokenIndex:
+    """``checkin_token`` -> guest id, kept in step with a ``GuestRepository``.
+
+    A plain dict, so a scan resolves in O(1) however long the list is. As a
+    repository listener it is rebuilt on a full resync and patched per
+    changed or deleted guest.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._ids = {}
+        self._tokens = {}
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _add(self, guest_id, token):
+        self._discard(guest_id)
+        if isinstance(token, str) and token:
+            token = token.lower()
+            self._ids[token] = guest_id
+            self._tokens[guest_id] = token
+
+    def _discard(self, guest_id):
+        token = self._tokens.pop(guest_id, None)
+        if token is not None and self._ids.get(token) == guest_id:
+            del self._ids[token]
+
+    def reset(self, frame: pd.DataFrame):
+        with self.lock:
+            self._ids = {}
+            self._tokens = {}
+            if "checkin_token" in frame.columns:
+                for guest_id, token in zip(frame.index, frame["checkin_token"]):
+                    self._add(guest_id, token)
+
+    def upsert(self, rows: pd.DataFrame, previous: pd.DataFrame):
+        with self.lock:
+            if "checkin_token" in rows.columns:
+                for guest_id, token in zip(rows.index, rows["checkin_token"]):
+                    self._add(guest_id, token)
+
+    def remove(self, rows: pd.DataFrame):
+        with self.lock:
+            for guest_id in rows.index:
+                self._discard(guest_id)
+
+    def resolve(self, scan: str):
+        """Guest id for a scanned code or typed token, or None."""
+        token = parse_scan(scan)
+        return None if token is None else self._ids.get(token)
+
+
+def _with_tokens(frame: pd.DataFrame) -> pd.DataFrame:
+    frame = frame[frame["checkin_token"].notna()]
+    return frame.sort_values(["brother_name", "name"])
+
+
+def token_csv(frame: pd.DataFrame) -> bytes:
+    """Name, brother and token per guest, e.g. for a mail merge."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["name", "brother", "campus_status", "checkin_token"])
+    for row in _with_tokens(frame).itertuples():
+        writer.writerow(
+            [row.name, row.brother_name, row.campus_status, row.checkin_token]
+        )
+    return out.getvalue().encode("utf-8")
+
+
+def qr_sheet(frame: pd.DataFrame, title="Guest passes") -> bytes:
+    """Printable HTML page with one QR code and name per guest.
+
+    Needs the optional ``segno`` package.
+    """
+    import segno
+
+    cards = []
+    for row in _with_tokens(frame).itertuples():
+        svg = segno.make(QR_PREFIX + row.checkin_token, error="m").svg_inline(scale=4)
+        cards.append(
+            f'<div class="card">{svg}<div><b>{html.escape(row.name)}</b><br>'
+            f"{html.escape(str(row.brother_name))}</div></div>"
+        )
+    page = f"""<!doctype html>
+<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>
+<style>
+body {{ font-family: sans-serif; }}
+.grid {{ display: grid; grid-template-columns: repeat(4, 1fr); gap: 12px; }}
+.card {{ border: 1px dashed #999; padding: 8px; text-align: center;
+         break-inside: avoid; }}
+</style></head>
+<body><h1>{html.escape(title)}</h1><div class="grid">{"".join(cards)}</div></body></html>
+"""
+    return page.encode("utf-8")
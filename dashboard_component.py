@@ -3,7 +3,11 @@ import pytz
 import streamlit as st
 import pandas as pd
 
+import perf
+from aggregates import GuestAggregates
+from rollups import BUCKET_MINUTES, CheckInRollup
 from visualization import (
+    BROTHER_DISPLAY_OPTIONS,
     plot_brother_guest_distribution,
     plot_campus_distribution,
     plot_class_distribution,
@@ -17,9 +21,18 @@ def create_dashboard_component(filtered_df: pd.DataFrame):
         st.info("No guest data available for dashboard.")
         return
 
+    aggregates = GuestAggregates()
+    aggregates.reset(filtered_df)
+    create_metrics_component(aggregates)
+    create_charts_component(filtered_df, aggregates)
+
+
+@perf.timed("dashboard.metrics")
+def create_metrics_component(aggregates: GuestAggregates):
+    """Top row of live capacity, location and F/M metrics."""
     # Calculate key metrics
-    total_guests = len(filtered_df)
-    checked_in_guests = len(filtered_df[filtered_df["check_in_status"] == "Checked In"])
+    total_guests = aggregates.total
+    checked_in_guests = aggregates.checked_in
     capacity_pct = (checked_in_guests / total_guests) * 100 if total_guests > 0 else 0
 
     # Top metrics row
@@ -36,15 +49,13 @@ def create_dashboard_component(filtered_df: pd.DataFrame):
         st.metric("Total + Brothers", total_guests + 95)
 
     # Campus status breakdown for checked-in guests
-    checked_in_df = filtered_df[filtered_df["check_in_status"] == "Checked In"]
-    campus_breakdown = checked_in_df["campus_status"].value_counts()
-    on_campus = campus_breakdown.get("On Campus", 0)
-    off_campus = campus_breakdown.get("Off Campus", 0)
+    on_campus = aggregates.count("checked_in_campus", "On Campus")
+    off_campus = aggregates.count("checked_in_campus", "Off Campus")
     on_campus_pct = (
         (on_campus / checked_in_guests) * 100 if checked_in_guests > 0 else 0
     )
-    F_guests = (checked_in_df["gender"] == "F").sum()
-    M_guests = (checked_in_df["gender"] == "M").sum()
+    F_guests = aggregates.count("checked_in_gender", "F")
+    M_guests = aggregates.count("checked_in_gender", "M")
     F_pct = (F_guests / checked_in_guests) * 100 if checked_in_guests > 0 else 0
 
     with col3:
@@ -56,41 +67,97 @@ def create_dashboard_component(filtered_df: pd.DataFrame):
 
     with col4:
         st.metric("Checked-In F/M", f"{F_guests}/{M_guests}", f"{F_pct:.1f}%")
+
+
+def plot_cumulative_checkins(rollup: CheckInRollup, minutes=5):
+    """Cumulative check-ins, occupancy and arrivals per bucket over time, or
+    None if no one has checked in."""
+    series = rollup.series(minutes, tz=pytz.timezone("US/Eastern"))
+    if series.empty:
+        return None
+
+    fig = go.Figure()
+    fig.add_trace(
+        go.Bar(
+            x=series.index,
+            y=series["arrivals"],
+            name=f"Arrivals per {minutes} min",
+            yaxis="y2",
+            opacity=0.4,
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=series.index,
+            y=series["cumulative"],
+            mode="lines",
+            name="Cumulative Check-ins",
+            line_shape="hv",
+        )
+    )
+    fig.add_trace(
+        go.Scatter(
+            x=series.index,
+            y=series["occupancy"],
+            mode="lines",
+            name="Checked In Now",
+            line_shape="hv",
+        )
+    )
+    fig.update_layout(
+        title="Cumulative Check-ins",
+        xaxis_title="Time (Eastern Time)",
+        yaxis_title="Total Check-ins",
+        yaxis2=dict(title="Arrivals", overlaying="y", side="right", showgrid=False),
+        legend=dict(orientation="h"),
+    )
+    return fig
+
+
+def _figure(figure_cache, key, build):
+    return build() if figure_cache is None else figure_cache.get(key, build)
+
+
+def _plotly_chart(fig, **kwargs):
+    # Serializing the figure to JSON happens here, on every rerun
+    with perf.span("charts.plotly_chart"):
+        st.plotly_chart(fig, **kwargs)
+
+
+@perf.timed("dashboard.charts")
+def create_charts_component(
+    filtered_df: pd.DataFrame,
+    aggregates: GuestAggregates,
+    figure_cache=None,
+    rollup: CheckInRollup = None,
+):
+    """Check-ins over time and listed guest distribution charts.
+
+    The arrivals chart reads a shared ``rollup`` kept in step with the
+    guests; without one it is rolled up from ``filtered_df`` here. With a
+    ``figure_cache``, figures are reused until the data versions or the
+    display options change.
+    """
+    version = aggregates.version
+    if rollup is None:
+        rollup = CheckInRollup()
+        rollup.reset(filtered_df)
     # Create tabs for different chart categories
     tab1, tab2 = st.tabs(["Live Check-Ins", "Listed Guest Distribution"])
 
     with tab1:
         # Check-ins over time
-        # Define the timezone conversion
-        eastern = pytz.timezone("US/Eastern")
-
         st.subheader("Check-ins Over Time")
-        time_data = checked_in_df[checked_in_df["check_in_time"].notna()].copy()
-        if not time_data.empty:
-            time_data["check_in_time"] = pd.to_datetime(
-                time_data["check_in_time"], utc=True
-            )
-            time_data["check_in_time"] = time_data["check_in_time"].dt.tz_convert(
-                eastern
-            )
-
-            time_data = time_data.sort_values("check_in_time")
-            y_values = list(range(1, len(time_data) + 1))
-
-            fig = go.Figure(
-                go.Scatter(
-                    x=time_data["check_in_time"],
-                    y=y_values,
-                    mode="lines",
-                    name="Cumulative Check-ins",
-                )
-            )
-            fig.update_layout(
-                title="Cumulative Check-ins",
-                xaxis_title="Time (Eastern Time)",
-                yaxis_title="Total Check-ins",
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        minutes = st.selectbox(
+            "Bucket (minutes)", BUCKET_MINUTES, index=1, key="checkin_bucket"
+        )
+        fig = _figure(
+            figure_cache,
+            ("checkins", version, rollup.version, minutes),
+            lambda: plot_cumulative_checkins(rollup, minutes),
+        )
+        if fig is not None:
+            _plotly_chart(fig, use_container_width=True)
         else:
             st.info("No check-in time data available")
 
@@ -100,16 +167,45 @@ def create_dashboard_component(filtered_df: pd.DataFrame):
 
         with col1:
             # Brother distribution chart
-            st.plotly_chart(
-                plot_brother_guest_distribution(filtered_df), use_container_width=True
+            selected_display = st.selectbox(
+                "Select number of brothers to display:",
+                options=list(BROTHER_DISPLAY_OPTIONS),
+                index=0,  # Default to first option
+            )
+            _plotly_chart(
+                _figure(
+                    figure_cache,
+                    ("brothers", version, selected_display),
+                    lambda: plot_brother_guest_distribution(
+                        aggregates.counts("brother"), selected_display
+                    ),
+                ),
+                use_container_width=True,
             )
-            st.plotly_chart(
-                plot_class_distribution(filtered_df), use_container_width=True
+            _plotly_chart(
+                _figure(
+                    figure_cache,
+                    ("class", version),
+                    lambda: plot_class_distribution(aggregates.counts("year")),
+                ),
+                use_container_width=True,
             )
 
         with col2:
             # Second row split into two charts
-            st.plotly_chart(plot_gender_ratio(filtered_df), use_container_width=True)
-            st.plotly_chart(
-                plot_campus_distribution(filtered_df), use_container_width=True
+            _plotly_chart(
+                _figure(
+                    figure_cache,
+                    ("gender", version),
+                    lambda: plot_gender_ratio(aggregates.counts("gender")),
+                ),
+                use_container_width=True,
+            )
+            _plotly_chart(
+                _figure(
+                    figure_cache,
+                    ("campus", version),
+                    lambda: plot_campus_distribution(aggregates.counts("campus")),
+                ),
+                use_container_width=True,
             )
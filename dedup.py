@@ -0,0 +1,178 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from name_utils import bounded_levenshtein, soundex, tokenize
+
+DEFAULT_THRESHOLD = 0.85
+
+
+def name_parts(name):
+    """``(given, surname)`` of a guest name: the last word is the surname
+    and the words before it are run together, so "JD Buell" and "J.D.
+    Buell" agree."""
+    tokens = tokenize(name)
+    if not tokens:
+        return "", ""
+    return "".join(tokens[:-1]), tokens[-1]
+
+
+def blocking_keys(given: str, surname: str) -> list:
+    """Blocks a name is compared within.
+
+    Same surname and a first name that sounds alike catches variant
+    spellings and typos of the first name; same first name and a surname
+    that sounds alike catches them in the surname. Names sharing neither
+    block are never compared.
+    """
+    keys = [("surname", surname, soundex(given))]
+    if given:
+        keys.append(("given", given, soundex(surname)))
+    return keys
+
+
+def similarity(a: str, b: str, threshold=0.0) -> float:
+    """1 minus the edit distance over the longer length (1.0 = identical);
+    0.0 for pairs that can't reach ``threshold``."""
+    if a == b:
+        return 1.0
+    longest = max(len(a), len(b))
+    distance = bounded_levenshtein(a, b, int((1 - threshold) * longest))
+    return 0.0 if distance is None else 1 - distance / longest
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, item):
+        self.parent.setdefault(item, item)
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+@dataclass
+class DuplicateGroup:
+    """Guests that look like one person, and which of them to keep."""
+
+    ids: list
+    names: list
+    score: float
+    keep: object
+
+
+@dataclass
+class DedupReport:
+    groups: list = field(default_factory=list)
+    names: int = 0
+    distinct_names: int = 0
+    blocks: int = 0
+    comparisons: int = 0
+
+    def summary(self) -> dict:
+        return {
+            "guests": self.names,
+            "distinct names": self.distinct_names,
+            "blocks": self.blocks,
+            "comparisons": self.comparisons,
+            "duplicate groups": len(self.groups),
+            "guests in groups": sum(len(group.ids) for group in self.groups),
+        }
+
+
+def find_duplicates(records, threshold=DEFAULT_THRESHOLD, prefer=None) -> DedupReport:
+    """Group ``(id, name)`` records that probably name the same person.
+
+    Rows are first collapsed to distinct normalized names (identical names
+    are duplicates without comparing anything), names are bucketed by
+    ``blocking_keys``, and only names sharing a block are compared. Pairs
+    at or above ``threshold`` similarity are joined into groups. Within a
+    group the id for which ``prefer(id)`` is true (e.g. already checked
+    in) is suggested to keep, else the lowest id.
+    """
+    report = DedupReport()
+    by_name = defaultdict(list)
+    for record_id, name in records:
+        given, surname = name_parts(name)
+        if surname:
+            by_name[(given, surname)].append((record_id, name))
+            report.names += 1
+    report.distinct_names = len(by_name)
+
+    blocks = defaultdict(list)
+    for parts in by_name:
+        for key in blocking_keys(*parts):
+            blocks[key].append(parts)
+    report.blocks = len(blocks)
+
+    links = _UnionFind()
+    scores = {}
+    for members in blocks.values():
+        for i, a in enumerate(members):
+            for b in members[i + 1 :]:
+                report.comparisons += 1
+                score = similarity(a[0] + " " + a[1], b[0] + " " + b[1], threshold)
+                if score >= threshold:
+                    links.union(a, b)
+                    scores[a] = min(scores.get(a, 1.0), score)
+                    scores[b] = min(scores.get(b, 1.0), score)
+
+    clusters = defaultdict(list)
+    for parts, rows in by_name.items():
+        if len(rows) > 1 or parts in links.parent:
+            clusters[links.find(parts)].append(parts)
+    for members in clusters.values():
+        rows = [row for parts in members for row in by_name[parts]]
+        if len(rows) < 2:
+            continue
+        ids = [record_id for record_id, _ in rows]
+        preferred = [i for i in ids if prefer is not None and prefer(i)]
+        report.groups.append(
+            DuplicateGroup(
+                ids=ids,
+                names=[name for _, name in rows],
+                score=min(scores.get(parts, 1.0) for parts in members),
+                keep=min(preferred or ids),
+            )
+        )
+    report.groups.sort(key=lambda group: (-group.score, group.names[0]))
+    return report
+
+
+def guest_duplicates(frame: pd.DataFrame, threshold=DEFAULT_THRESHOLD) -> DedupReport:
+    """``find_duplicates`` over the guest frame, keeping checked-in guests."""
+    if frame.empty:
+        return DedupReport()
+    checked_in = set(frame.index[frame["check_in_status"] == "Checked In"])
+    return find_duplicates(
+        zip(frame.index, frame["name"]), threshold, prefer=checked_in.__contains__
+    )
+
+
+def duplicates_table(report: DedupReport, frame: pd.DataFrame) -> pd.DataFrame:
+    """One row per guest in a duplicate group, for review."""
+    rows = []
+    for number, group in enumerate(report.groups, 1):
+        for guest_id in group.ids:
+            guest = frame.loc[guest_id]
+            rows.append(
+                {
+                    "group": number,
+                    "similarity": round(group.score, 2),
+                    "keep": guest_id == group.keep,
+                    "id": guest_id,
+                    "name": guest["name"],
+                    "brother": guest["brother_name"],
+                    "campus_status": guest["campus_status"],
+                    "check_in_status": guest["check_in_status"],
+                }
+            )
+    return pd.DataFrame(rows)
@@ -0,0 +1,317 @@
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import perf
+from guest_repository import GUEST_SELECT, normalize_guests
+
+ARCHIVE_DIR = "archive"
+ARCHIVE_FILE = "guests.parquet"
+FETCH_PAGE = 1000
+# Archived guest columns; tokens and versions only matter while live, and
+# event_id comes from the directory name
+ARCHIVE_COLUMNS = {
+    "id": "int64",
+    "name": "string",
+    "brother_id": "int64",
+    "brother_name": "string",
+    "brother_year": "int16",
+    "campus_status": "string",
+    "gender": "string",
+    "check_in_status": "string",
+    "check_in_time": "timestamp",
+    "created_at": "timestamp",
+    "updated_at": "timestamp",
+}
+EVENT_METADATA_KEY = b"snowyowl.event"
+
+logger = logging.getLogger(__name__)
+
+
+def active_event(supabase):
+    """The open event live guests belong to, or None without events
+    (migrations/008 not applied, or every event closed)."""
+    try:
+        response = (
+            supabase.table("events")
+            .select("*")
+            .is_("closed_at", "null")
+            .order("starts_at", desc=True)
+            .order("id", desc=True)
+            .limit(1)
+            .execute()
+        )
+    except Exception:
+        return None
+    return response.data[0] if response.data else None
+
+
+def list_events(supabase) -> list:
+    """Every event, oldest first."""
+    response = supabase.table("events").select("*").order("starts_at").execute()
+    return response.data or []
+
+
+def start_event(supabase, name: str) -> dict:
+    """Open a new event; guests added from now on default to it."""
+    response = supabase.table("events").insert({"name": name}).execute()
+    return response.data[0]
+
+
+def _fetch_event_guests(supabase, event_id) -> list:
+    """All guests of one event with their brother join, by id pages."""
+    rows, last_id = [], 0
+    while True:
+        response = (
+            supabase.table("guests")
+            .select(GUEST_SELECT)
+            .eq("event_id", event_id)
+            .gt("id", last_id)
+            .order("id")
+            .limit(FETCH_PAGE)
+            .execute()
+        )
+        page = response.data or []
+        perf.count_query(len(page))
+        rows += page
+        if len(page) < FETCH_PAGE:
+            return rows
+        last_id = page[-1]["id"]
+
+
+def archive_schema():
+    """One schema for every file, so events scan together even when some
+    have no guests or columns were added since."""
+    import pyarrow as pa
+
+    types = {
+        "int64": pa.int64(),
+        "int16": pa.int16(),
+        "string": pa.string(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+    }
+    return pa.schema(
+        [(column, types[kind]) for column, kind in ARCHIVE_COLUMNS.items()]
+    )
+
+
+def event_path(archive_dir, event_id) -> str:
+    return os.path.join(archive_dir, f"event_id={event_id}", ARCHIVE_FILE)
+
+
+def object_path(event_id) -> str:
+    """Where an event's file goes in the storage bucket."""
+    return f"event_id={event_id}/{ARCHIVE_FILE}"
+
+
+def upload_archive(supabase, bucket: str, archive_dir, event_id):
+    """Copy an event's file to Supabase Storage and check the stored copy
+    matches it byte for byte."""
+    with open(event_path(archive_dir, event_id), "rb") as f:
+        data = f.read()
+    objects = supabase.storage.from_(bucket)
+    objects.upload(
+        object_path(event_id),
+        data,
+        {"content-type": "application/octet-stream", "upsert": "true"},
+    )
+    if objects.download(object_path(event_id)) != data:
+        raise RuntimeError(f"Stored copy of event {event_id} does not match")
+
+
+def archive_event(
+    supabase, event: dict, archive_dir=ARCHIVE_DIR, bucket=None, delete=False
+) -> int:
+    """Compact one event's guests into a Parquet file and mark the event
+    closed; returns the number of guests archived.
+
+    The file is written next to its final path and renamed into place, and
+    read back before anything is changed in the database, so a failure
+    leaves the event live and whole. With ``bucket`` the file is also
+    copied to Supabase Storage, since the local disk may not outlive the
+    app (Streamlit Community Cloud). The guest rows stay in the database
+    unless ``delete`` is set, which needs ``bucket``: rows are deleted only
+    once the stored copy checks out. Needs ``pyarrow``.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if delete and not bucket:
+        raise ValueError("Deleting archived guests needs a storage bucket")
+
+    with perf.span("archive.write"):
+        frame = normalize_guests(_fetch_event_guests(supabase, event["id"]))
+        frame = frame.reindex(columns=list(ARCHIVE_COLUMNS))
+        for column, kind in ARCHIVE_COLUMNS.items():
+            if kind == "timestamp":
+                frame[column] = pd.to_datetime(frame[column], utc=True)
+            elif kind == "string":
+                frame[column] = frame[column].astype(object)
+        table = pa.Table.from_pandas(
+            frame, schema=archive_schema(), preserve_index=False
+        )
+        table = table.replace_schema_metadata(
+            {EVENT_METADATA_KEY: json.dumps(event, default=str).encode()}
+        )
+
+        path = event_path(archive_dir, event["id"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pq.write_table(table, path + ".tmp", compression="zstd")
+        os.replace(path + ".tmp", path)
+        if pq.read_metadata(path).num_rows != len(frame):
+            raise RuntimeError(f"Archive of event {event['id']} is incomplete")
+    if bucket:
+        with perf.span("archive.upload"):
+            upload_archive(supabase, bucket, archive_dir, event["id"])
+
+    if event.get("closed_at") is None:
+        closed_at = datetime.now(timezone.utc).isoformat()
+        supabase.table("events").update({"closed_at": closed_at}).eq(
+            "id", event["id"]
+        ).execute()
+    if delete:
+        supabase.table("guests").delete().eq("event_id", event["id"]).execute()
+    return len(frame)
+
+
+def guest_key(names: pd.Series) -> pd.Series:
+    """Name as matched across events: case and spacing ignored."""
+    return (
+        names.astype(str)
+        .str.strip()
+        .str.casefold()
+        .map(lambda name: re.sub(r"\s+", " ", name))
+    )
+
+
+class EventArchive:
+    """Read side of the Parquet archive of closed events.
+
+    One file per event under ``root/event_id=<id>/``, so a scan filtered on
+    events opens only their files and reads only the columns asked for.
+    Every query here costs the same however large the live event is, and
+    the live queries never touch it. ``bucket`` names the Supabase Storage
+    bucket closed events are copied to, if any. Needs ``pyarrow``.
+    """
+
+    def __init__(self, root=ARCHIVE_DIR, bucket=None):
+        self.root = root
+        self.bucket = bucket
+
+    def restore(self, supabase) -> list:
+        """Bring back the files of closed events missing from ``root`` (a
+        fresh disk after a redeploy): from the bucket, else re-archived from
+        the guest rows still in the database. Returns the event ids
+        restored."""
+        restored = []
+        for event in list_events(supabase):
+            path = event_path(self.root, event["id"])
+            if event.get("closed_at") is None or os.path.exists(path):
+                continue
+            if self.bucket:
+                try:
+                    data = supabase.storage.from_(self.bucket).download(
+                        object_path(event["id"])
+                    )
+                except Exception:
+                    logger.warning("Event %s is not in storage", event["id"])
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path + ".tmp", "wb") as f:
+                        f.write(data)
+                    os.replace(path + ".tmp", path)
+                    restored.append(event["id"])
+                    continue
+            guests = (
+                supabase.table("guests")
+                .select("id", count="exact", head=True)
+                .eq("event_id", event["id"])
+                .execute()
+            )
+            if not guests.count:
+                logger.warning("No copy of event %s left to restore", event["id"])
+                continue
+            archive_event(supabase, event, self.root)
+            restored.append(event["id"])
+        return restored
+
+    def events(self) -> pd.DataFrame:
+        """Archived events (from the file footers), oldest first."""
+        import pyarrow.parquet as pq
+
+        events = []
+        if os.path.isdir(self.root):
+            for entry in os.listdir(self.root):
+                path = os.path.join(self.root, entry, ARCHIVE_FILE)
+                if not entry.startswith("event_id=") or not os.path.exists(path):
+                    continue
+                footer = pq.read_metadata(path)
+                event = json.loads(footer.metadata[EVENT_METADATA_KEY])
+                event["guests"] = footer.num_rows
+                event["size_bytes"] = os.path.getsize(path)
+                events.append(event)
+        frame = pd.DataFrame(
+            events, columns=["id", "name", "starts_at", "guests", "size_bytes"]
+        )
+        frame["starts_at"] = pd.to_datetime(frame["starts_at"], utc=True)
+        return frame.sort_values(["starts_at", "id"]).reset_index(drop=True)
+
+    def scan(self, columns, event_ids=None) -> pd.DataFrame:
+        """``columns`` of the guests of ``event_ids`` (all events if None),
+        with ``event_id``."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=["event_id", *columns])
+        with perf.span("archive.scan"):
+            dataset = ds.dataset(
+                self.root,
+                schema=archive_schema().append(pa.field("event_id", pa.int64())),
+                format="parquet",
+                partitioning="hive",
+            )
+            where = None
+            if event_ids is not None:
+                where = ds.field("event_id").isin(list(event_ids))
+            table = dataset.to_table(columns=["event_id", *columns], filter=where)
+            frame = table.to_pandas()
+        perf.count("archive.rows", len(frame))
+        return frame
+
+    def guests_per_brother(self, event_ids=None) -> pd.DataFrame:
+        """Per brother: guests listed, guests checked in, events hosted at
+        and guests per event."""
+        frame = self.scan(["brother_name", "check_in_status"], event_ids)
+        frame["checked_in"] = frame["check_in_status"] == "Checked In"
+        per_brother = frame.groupby("brother_name").agg(
+            guests=("event_id", "size"),
+            checked_in=("checked_in", "sum"),
+            events=("event_id", "nunique"),
+        )
+        per_brother["per_event"] = per_brother["guests"] / per_brother["events"]
+        return per_brother.sort_values("guests", ascending=False)
+
+    def attendance(self, event_ids=None) -> pd.DataFrame:
+        """Per guest (matched by name): events listed at, events checked in
+        at, and the last event seen."""
+        frame = self.scan(["name", "check_in_status"], event_ids)
+        frame["guest"] = guest_key(frame["name"])
+        checked_in = frame["check_in_status"] == "Checked In"
+        frame["attended"] = frame["event_id"].where(checked_in)
+        per_guest = frame.groupby("guest").agg(
+            name=("name", "last"),
+            events=("event_id", "nunique"),
+            attended=("attended", "nunique"),
+            last_event=("event_id", "max"),
+        )
+        return per_guest.sort_values(["events", "attended"], ascending=False)
+
+    def repeat_guests(self, event_ids=None, min_events=2) -> pd.DataFrame:
+        """Guests listed at ``min_events`` or more of the events."""
+        per_guest = self.attendance(event_ids)
+        return per_guest[per_guest["events"] >= min_events]
@@ -0,0 +1,511 @@
+import copy
+import itertools
+import re
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+
+@dataclass
+class FakeResponse:
+    data: Any
+    count: Optional[int] = None
+
+
+class FakeAPIError(Exception):
+    """Mimics ``postgrest.exceptions.APIError`` (exposes ``.error``)."""
+
+    def __init__(self, error: dict):
+        super().__init__(error.get("message", ""))
+        self.error = error
+
+
+class _Query:
+    def __init__(self, client, table: str):
+        self._client = client
+        self._table = table
+        self._action = "select"
+        self._columns = "*"
+        self._payload = None
+        self._on_conflict = None
+        self._ignore_duplicates = False
+        self._filters = []
+        self._order = []
+        self._limit = None
+        self._count = None
+        self._head = False
+
+    # -- actions -------------------------------------------------------
+    def select(self, columns: str = "*", count: Optional[str] = None, head=False):
+        self._action = "select"
+        self._columns = columns
+        self._count = count
+        self._head = head
+        return self
+
+    def insert(self, payload):
+        self._action = "insert"
+        self._payload = payload
+        return self
+
+    def update(self, payload: dict):
+        self._action = "update"
+        self._payload = payload
+        return self
+
+    def upsert(
+        self, payload, on_conflict: Optional[str] = None, ignore_duplicates=False
+    ):
+        self._action = "upsert"
+        self._payload = payload
+        self._on_conflict = on_conflict
+        self._ignore_duplicates = ignore_duplicates
+        return self
+
+    def delete(self):
+        self._action = "delete"
+        return self
+
+    # -- filters -------------------------------------------------------
+    def _filter(self, column, predicate):
+        self._filters.append((column, predicate))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda v: v == value)
+
+    def neq(self, column, value):
+        return self._filter(column, lambda v: v != value)
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v > value)
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v >= value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v < value)
+
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v <= value)
+
+    def is_(self, column, value):
+        """Only ``is.null``, the one the app uses."""
+        return self._filter(column, lambda v: v is None)
+
+    def in_(self, column, values):
+        values = set(values)
+        return self._filter(column, lambda v: v in values)
+
+    def ilike(self, column, pattern):
+        regex = _like_regex(pattern)
+        return self._filter(column, lambda v: v is not None and bool(regex(v)))
+
+    def or_(self, filters: str):
+        """PostgREST ``or=(...)`` syntax, e.g. ``a.eq.1,and(b.gt."x",c.lt.2)``."""
+        return self._filter(None, _parse_logic("or", filters))
+
+    def order(self, column, desc=False):
+        self._order.append((column, desc))
+        return self
+
+    def limit(self, size: int):
+        self._limit = size
+        return self
+
+    # -- execution -----------------------------------------------------
+    def _matches(self, row):
+        return all(
+            predicate(row) if column is None else predicate(_lookup(row, column))
+            for column, predicate in self._filters
+        )
+
+    def _sorted(self, rows):
+        # Stable sorts from the last key to the first; nulls last
+        for column, desc in reversed(self._order):
+            present = [r for r in rows if _lookup(r, column) is not None]
+            missing = [r for r in rows if _lookup(r, column) is None]
+            present.sort(key=lambda r: _lookup(r, column), reverse=desc)
+            rows = present + missing
+        return rows if self._limit is None else rows[: self._limit]
+
+    def execute(self) -> FakeResponse:
+        return self._client._execute(self)
+
+
+def _lookup(row: dict, column: str):
+    """Column value, following ``embedded.column`` paths into joins."""
+    for part in column.split("."):
+        row = row.get(part) if isinstance(row, dict) else None
+    return row
+
+
+def _like_regex(pattern: str):
+    parts = (
+        ".*" if char == "%" else "." if char == "_" else re.escape(char)
+        for char in pattern
+    )
+    return re.compile("".join(parts), re.IGNORECASE | re.DOTALL).fullmatch
+
+
+def _coerce(text: str, like):
+    """A filter value from the query string, typed like the column value."""
+    return type(like)(text) if isinstance(like, (int, float)) else text
+
+
+_OPERATORS = {
+    "eq": lambda v, x: v == _coerce(x, v),
+    "neq": lambda v, x: v != _coerce(x, v),
+    "gt": lambda v, x: v > _coerce(x, v),
+    "gte": lambda v, x: v >= _coerce(x, v),
+    "lt": lambda v, x: v < _coerce(x, v),
+    "lte": lambda v, x: v <= _coerce(x, v),
+}
+
+
+def _split_top_level(text: str) -> list:
+    """Split on commas outside parentheses and double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    escaped = False
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+            continue
+        if char == "\\" and quoted:
+            current.append(char)
+            escaped = True
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return parts
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def _parse_logic(operator: str, text: str):
+    predicates = []
+    for part in _split_top_level(text):
+        match = re.fullmatch(r"(and|or)\((.*)\)", part, re.DOTALL)
+        if match:
+            predicates.append(_parse_logic(*match.groups()))
+            continue
+        column, op, value = part.split(".", 2)
+        if op == "ilike":
+            regex = _like_regex(_unquote(value).replace("*", "%"))
+            predicates.append(
+                lambda row, c=column, r=regex: _lookup(row, c) is not None
+                and bool(r(_lookup(row, c)))
+            )
+        else:
+            predicates.append(
+                lambda row, c=column, f=_OPERATORS[op], x=_unquote(value): (
+                    _lookup(row, c) is not None and f(_lookup(row, c), x)
+                )
+            )
+    combine = all if operator == "and" else any
+    return lambda row: combine(predicate(row) for predicate in predicates)
+
+
+class _Bucket:
+    """``storage.from_(bucket)``: objects kept in memory, by path."""
+
+    def __init__(self, client, bucket: str):
+        self._client = client
+        self._bucket = bucket
+
+    def upload(self, path: str, file: bytes, file_options: Optional[dict] = None):
+        self._client._check_online()
+        upsert = str((file_options or {}).get("upsert", "false")).lower() == "true"
+        with self._client._lock:
+            key = (self._bucket, path)
+            if key in self._client._objects and not upsert:
+                raise FakeAPIError(
+                    {"statusCode": 409, "message": "The resource already exists"}
+                )
+            self._client._objects[key] = bytes(file)
+        return FakeResponse({"Key": f"{self._bucket}/{path}"})
+
+    def download(self, path: str) -> bytes:
+        self._client._check_online()
+        with self._client._lock:
+            try:
+                return self._client._objects[(self._bucket, path)]
+            except KeyError:
+                raise FakeAPIError(
+                    {"statusCode": 404, "message": "Object not found"}
+                ) from None
+
+    def list(self, path: str = "") -> list:
+        self._client._check_online()
+        prefix = f"{path.rstrip('/')}/" if path else ""
+        with self._client._lock:
+            names = {
+                key[len(prefix) :].split("/")[0]
+                for bucket, key in self._client._objects
+                if bucket == self._bucket and key.startswith(prefix)
+            }
+        return [{"name": name} for name in sorted(names)]
+
+
+class _Storage:
+    def __init__(self, client):
+        self._client = client
+
+    def from_(self, bucket: str) -> _Bucket:
+        return _Bucket(self._client, bucket)
+
+
+class FakeSupabaseClient:
+    """Thread-safe in-process stand-in for the Supabase client.
+
+    Covers the slice of the PostgREST/RPC surface the app uses:
+    ``table().select/insert/update/upsert/delete`` with the filters we call
+    (including ``ilike``, ``or_`` and filters on embedded columns),
+    ``order``/``limit``, the ``brothers!inner(*)`` embed, ``count="exact"`` and
+    ``rpc("add_guest")`` and ``storage.from_(bucket).upload/download/list``.
+    ``guests`` rows get ``id``, ``updated_at`` and
+    ``version`` maintained the way the database triggers do in production
+    (migrations 001 and 007), and every
+    request is counted so sync strategies can be compared offline. Given
+    ``events``, new guests default to the latest open one (migrations/008).
+
+    Set ``offline`` to make every request raise ``ConnectionError``, the way
+    an unreachable backend does, and ``latency`` (seconds) to delay every
+    request by a network round trip. The delay is taken outside the lock,
+    so concurrent clients wait in parallel as they would on the network.
+    """
+
+    def __init__(self, brothers=None, guests=None, latency=0.0, events=None):
+        self._lock = threading.RLock()
+        self._tables = {"brothers": [], "guests": [], "events": []}
+        self._ids = {name: itertools.count(1) for name in self._tables}
+        self._last_ts = datetime(2000, 1, 1, tzinfo=timezone.utc)
+        self._rpcs = {"add_guest": self._rpc_add_guest}
+        self._change_listeners = []
+        self._pending_changes = []
+        self._objects = {}
+        self.query_count = 0
+        self.rows_transferred = 0
+        self.offline = False
+        self.latency = latency
+        for brother in brothers or []:
+            self._insert_row("brothers", brother)
+        for event in events or []:
+            self._insert_row("events", event)
+        for guest in guests or []:
+            self._insert_row("guests", guest)
+
+    # -- public surface ------------------------------------------------
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def rpc(self, name: str, params: dict):
+        client = self
+
+        class _Call:
+            def execute(self):
+                client._check_online()
+                with client._lock:
+                    client.query_count += 1
+                    response = FakeResponse(client._rpcs[name](params))
+                client._notify()
+                return response
+
+        return _Call()
+
+    @property
+    def storage(self):
+        return _Storage(self)
+
+    def add_change_listener(self, callback):
+        """Call ``callback(type, record, old_record)`` after every write to
+        ``guests``, like a realtime subscription would."""
+        self._change_listeners.append(callback)
+
+    def reset_counters(self):
+        self.query_count = 0
+        self.rows_transferred = 0
+
+    # -- internals -----------------------------------------------------
+    def _check_online(self):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.offline:
+            raise ConnectionError("backend unreachable")
+
+    def _now(self) -> str:
+        now = datetime.now(timezone.utc)
+        if now <= self._last_ts:
+            now = self._last_ts + timedelta(microseconds=1)
+        self._last_ts = now
+        return now.isoformat(timespec="microseconds")
+
+    def _changed(self, table: str, event_type: str, record=None, old_record=None):
+        if table == "guests" and self._change_listeners:
+            self._pending_changes.append((event_type, record, old_record))
+
+    def _notify(self):
+        with self._lock:
+            changes, self._pending_changes = self._pending_changes, []
+        for change in changes:
+            for callback in self._change_listeners:
+                callback(*change)
+
+    def _insert_row(self, table: str, values: dict) -> dict:
+        row = dict(values)
+        row.setdefault("id", next(self._ids[table]))
+        if table == "guests":
+            # Column default from migrations/005
+            row.setdefault("checkin_token", secrets.token_hex(8))
+            row["updated_at"] = self._now()
+            row["version"] = 1
+            # Column default from migrations/008, once there are events
+            event_id = self._active_event_id()
+            if event_id is not None:
+                row.setdefault("event_id", event_id)
+        if table == "events":
+            row.setdefault("starts_at", self._now())
+            row.setdefault("closed_at", None)
+        self._tables[table].append(row)
+        self._changed(table, "INSERT", dict(row))
+        return row
+
+    def _active_event_id(self):
+        """``active_event_id()``: the latest event still open."""
+        open_events = [e for e in self._tables["events"] if e["closed_at"] is None]
+        if not open_events:
+            return None
+        return max(open_events, key=lambda e: (e["starts_at"], e["id"]))["id"]
+
+    def _touch(self, table: str, row: dict, old: dict):
+        if table == "guests":
+            row["updated_at"] = self._now()
+            row["version"] = old["version"] + 1
+
+    def _embed(self, row: dict, columns: str, brothers: dict) -> dict:
+        out = dict(row)
+        if "brothers" in columns:
+            brother = brothers.get(row.get("brother_id"))
+            if brother is None and "!inner" in columns:
+                return None
+            out["brothers"] = dict(brother) if brother else None
+        return out
+
+    def _execute(self, query: _Query) -> FakeResponse:
+        self._check_online()
+        try:
+            return self._execute_locked(query)
+        finally:
+            self._notify()
+
+    def _execute_locked(self, query: _Query) -> FakeResponse:
+        with self._lock:
+            self.query_count += 1
+            rows = self._tables[query._table]
+            if query._action == "select":
+                brothers = {b["id"]: b for b in self._tables["brothers"]}
+                # Filters may reference embedded columns ("brothers.name")
+                embedded = (self._embed(r, query._columns, brothers) for r in rows)
+                matched = [r for r in embedded if r is not None and query._matches(r)]
+                data = [copy.deepcopy(r) for r in query._sorted(matched)]
+                count = len(data) if query._count == "exact" else None
+                if query._head:
+                    data = []
+                self.rows_transferred += len(data)
+                return FakeResponse(data, count)
+            if query._action == "update":
+                data = []
+                for row in rows:
+                    if query._matches(row):
+                        old = dict(row)
+                        row.update(query._payload)
+                        self._touch(query._table, row, old)
+                        data.append(dict(row))
+                        self._changed(query._table, "UPDATE", dict(row), old)
+                self.rows_transferred += len(data)
+                return FakeResponse(data)
+            if query._action in ("insert", "upsert"):
+                payload = query._payload
+                payload = payload if isinstance(payload, list) else [payload]
+                keys = (query._on_conflict or "id").split(",")
+                data = []
+                for values in payload:
+                    existing = None
+                    if query._action == "upsert":
+                        existing = next(
+                            (
+                                r
+                                for r in rows
+                                if all(r.get(k) == values.get(k) for k in keys)
+                            ),
+                            None,
+                        )
+                    if existing is not None and query._ignore_duplicates:
+                        continue
+                    if existing is not None:
+                        old = dict(existing)
+                        existing.update(values)
+                        self._touch(query._table, existing, old)
+                        data.append(dict(existing))
+                        self._changed(query._table, "UPDATE", dict(existing), old)
+                    else:
+                        data.append(dict(self._insert_row(query._table, values)))
+                self.rows_transferred += len(data)
+                return FakeResponse(data)
+            if query._action == "delete":
+                removed = [r for r in rows if query._matches(r)]
+                self._tables[query._table] = [r for r in rows if not query._matches(r)]
+                for row in removed:
+                    self._changed(query._table, "DELETE", None, {"id": row["id"]})
+                return FakeResponse(removed)
+            raise ValueError(f"Unsupported action {query._action}")
+
+    def _rpc_add_guest(self, params: dict):
+        # Either overload: by brother id (migrations/006) or by host name
+        host = str(params.get("host_name", "")).lower()
+        brother = next(
+            (
+                b
+                for b in self._tables["brothers"]
+                if (
+                    b["id"] == params["brother_id"]
+                    if "brother_id" in params
+                    else b["name"].lower() == host
+                )
+            ),
+            None,
+        )
+        if brother is None:
+            raise FakeAPIError(
+                {"message": "insert failed", "details": "brother not found"}
+            )
+        self._insert_row(
+            "guests",
+            {
+                "name": params["guest_name"],
+                "brother_id": brother["id"],
+                "campus_status": params["campus_status"],
+                "gender": params["gender"],
+                "check_in_status": "Checked In",
+                "check_in_time": params.get("check_in_time"),
+            },
+        )
+        return True
@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+
+import perf
+
+
+class FigureCache:
+    """LRU cache of built Plotly figures.
+
+    Keys carry the data version the figure was built from plus any display
+    options (e.g. ``("brothers", version, "Top 10")``), so a changed guest
+    list or option simply misses and stale entries age out. Bounded to
+    ``max_entries`` figures; shared across sessions, so access takes a lock.
+    Cached figures are shared and must not be mutated by callers.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self._figures = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._figures)
+
+    def get(self, key, build):
+        """The figure cached under ``key``, calling ``build()`` on a miss."""
+        with self.lock:
+            if key in self._figures:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                perf.count("figure_cache.hits")
+                return self._figures[key]
+            self.misses += 1
+        perf.count("figure_cache.misses")
+        # Built outside the lock so one slow chart doesn't block the others
+        with perf.span("charts.build"):
+            figure = build()
+        with self.lock:
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return figure
+
+    def clear(self):
+        with self.lock:
+            self._figures.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._figures),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
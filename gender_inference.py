@@ -0,0 +1,139 @@
+import csv
+import re
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from name_utils import strip_accents
+
+SSA_NAMES_CSV = Path(__file__).parent / "processed_ssa_names.csv"
+CACHE_DIR = Path(tempfile.gettempdir()) / "snowyowl"
+GENDERS = np.array(["M", "F", "U"])
+_CODES = {gender: code for code, gender in enumerate(GENDERS)}
+_LETTERS = re.compile(r"[^A-Z]")
+
+# Confidence by how the first name was matched
+EXACT = 1.0
+FALLBACK = 0.75
+AMBIGUOUS = 0.5
+UNKNOWN = 0.0
+
+
+class GenderIndex:
+    """First name -> gender table from ``processed_ssa_names.csv``.
+
+    Names are held as one sorted fixed-width byte array (about 1 MB for the
+    62k SSA names) with an int8 gender code per name, and looked up in bulk
+    with ``np.searchsorted``. The arrays are cached as ``.npy`` files and
+    memory-mapped on later loads, so every process shares the same pages and
+    startup skips the CSV parse.
+    """
+
+    def __init__(self, names: np.ndarray, codes: np.ndarray):
+        self.names = names
+        self.codes = codes
+        self.width = names.dtype.itemsize
+
+    @classmethod
+    def from_csv(cls, path=SSA_NAMES_CSV) -> "GenderIndex":
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = [
+                (row["name"].upper(), _CODES.get(row["gender"], _CODES["U"]))
+                for row in csv.DictReader(f)
+                if row["name"]
+            ]
+        rows.sort()
+        names = np.array([name for name, _ in rows], dtype=np.bytes_)
+        codes = np.array([code for _, code in rows], dtype=np.int8)
+        return cls(names, codes)
+
+    @classmethod
+    def load(cls, path=SSA_NAMES_CSV, cache_dir=CACHE_DIR, mmap=True):
+        """Memory-map the cached arrays, (re)building them if the CSV is newer."""
+        names_file = Path(cache_dir) / "ssa_names.npy"
+        codes_file = Path(cache_dir) / "ssa_genders.npy"
+        source_mtime = Path(path).stat().st_mtime
+        if not (
+            names_file.exists()
+            and codes_file.exists()
+            and names_file.stat().st_mtime >= source_mtime
+        ):
+            index = cls.from_csv(path)
+            try:
+                Path(cache_dir).mkdir(parents=True, exist_ok=True)
+                np.save(codes_file, index.codes)
+                np.save(names_file, index.names)
+            except OSError:
+                return index
+            if not mmap:
+                return index
+        mode = "r" if mmap else None
+        return cls(
+            np.load(names_file, mmap_mode=mode), np.load(codes_file, mmap_mode=mode)
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.names.nbytes + self.codes.nbytes
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, first_names) -> np.ndarray:
+        """Gender codes for uppercase first names; -1 where not found."""
+        keys = np.asarray(first_names, dtype=np.bytes_)
+        codes = np.full(len(keys), -1, dtype=np.int8)
+        if not len(keys):
+            return codes
+        # Longer names can't be in the table and would be truncated into
+        # false matches by the fixed-width cast
+        fits = np.char.str_len(keys) <= self.width
+        keys = keys.astype(self.names.dtype)
+        positions = np.searchsorted(self.names, keys)
+        positions[positions == len(self.names)] = 0
+        found = fits & (self.names[positions] == keys)
+        codes[found] = self.codes[positions[found]]
+        return codes
+
+    def infer(self, names) -> pd.DataFrame:
+        """Infer gender for full guest names in one vectorized pass.
+
+        Returns ``gender`` ("M", "F" or None) and ``confidence`` per name: an
+        exact first-name match is 1.0; matching the first part of a
+        hyphenated or punctuated name ("MARY-KATE", "J.D.") is 0.75; a name
+        the SSA data marks as used by both is 0.5 with no gender; no match
+        is 0.0.
+        """
+        names = pd.Series(names, dtype=object).fillna("").astype(str)
+        first = (
+            names.map(strip_accents)
+            .str.strip()
+            .str.split()
+            .str[0]
+            .fillna("")
+            .str.upper()
+        )
+        codes = self.lookup(first.to_numpy())
+        confidence = np.where(codes >= 0, EXACT, UNKNOWN)
+
+        # Fallback: letters before the first hyphen/apostrophe/dot
+        missing = codes < 0
+        if missing.any():
+            stem = first[missing].str.split(r"[-'.]", regex=True).str[0]
+            stem = stem.map(lambda s: _LETTERS.sub("", s))
+            stem_codes = self.lookup(stem.to_numpy())
+            codes[missing] = stem_codes
+            confidence[missing] = np.where(stem_codes >= 0, FALLBACK, UNKNOWN)
+
+        ambiguous = codes == _CODES["U"]
+        confidence[ambiguous] = AMBIGUOUS
+        gender = np.where((codes >= 0) & ~ambiguous, GENDERS[codes], None)
+        return pd.DataFrame(
+            {"gender": gender, "confidence": confidence}, index=names.index
+        )
+
+    def infer_one(self, name: str):
+        """Gender for a single name, or None if unknown/ambiguous."""
+        return self.infer([name])["gender"].iloc[0]
@@ -0,0 +1,191 @@
+import csv
+import io
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+from dedup import find_duplicates
+
+DATA_DIR = Path(__file__).parent
+CAMPUS_FILES = {
+    "On Campus": DATA_DIR / "on_campus_guests.csv",
+    "Off Campus": DATA_DIR / "off_campus_guests.csv",
+}
+BATCH_SIZE = 1000
+
+
+def normalize_guest_name(name: str) -> str:
+    """Collapse whitespace and uppercase, as ``quick_add_guest`` stores names."""
+    return " ".join(name.split()).upper()
+
+
+def _host_key(name: str) -> str:
+    return " ".join(name.split()).lower()
+
+
+def _text_lines(source):
+    """Accept a path, a text stream or a binary upload (BOM-tolerant)."""
+    if isinstance(source, (str, Path)):
+        return open(source, encoding="utf-8-sig", newline="")
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+
+
+def iter_wide_guest_rows(source, campus_status: str):
+    """Stream a wide sheet (``Brother,Guest1..GuestN``) as
+    ``(brother, guest, campus_status)`` tuples, skipping empty cells."""
+    lines = _text_lines(source)
+    try:
+        reader = csv.reader(lines)
+        next(reader, None)
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            brother = row[0].strip()
+            for cell in row[1:]:
+                if cell.strip():
+                    yield brother, normalize_guest_name(cell), campus_status
+    finally:
+        if isinstance(source, (str, Path)):
+            lines.close()
+
+
+def brother_ids(brother_resolver) -> dict:
+    """Map normalized brother names to ids, from a resolver over the
+    brothers table (``BrotherResolver.from_supabase``): those are the ids
+    ``guests.brother_id`` refers to, which the bundled roster's may not be."""
+    if not brother_resolver.by_id:
+        raise ValueError("Host ids must come from the brothers table")
+    return {
+        _host_key(brother["name"]): brother["id"]
+        for brother in brother_resolver.brothers
+    }
+
+
+def unresolved_hosts(plan, brother_resolver) -> dict:
+    """Each host name the import couldn't place, with the brothers it
+    might have meant."""
+    names = sorted({brother for brother, _ in plan.unresolved})
+    return {name: brother_resolver.suggest(name, limit=3) for name in names}
+
+
+@dataclass
+class ImportPlan:
+    """Dry-run diff of an import against the guests already stored."""
+
+    new: list = field(default_factory=list)
+    moved: list = field(default_factory=list)
+    unchanged: int = 0
+    repeated: int = 0
+    unresolved: list = field(default_factory=list)
+    possible_duplicates: list = field(default_factory=list)
+
+    def summary(self) -> dict:
+        return {
+            "new guests": len(self.new),
+            "campus changes": len(self.moved),
+            "already imported": self.unchanged,
+            "repeated in files": self.repeated,
+            "unknown hosts": len(self.unresolved),
+            "possible duplicates": len(self.possible_duplicates),
+        }
+
+
+def plan_import(
+    rows, brother_ids: dict, existing: pd.DataFrame, gender_index=None
+) -> ImportPlan:
+    """Resolve hosts and diff ``(brother, guest, campus_status)`` rows against
+    the current guest frame, keyed by (normalized name, brother_id).
+
+    Campus changes carry the name as stored, so the upsert hits the
+    (name, brother_id) unique index even for a row added before names were
+    normalized ("Jane Doe") rather than inserting a "JANE DOE" next to it.
+    With a ``gender_index``, new guests get an inferred gender (None when
+    the first name is unknown or ambiguous).
+    """
+    current = {}
+    if not existing.empty:
+        stored = existing["name"].astype(str)
+        current = {
+            (normalize_guest_name(name), brother_id): (name, campus)
+            for name, brother_id, campus in zip(
+                stored, existing["brother_id"], existing["campus_status"]
+            )
+        }
+    plan = ImportPlan()
+    seen = set()
+    for brother, guest, campus_status in rows:
+        brother_id = brother_ids.get(_host_key(brother))
+        if brother_id is None:
+            plan.unresolved.append((brother, guest))
+            continue
+        key = (guest, brother_id)
+        if key in seen:
+            plan.repeated += 1
+            continue
+        seen.add(key)
+        row = {"name": guest, "brother_id": brother_id, "campus_status": campus_status}
+        if key not in current:
+            plan.new.append({**row, "check_in_status": "Not Checked In"})
+        elif current[key][1] != campus_status:
+            plan.moved.append({**row, "name": current[key][0]})
+        else:
+            plan.unchanged += 1
+    if gender_index is not None and plan.new:
+        inferred = gender_index.infer([row["name"] for row in plan.new])
+        for row, gender in zip(plan.new, inferred["gender"]):
+            row["gender"] = gender
+    plan.possible_duplicates = _new_duplicates(plan.new, existing)
+    return plan
+
+
+def _new_duplicates(new: list, existing: pd.DataFrame) -> list:
+    """Groups of names that look like one person and include a new guest,
+    e.g. the same guest under two brothers or with different casing."""
+    if not new:
+        return []
+    # New rows have no id yet; number them below zero
+    records = [(-(i + 1), row["name"]) for i, row in enumerate(new)]
+    if not existing.empty:
+        records += list(zip(existing.index, existing["name"]))
+    return [
+        group.names
+        for group in find_duplicates(records).groups
+        if any(record_id < 0 for record_id in group.ids)
+    ]
+
+
+def _batches(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def apply_import(
+    supabase, plan: ImportPlan, batch_size=BATCH_SIZE, event_id=None
+) -> int:
+    """Write the plan in batched upserts on (event_id, name, brother_id);
+    returns the number of requests made.
+
+    Re-running an import is a no-op: new rows that already exist are ignored,
+    so check-in status is never reset, and campus changes only touch
+    ``campus_status``. Rows go to ``event_id``, else the database's open
+    event.
+    """
+    on_conflict = "name,brother_id"
+    new, moved = plan.new, plan.moved
+    if event_id is not None:
+        on_conflict = "event_id," + on_conflict
+        new = [{**row, "event_id": event_id} for row in new]
+        moved = [{**row, "event_id": event_id} for row in moved]
+    requests = 0
+    for batch in _batches(new, batch_size):
+        supabase.table("guests").upsert(
+            batch, on_conflict=on_conflict, ignore_duplicates=True
+        ).execute()
+        requests += 1
+    for batch in _batches(moved, batch_size):
+        supabase.table("guests").upsert(batch, on_conflict=on_conflict).execute()
+        requests += 1
+    return requests
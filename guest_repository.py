@@ -0,0 +1,387 @@
+import threading
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+import perf
+
+GUEST_SELECT = "*, brothers!inner(*)"
+
+# Enum-like text columns, stored as categoricals. Values outside these lists
+# are kept as extra categories rather than dropped.
+ENUM_CATEGORIES = {
+    "check_in_status": ["Not Checked In", "Checked In"],
+    "campus_status": ["On Campus", "Off Campus"],
+    "gender": ["M", "F"],
+}
+DATETIME_COLUMNS = ["check_in_time", "updated_at", "created_at"]
+# Seconds a delta sync reaches back behind the high-water mark (see sync)
+SYNC_OVERLAP = 5.0
+
+
+def _brother_field(brother, field):
+    return brother.get(field) if isinstance(brother, dict) else None
+
+
+def normalize_guests(rows, like: pd.DataFrame = None) -> pd.DataFrame:
+    """Guest rows as returned by PostgREST -> compact frame indexed by id.
+
+    The ``brothers`` join is flattened into ``brother_name`` and
+    ``brother_year``, enum-like columns become categoricals and timestamps
+    are parsed once into UTC datetimes (microseconds, like Postgres, so
+    every frame shares one unit). Rows that are already flat (e.g. a
+    row of the frame itself) pass through unchanged apart from dtypes.
+    Categories start from those of ``like`` so frames can be concatenated
+    without falling back to object columns.
+    """
+    frame = pd.DataFrame(rows)
+    if frame.empty:
+        return frame
+    if "brothers" in frame.columns:
+        brothers = frame.pop("brothers")
+        frame["brother_name"] = [_brother_field(b, "name") for b in brothers]
+        frame["brother_year"] = pd.array(
+            [_brother_field(b, "year") for b in brothers], dtype="Int16"
+        )
+    for column, categories in ENUM_CATEGORIES.items():
+        if column not in frame.columns:
+            continue
+        if like is not None and isinstance(like.get(column), pd.Series):
+            if isinstance(like[column].dtype, pd.CategoricalDtype):
+                categories = list(like[column].cat.categories)
+        extra = sorted(set(frame[column].dropna().unique()) - set(categories))
+        frame[column] = frame[column].astype(pd.CategoricalDtype(categories + extra))
+    for column in DATETIME_COLUMNS:
+        if column in frame.columns:
+            stamps = pd.to_datetime(frame[column], utc=True, format="ISO8601")
+            frame[column] = stamps.dt.as_unit("us")
+    frame = frame.set_index("id", drop=False)
+    frame.index.name = None
+    return frame
+
+
+@dataclass(frozen=True)
+class GuestSnapshot:
+    """One version of the guest frame, shared by reference across sessions.
+
+    The repository never modifies a published frame, it swaps in a new one,
+    so holders can keep using theirs. Treat ``frame`` as read-only. Updates
+    of existing rows swap in a shallow copy with only the written columns
+    copied, so a check-in doesn't rebuild the whole frame. ``stale`` is set
+    when the last sync failed and the frame may be behind the database.
+    """
+
+    frame: pd.DataFrame
+    version: int
+    stale: bool = False
+
+
+class GuestRepository:
+    """Local snapshot of the guests table kept current with delta syncs.
+
+    The snapshot is indexed by guest id and normalized by
+    ``normalize_guests`` (flat brother columns, categoricals, parsed
+    timestamps). ``high_water_mark`` is the newest
+    ``updated_at`` seen; each sync asks only for rows changed since shortly
+    before it (``sync_overlap``) and merges in those that differ from the
+    snapshot. A full resync happens on first load, when the returned columns no
+    longer match the snapshot (schema change) or when the server row count
+    disagrees with ours (a delete or a missed write, i.e. a gap).
+
+    Writers hold ``lock`` and swap ``frame`` for a new object, so readers on
+    other threads always see a complete snapshot.
+
+    Listeners (search index, aggregates, ...) are kept in step with the
+    snapshot under the same lock through three methods: ``reset(frame)``
+    after a full resync, ``upsert(rows, previous)`` with the merged rows and
+    the versions they replaced, and ``remove(rows)`` with the dropped rows.
+
+    With an ``event_id`` (migrations/008) every query and every applied
+    record is limited to that event's guests, so the snapshot and its
+    syncs don't grow with past events.
+    """
+
+    def __init__(
+        self,
+        supabase,
+        table="guests",
+        min_sync_interval=1.0,
+        event_id=None,
+        sync_overlap=SYNC_OVERLAP,
+    ):
+        self._supabase = supabase
+        self._table = table
+        self.event_id = event_id
+        self.min_sync_interval = min_sync_interval
+        self.sync_overlap = sync_overlap
+        self.lock = threading.RLock()
+        self.frame = pd.DataFrame()
+        self.version = 0
+        self.high_water_mark = None
+        self._brothers = {}
+        self._listeners = []
+        self._last_sync = None
+        self.full_resyncs = 0
+        self.delta_syncs = 0
+
+    def add_listener(self, listener):
+        """Register a listener and prime it with the current snapshot."""
+        with self.lock:
+            self._listeners.append(listener)
+            listener.reset(self.frame)
+        return listener
+
+    def snapshot(self) -> GuestSnapshot:
+        with self.lock:
+            return GuestSnapshot(self.frame, self.version)
+
+    @property
+    def staleness(self):
+        """Seconds since the last full or delta sync (None before the first)."""
+        if self._last_sync is None:
+            return None
+        return time.monotonic() - self._last_sync
+
+    def row_version(self, guest_id):
+        """The guest's row ``version`` column in the snapshot, or None if the
+        guest or the column (before migration 007) isn't there."""
+        with self.lock:
+            if "version" not in self.frame.columns or guest_id not in self.frame.index:
+                return None
+            value = self.frame.at[guest_id, "version"]
+        return None if pd.isna(value) else int(value)
+
+    def _query(self):
+        return self._supabase.table(self._table)
+
+    def _select(self, columns=GUEST_SELECT, **kwargs):
+        query = self._query().select(columns, **kwargs)
+        if self.event_id is not None:
+            query = query.eq("event_id", self.event_id)
+        return query
+
+    def switch_event(self, event_id) -> pd.DataFrame:
+        """Follow another event: reload the snapshot with its guests."""
+        with self.lock:
+            self.event_id = event_id
+            return self.full_resync()
+
+    def _set_high_water_mark(self, frame: pd.DataFrame):
+        if frame.empty or "updated_at" not in frame.columns:
+            self.high_water_mark = None
+            return
+        newest = frame["updated_at"].max()
+        if self.high_water_mark is None or newest > self.high_water_mark:
+            self.high_water_mark = newest
+
+    def _remember_brothers(self, rows):
+        for row in rows:
+            brother = row.get("brothers")
+            if isinstance(brother, dict) and "id" in brother:
+                self._brothers[brother["id"]] = brother
+
+    def full_resync(self) -> pd.DataFrame:
+        """Replace the snapshot with a full fetch of the table."""
+        with perf.span("db.full_resync"):
+            response = self._select().execute()
+        rows = response.data or []
+        perf.count_query(len(rows))
+        with perf.span("repository.normalize"):
+            frame = normalize_guests(rows).sort_index()
+        with self.lock:
+            self.frame = frame
+            self.high_water_mark = None
+            self._set_high_water_mark(frame)
+            self._remember_brothers(rows)
+            for listener in self._listeners:
+                listener.reset(frame)
+            self._last_sync = time.monotonic()
+            self.full_resyncs += 1
+            self.version += 1
+            return self.frame
+
+    def _server_count(self) -> int:
+        with perf.span("db.count"):
+            response = self._select("id", count="exact", head=True).execute()
+        perf.count_query()
+        return response.count or 0
+
+    def merge_rows(self, rows) -> bool:
+        """Merge changed rows (as returned by PostgREST) into the snapshot.
+
+        Returns False when the rows don't fit the current schema, in which
+        case the caller should fall back to a full resync.
+        """
+        if not rows:
+            return True
+        with self.lock:
+            delta = normalize_guests(rows, like=self.frame)
+            delta = delta[~delta.index.duplicated(keep="last")]
+            if not self.frame.empty and set(delta.columns) != set(self.frame.columns):
+                return False
+            self._merge(delta)
+            self._remember_brothers(rows)
+            return True
+
+    def _assign_rows(self, delta: pd.DataFrame, positions, columns):
+        """The snapshot with ``columns`` of ``delta``'s rows (all already in
+        it, at ``positions``) written over, or None if a value doesn't fit
+        its column (e.g. a new category)."""
+        # A shallow copy: only the columns written to are copied
+        frame = self.frame.copy(deep=False)
+        for column in columns:
+            values = frame[column].array.copy()
+            try:
+                values[positions] = delta[column].array
+            except (TypeError, ValueError):
+                return None
+            frame[column] = values
+        return frame
+
+    def _merge(self, delta: pd.DataFrame, columns=None):
+        """Swap in the snapshot with ``delta``'s rows merged; ``columns``
+        limits what changed in rows already there (default: all)."""
+        positions = self.frame.index.get_indexer(delta.index)
+        replaced = positions[positions >= 0]
+        frame = None
+        if len(replaced) == len(delta):
+            # Only updates: O(rows changed), not a rebuild of the frame
+            delta = delta[list(self.frame.columns)]
+            frame = self._assign_rows(
+                delta, positions, self.frame.columns if columns is None else columns
+            )
+        if frame is None:
+            kept = self.frame.drop(index=self.frame.index[replaced])
+            # A new enum value widens the categories; widen ours to match
+            widened = {
+                column: kept[column].cat.set_categories(delta[column].cat.categories)
+                for column in ENUM_CATEGORIES
+                if column in kept.columns and kept[column].dtype != delta[column].dtype
+            }
+            if widened:
+                kept = kept.assign(**widened)
+            delta = delta[list(kept.columns) or delta.columns]
+            frame = pd.concat([kept, delta]).sort_index()
+        for listener in self._listeners:
+            listener.upsert(delta, self.frame.iloc[replaced])
+        self.frame = frame
+        self._set_high_water_mark(delta)
+        self.version += 1
+
+    def update_values(self, guest_id, values: dict) -> bool:
+        """Overwrite some columns of one guest, e.g. an optimistic check-in;
+        False if the guest isn't in the snapshot.
+
+        ``updated_at`` is left as stored, so the server's version of the row
+        still looks newer to syncs and change events.
+        """
+        with self.lock:
+            if guest_id not in self.frame.index:
+                return False
+            delta = self.frame.loc[[guest_id]]
+            try:
+                for column, value in values.items():
+                    if column in DATETIME_COLUMNS and value is not None:
+                        value = pd.Timestamp(value)
+                    delta.loc[guest_id, column] = value
+            except (TypeError, ValueError):
+                # e.g. a status outside the categories: merge the long way
+                row = self.frame.loc[guest_id].to_dict()
+                return self.merge_rows([{**row, **values}])
+            self._merge(delta, [c for c in values if c in self.frame.columns])
+            return True
+
+    def fetch_rows(self, ids) -> pd.DataFrame:
+        """Refetch specific guests with their brother join and merge them."""
+        with perf.span("db.fetch_rows"):
+            response = self._select().in_("id", list(ids)).execute()
+        perf.count_query(len(response.data or []))
+        if not self.merge_rows(response.data):
+            return self.full_resync()
+        return self.frame
+
+    def apply_records(self, records) -> pd.DataFrame:
+        """Merge bare ``guests`` records (no brother join), e.g. from a change
+        event or an update response.
+
+        The brother join is filled in from brothers already seen; rows with an
+        unknown brother are refetched from the server instead. Records of
+        another event are dropped (and removed, if the guest moved away).
+        """
+        joined, unknown, elsewhere = [], [], []
+        with self.lock:
+            for record in records:
+                event_id = record.get("event_id", self.event_id)
+                if self.event_id is not None and event_id != self.event_id:
+                    elsewhere.append(record["id"])
+                    continue
+                brother = self._brothers.get(record.get("brother_id"))
+                if brother is None:
+                    unknown.append(record["id"])
+                else:
+                    joined.append({**record, "brothers": brother})
+            if elsewhere:
+                self.remove_ids(elsewhere)
+            if not self.merge_rows(joined):
+                return self.full_resync()
+        if unknown:
+            return self.fetch_rows(unknown)
+        return self.frame
+
+    def remove_ids(self, ids) -> pd.DataFrame:
+        """Drop deleted guests from the snapshot."""
+        with self.lock:
+            removed = self.frame.index.isin(list(ids))
+            if removed.any():
+                for listener in self._listeners:
+                    listener.remove(self.frame[removed])
+                self.frame = self.frame[~removed]
+                self.version += 1
+            return self.frame
+
+    def sync(self, force=False) -> pd.DataFrame:
+        """Bring the snapshot up to date, fetching only changed rows.
+
+        ``updated_at`` is stamped when the row is written (migrations/009),
+        but the row only becomes visible when its transaction commits, so a
+        sync can run between the two and move the high-water mark past it.
+        Re-reading ``sync_overlap`` seconds behind the mark catches such
+        late commits; rows already in the snapshot with the same
+        ``updated_at`` are skipped. An update whose transaction stays open
+        longer than the overlap is missed until the next full resync (an
+        insert or delete still shows up as a row count gap).
+        """
+        if (
+            not force
+            and self._last_sync is not None
+            and time.monotonic() - self._last_sync < self.min_sync_interval
+        ):
+            return self.frame
+        if self.high_water_mark is None:
+            return self.full_resync()
+
+        since = self.high_water_mark - pd.Timedelta(seconds=self.sync_overlap)
+        with perf.span("db.delta_sync"):
+            response = (
+                self._select()
+                .gte("updated_at", since.isoformat(timespec="microseconds"))
+                .execute()
+            )
+        perf.count_query(len(response.data or []))
+        with self.lock:
+            seen = self.frame["updated_at"]
+            rows = [
+                row
+                for row in response.data or []
+                if row["id"] not in seen.index
+                or seen[row["id"]] != pd.Timestamp(row["updated_at"])
+            ]
+            if not self.merge_rows(rows):
+                return self.full_resync()
+        if self._server_count() != len(self.frame):
+            return self.full_resync()
+
+        self._last_sync = time.monotonic()
+        self.delta_syncs += 1
+        return self.frame
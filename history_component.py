@@ -0,0 +1,103 @@
+import importlib.util
+
+import streamlit as st
+
+from event_archive import EventArchive, archive_event, start_event
+
+
+def create_history_component(archive: EventArchive):
+    """Past events from the Parquet archive: guests per brother and how
+    often guests come back."""
+    try:
+        events = archive.events()
+    except ImportError:
+        st.error("Event history needs the pyarrow package (pip install pyarrow).")
+        return
+    if events.empty:
+        st.info("No past events yet. Closing an event archives it here.")
+        return
+
+    labels = {
+        row.id: f"{row.name} ({row.starts_at:%b %d, %Y})" for row in events.itertuples()
+    }
+    selected = st.multiselect(
+        "Events",
+        list(labels),
+        default=list(labels),
+        format_func=labels.get,
+        key="history_events",
+    )
+    if not selected:
+        st.info("Select at least one event.")
+        return
+
+    col1, col2 = st.columns(2)
+    col1.metric("Events", len(selected))
+    col2.metric(
+        "Guests listed", int(events.loc[events["id"].isin(selected), "guests"].sum())
+    )
+
+    st.subheader("Guests per Brother")
+    per_brother = archive.guests_per_brother(selected)
+    st.bar_chart(per_brother[["guests", "checked_in"]].head(25), stack=False)
+    st.dataframe(per_brother.round(1), use_container_width=True)
+
+    st.subheader("Repeat Guests")
+    attendance = archive.attendance(selected)
+    frequency = attendance["events"].value_counts().sort_index()
+    frequency.index.name = "events listed at"
+    st.bar_chart(frequency.rename("guests"))
+    repeat = attendance[attendance["events"] >= 2]
+    st.caption(
+        f"{len(repeat)} of {len(attendance)} guests were listed at more than "
+        "one of these events (matched by name)."
+    )
+    st.dataframe(
+        repeat.reset_index(drop=True), use_container_width=True, hide_index=True
+    )
+
+
+def create_close_event_component(
+    supabase, archive: EventArchive, repository, checkin_queue, event
+):
+    """Admin action: start the next event and archive the current one.
+
+    The new event opens first so doors keep adding guests throughout; the
+    old event is then archived. Its rows stay in the database unless the
+    archive has a storage bucket and the admin asks for them to be removed.
+    """
+    if event is None:
+        st.info("Events are not set up (apply migrations/008_events.sql).")
+        return
+    st.write(f"Current event: **{event['name']}**")
+    with st.form("close_event"):
+        name = st.text_input("Name of the next event")
+        confirm = st.checkbox("Archive the current event and start the next one")
+        delete = False
+        if archive.bucket:
+            delete = st.checkbox(
+                "Delete the archived guests from the database once the archive "
+                "is saved to storage"
+            )
+        submit = st.form_submit_button("Close event")
+    if not submit:
+        return
+    if not name.strip() or not confirm:
+        st.warning("Name the next event and confirm to close this one.")
+        return
+    if importlib.util.find_spec("pyarrow") is None:
+        st.error("Archiving needs the pyarrow package (pip install pyarrow).")
+        return
+    if not checkin_queue.flush(timeout=10):
+        st.error("Check-ins are still being saved; try again in a moment.")
+        return
+    try:
+        new_event = start_event(supabase, name.strip())
+        repository.switch_event(new_event["id"])
+        archived = archive_event(
+            supabase, event, archive.root, bucket=archive.bucket, delete=delete
+        )
+    except Exception as e:
+        st.error(f"Closing the event failed: {str(e)}")
+        return
+    st.success(f"Archived {archived} guests of {event['name']}; now on {name}.")
@@ -0,0 +1,130 @@
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+create table if not exists intents (
+    seq integer primary key autoincrement,
+    kind text not null,
+    key text,
+    payload text not null,
+    created_at text not null,
+    state text not null default 'pending',
+    error text
+);
+create index if not exists intents_pending on intents (state, seq);
+"""
+
+
+@dataclass(frozen=True)
+class Intent:
+    """One journaled write: a check-in status change or a guest to add."""
+
+    seq: int
+    kind: str
+    key: object
+    payload: dict
+    created_at: str
+    state: str = PENDING
+    error: str = None
+
+
+class IntentJournal:
+    """Durable, ordered log of writes waiting for the backend.
+
+    Backed by SQLite in WAL mode with ``synchronous=NORMAL``: an append is
+    a local-disk write that survives a crash of the app (not of the
+    machine's power, which is an acceptable trade at the door) and never
+    waits on the network. ``seq`` is an autoincrement key, so intents
+    replay in the order they were made, and restarted processes pick up
+    where the last one stopped. Use ``":memory:"`` for a throwaway journal.
+    """
+
+    def __init__(self, path=":memory:", keep_done=1000):
+        self.path = str(path)
+        self.keep_done = keep_done
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("pragma journal_mode=wal")
+        self._db.execute("pragma synchronous=normal")
+        self._db.executescript(_SCHEMA)
+
+    def append(self, kind: str, key, payload: dict, created_at: str) -> int:
+        """Record an intent; returns its sequence number."""
+        with self._lock:
+            cursor = self._db.execute(
+                "insert into intents (kind, key, payload, created_at)"
+                " values (?, ?, ?, ?)",
+                (kind, json.dumps(key), json.dumps(payload), created_at),
+            )
+            return cursor.lastrowid
+
+    def _select(self, state: str, kind: str = None) -> list:
+        query = "select * from intents where state = ?"
+        params = [state]
+        if kind is not None:
+            query += " and kind = ?"
+            params.append(kind)
+        with self._lock:
+            rows = self._db.execute(query + " order by seq", params).fetchall()
+        return [self._intent(row) for row in rows]
+
+    def pending(self, kind: str = None) -> list:
+        """Unfinished intents in sequence order."""
+        return self._select(PENDING, kind)
+
+    def failed(self, kind: str = None) -> list:
+        """Intents the backend rejected, in sequence order."""
+        return self._select(FAILED, kind)
+
+    def get(self, seq: int):
+        with self._lock:
+            row = self._db.execute(
+                "select * from intents where seq = ?", (seq,)
+            ).fetchone()
+        return None if row is None else self._intent(row)
+
+    def finish(self, seqs, state=DONE, error=None):
+        """Mark intents done (or failed, with the reason)."""
+        seqs = list(seqs)
+        if not seqs:
+            return
+        with self._lock:
+            self._db.execute("begin")
+            self._db.executemany(
+                "update intents set state = ?, error = ? where seq = ?",
+                [(state, error, seq) for seq in seqs],
+            )
+            # Keep recent history for the UI; the rest is only disk
+            self._db.execute(
+                "delete from intents where state = ? and seq <= ("
+                " select seq from intents where state = ?"
+                " order by seq desc limit 1 offset ?)",
+                (DONE, DONE, self.keep_done),
+            )
+            self._db.execute("commit")
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._db.execute(
+                "select state, count(*) from intents group by state"
+            ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _intent(row) -> Intent:
+        seq, kind, key, payload, created_at, state, error = row
+        return Intent(
+            seq, kind, json.loads(key), json.loads(payload), created_at, state, error
+        )
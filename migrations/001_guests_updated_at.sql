@@ -0,0 +1,17 @@
+-- High-water mark for incremental guest syncs (guest_repository.py).
+alter table guests
+    add column if not exists updated_at timestamptz not null default now();
+
+create index if not exists guests_updated_at_idx on guests (updated_at);
+
+create or replace function set_updated_at() returns trigger as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists guests_set_updated_at on guests;
+create trigger guests_set_updated_at
+    before insert or update on guests
+    for each row execute function set_updated_at();
@@ -0,0 +1,2 @@
+-- Stream guests inserts/updates/deletes to the change feed (change_feed.py).
+alter publication supabase_realtime add table guests;
@@ -0,0 +1,6 @@
+-- Idempotent bulk imports upsert on (name, brother_id) (guest_importer.py).
+create unique index if not exists guests_name_brother_id_key
+    on guests (name, brother_id);
+
+alter table guests
+    alter column check_in_status set default 'Not Checked In';
@@ -0,0 +1,12 @@
+-- Indexes for searches pushed down by query_planner.GuestQueryPlanner.
+
+-- ilike '%word%' on guest names
+create extension if not exists pg_trgm;
+create index if not exists guests_name_trgm_idx
+    on public.guests using gin (name gin_trgm_ops);
+
+-- Keyset pagination: order by name, id and seek past the last row
+create index if not exists guests_name_id_idx on public.guests (name, id);
+
+-- Brother filter (the join into brothers uses brother_id)
+create index if not exists guests_brother_id_idx on public.guests (brother_id);
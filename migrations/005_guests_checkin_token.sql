@@ -0,0 +1,13 @@
+-- Per-guest token printed as a QR code for scan check-in (checkin_tokens.py).
+alter table guests add column if not exists checkin_token text;
+
+update guests
+    set checkin_token = left(replace(gen_random_uuid()::text, '-', ''), 16)
+    where checkin_token is null;
+
+alter table guests
+    alter column checkin_token set default left(replace(gen_random_uuid()::text, '-', ''), 16),
+    alter column checkin_token set not null;
+
+create unique index if not exists guests_checkin_token_key
+    on guests (checkin_token);
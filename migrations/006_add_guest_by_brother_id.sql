@@ -0,0 +1,28 @@
+-- add_guest overload taking the host's id. The app resolves host names
+-- against the roster before calling (brother_resolver.py), so adds no
+-- longer fail on a misspelled name. The host_name version stays for older
+-- clients; PostgREST picks the overload by argument names.
+create or replace function add_guest(
+    guest_name text,
+    brother_id bigint,
+    campus_status text,
+    gender text,
+    check_in_time timestamptz default now()
+) returns boolean as $$
+begin
+    if not exists (select 1 from brothers where id = add_guest.brother_id) then
+        raise exception 'brother not found' using detail = 'brother not found';
+    end if;
+    insert into guests (
+        name, brother_id, campus_status, gender, check_in_status, check_in_time
+    ) values (
+        add_guest.guest_name,
+        add_guest.brother_id,
+        add_guest.campus_status,
+        add_guest.gender,
+        'Checked In',
+        add_guest.check_in_time
+    );
+    return true;
+end;
+$$ language plpgsql;
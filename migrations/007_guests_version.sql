@@ -0,0 +1,17 @@
+-- Compare-and-set check-ins (checkin_queue.py, search_component.py): every
+-- update bumps the row's version, and a write filtered on the version the
+-- client last saw matches no row if someone else changed the guest first.
+alter table guests
+    add column if not exists version bigint not null default 1;
+
+create or replace function bump_version() returns trigger as $$
+begin
+    new.version = old.version + 1;
+    return new;
+end;
+$$ language plpgsql;
+
+drop trigger if exists guests_bump_version on guests;
+create trigger guests_bump_version
+    before update on guests
+    for each row execute function bump_version();
@@ -0,0 +1,44 @@
+-- Events as a partition of guests. The live app reads only the open
+-- event's rows (guest_repository.py), so the live queries don't grow with
+-- history. A closed event is archived to Parquet by the app
+-- (event_archive.py); its rows are kept here unless the archive was also
+-- copied to a Supabase Storage bucket and the admin chose to delete them.
+create table if not exists events (
+    id bigint generated by default as identity primary key,
+    name text not null,
+    starts_at timestamptz not null default now(),
+    closed_at timestamptz
+);
+
+-- The event new guests belong to: the latest one still open
+create or replace function active_event_id() returns bigint as $$
+    select id from events
+    where closed_at is null
+    order by starts_at desc, id desc
+    limit 1
+$$ language sql stable;
+
+-- Guests already stored become the first event, starting at the oldest
+-- change to them (updated_at is from 001; guests has no created_at column)
+insert into events (name, starts_at)
+select 'First event', coalesce(min(updated_at), now()) from guests
+where not exists (select 1 from events);
+
+alter table guests
+    add column if not exists event_id bigint references events (id);
+update guests set event_id = active_event_id() where event_id is null;
+-- Inserts that don't say (add_guest, imports) go to the open event
+alter table guests
+    alter column event_id set default active_event_id(),
+    alter column event_id set not null;
+
+-- Every live query filters on the event first
+create index if not exists guests_event_id_updated_at_idx
+    on guests (event_id, updated_at);
+create index if not exists guests_event_id_name_id_idx
+    on guests (event_id, name, id);
+
+-- A guest may come back to later events; imports stay idempotent per event
+drop index if exists guests_name_brother_id_key;
+create unique index if not exists guests_event_id_name_brother_id_key
+    on guests (event_id, name, brother_id);
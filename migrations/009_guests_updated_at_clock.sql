@@ -0,0 +1,10 @@
+-- Stamp updated_at when the row is written, not when its transaction
+-- started: now() can be far behind the commit of a long transaction, and
+-- delta syncs (guest_repository.py) only look back SYNC_OVERLAP seconds
+-- behind the newest stamp they have seen.
+create or replace function set_updated_at() returns trigger as $$
+begin
+    new.updated_at = clock_timestamp();
+    return new;
+end;
+$$ language plpgsql;
@@ -0,0 +1,139 @@
+import re
+import string
+import unicodedata
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+ALPHABET = string.ascii_lowercase + string.digits
+
+
+def strip_accents(name: str) -> str:
+    """ASCII-fold a name ("Zoë" -> "Zoe")."""
+    name = unicodedata.normalize("NFKD", name)
+    return name.encode("ascii", "ignore").decode("ascii")
+
+
+def normalize_name(name) -> str:
+    """Lowercase, strip accents and collapse punctuation/whitespace to single
+    spaces ("Jayden O'dell" -> "jayden o dell")."""
+    if not isinstance(name, str):
+        return ""
+    return _NON_ALNUM.sub(" ", strip_accents(name).lower()).strip()
+
+
+def tokenize(name) -> list:
+    return normalize_name(name).split()
+
+
+def positional_trigrams(token: str) -> list:
+    """Word-start padded ``(trigram, position)`` pairs, so "ja" and "jay"
+    share ("$$j", 0) and ("$ja", 1)."""
+    padded = "$$" + token
+    return [(padded[i : i + 3], i) for i in range(len(token))]
+
+
+def edit_budget(length: int) -> int:
+    """Typos tolerated in a query token of this length."""
+    if length < 4:
+        return 0
+    if length < 9:
+        return 1
+    return 2
+
+
+def one_edit_variants(token: str) -> set:
+    """Every string one insertion, deletion or substitution away from
+    ``token`` (over the normalized alphabet)."""
+    splits = [(token[:i], token[i:]) for i in range(len(token) + 1)]
+    variants = {left + right[1:] for left, right in splits if right}
+    for left, right in splits:
+        for char in ALPHABET:
+            variants.add(left + char + right)
+            if right:
+                variants.add(left + char + right[1:])
+    variants.discard(token)
+    return variants
+
+
+def levenshtein(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        previous = current
+    return previous[-1]
+
+
+def bounded_levenshtein(a: str, b: str, limit: int):
+    """``levenshtein(a, b)``, or None as soon as it must exceed ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    beyond = limit + 1
+    previous = [j if j <= limit else beyond for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        # Only cells within ``limit`` of the diagonal can stay within budget
+        lo, hi = max(1, i - limit), min(len(b), i + limit)
+        current = [i if i <= limit else beyond] + [beyond] * len(b)
+        for j in range(lo, hi + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != b[j - 1]),
+            )
+        if min(current[lo - 1 : hi + 1]) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+
+def prefix_edit_distance(query: str, word: str, limit: int):
+    """Smallest edit distance between ``query`` and any prefix of ``word``,
+    or None if it exceeds ``limit``."""
+    m = len(query)
+    beyond = limit + 1
+    previous = list(range(m + 1))
+    best = previous[m] if m <= limit else beyond
+    for i, cw in enumerate(word[: m + limit], 1):
+        # Only cells within ``limit`` of the diagonal can stay within budget
+        lo, hi = max(1, i - limit), min(m, i + limit)
+        current = [i if i <= limit else beyond] + [beyond] * m
+        for j in range(lo, hi + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (query[j - 1] != cw),
+            )
+        best = min(best, current[m])
+        if min(current[lo - 1 : hi + 1]) > limit:
+            break
+        previous = current
+    return best if best <= limit else None
+
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def soundex(token: str) -> str:
+    """American Soundex of a normalized token ("schletz" -> "s243")."""
+    letters = [char for char in token if char.isalpha()]
+    if not letters:
+        return ""
+    code = letters[0]
+    previous = _SOUNDEX_CODES.get(letters[0], "")
+    for char in letters[1:]:
+        digit = _SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+        # "h" and "w" don't separate letters with the same code; vowels do
+        if char not in "hw":
+            previous = digit
+    return (code + "000")[:4]
@@ -0,0 +1,210 @@
+import functools
+import os
+import resource
+import statistics
+import threading
+import time
+from collections import deque
+
+CAPACITY = 4096
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _rss_bytes() -> int:
+    """Resident set size now (Linux), else the peak so far."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # ru_maxrss is in KiB on Linux, bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _quantile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class PerfRecorder:
+    """Timing spans and counters for the hot paths, process-wide.
+
+    The last ``capacity`` span timings are kept in a ring buffer for
+    percentiles; span counts and totals and the counters add up since the
+    recorder was (re)started. Gauges are callables returning a dict of
+    numbers, read only when a summary is taken. While ``enabled`` is
+    False, ``span`` hands back a shared do-nothing context and ``count``
+    returns at once, so leaving the calls in costs about a function call.
+    """
+
+    def __init__(self, capacity=CAPACITY, enabled=False):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self._spans = deque(maxlen=capacity)
+        self._totals = {}
+        self._counters = {}
+        self._gauges = {"process": lambda: {"rss_bytes": _rss_bytes()}}
+
+    def span(self, name: str):
+        """``with recorder.span("db.sync"): ...`` times the block."""
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float):
+        with self.lock:
+            self._spans.append((name, seconds))
+            count, total = self._totals.get(name, (0, 0.0))
+            self._totals[name] = (count + 1, total + seconds)
+
+    def count(self, name: str, n=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def add_gauges(self, name: str, read):
+        """Report ``read()`` (a dict of numbers) under ``name.`` in every
+        summary, e.g. a cache's ``stats``."""
+        self._gauges[name] = read
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self._spans.clear()
+            self._totals.clear()
+            self._counters.clear()
+
+    def summary(self) -> dict:
+        """Spans (percentiles over the ring buffer, count and total since
+        the start), counters and current gauge readings."""
+        with self.lock:
+            recent = list(self._spans)
+            totals = dict(self._totals)
+            counters = dict(self._counters)
+        by_name = {}
+        for name, seconds in recent:
+            by_name.setdefault(name, []).append(seconds)
+        spans = {}
+        for name, (count, total) in sorted(totals.items()):
+            ordered = sorted(by_name.get(name, [0.0]))
+            spans[name] = {
+                "count": count,
+                "total_s": total,
+                "mean_ms": statistics.fmean(ordered) * 1000,
+                **{
+                    f"p{int(q * 100)}_ms": _quantile(ordered, q) * 1000
+                    for q in QUANTILES
+                },
+                "max_ms": ordered[-1] * 1000,
+            }
+        gauges = {}
+        for prefix, read in self._gauges.items():
+            try:
+                values = read()
+            except Exception:
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)):
+                    gauges[f"{prefix}.{key}"] = value
+        return {
+            "enabled": self.enabled,
+            "since": self.started,
+            "spans": spans,
+            "counters": dict(sorted(counters.items())),
+            "gauges": gauges,
+        }
+
+    def to_prometheus(self, prefix="snowyowl") -> str:
+        """The summary in the Prometheus text exposition format."""
+        summary = self.summary()
+        spans, events, gauges = (
+            f"{prefix}_span_seconds",
+            f"{prefix}_events_total",
+            f"{prefix}_gauge",
+        )
+        lines = [
+            f"# HELP {spans} Time spent in instrumented code.",
+            f"# TYPE {spans} summary",
+        ]
+        for name, span in summary["spans"].items():
+            for q in QUANTILES:
+                seconds = span[f"p{int(q * 100)}_ms"] / 1000
+                lines.append(f'{spans}{{span="{name}",quantile="{q}"}} {seconds:.6g}')
+            lines.append(f'{spans}_sum{{span="{name}"}} {span["total_s"]:.6g}')
+            lines.append(f'{spans}_count{{span="{name}"}} {span["count"]}')
+        lines += [
+            f"# HELP {events} Instrumented events (queries, rows, cache hits).",
+            f"# TYPE {events} counter",
+        ]
+        for name, value in summary["counters"].items():
+            lines.append(f'{events}{{name="{name}"}} {value}')
+        lines += [
+            f"# HELP {gauges} Current readings (memory, queue and cache sizes).",
+            f"# TYPE {gauges} gauge",
+        ]
+        for name, value in summary["gauges"].items():
+            lines.append(f'{gauges}{{name="{name}"}} {value:.6g}')
+        return "\n".join(lines) + "\n"
+
+
+recorder = PerfRecorder(enabled=os.environ.get("SNOWYOWL_PERF", "") not in ("", "0"))
+
+
+def span(name: str):
+    return recorder.span(name)
+
+
+def count(name: str, n=1):
+    recorder.count(name, n)
+
+
+def count_query(rows=0):
+    """One database request that returned ``rows`` rows."""
+    if recorder.enabled:
+        recorder.count("db.queries")
+        recorder.count("db.rows", rows)
+
+
+def timed(name: str):
+    """Decorator: time every call of the function as span ``name``."""
+
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return function(*args, **kwargs)
+            with _Span(recorder, name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
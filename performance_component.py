@@ -0,0 +1,77 @@
+import json
+
+import pandas as pd
+import streamlit as st
+
+from perf import PerfRecorder
+
+
+def _set_recording(recorder: PerfRecorder):
+    recorder.enabled = st.session_state.perf_recording
+    if recorder.enabled:
+        recorder.reset()
+
+
+def create_performance_component(recorder: PerfRecorder):
+    """Admin panel: where rerun time goes, request and cache counters, and
+    memory, with JSON and Prometheus exports."""
+    st.toggle(
+        "Record timings",
+        value=recorder.enabled,
+        key="perf_recording",
+        on_change=_set_recording,
+        args=(recorder,),
+        help="Applies to every session of this server. Off, the spans cost "
+        "about a function call each.",
+    )
+    summary = recorder.summary()
+    counters = summary["counters"]
+    gauges = summary["gauges"]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Memory (RSS)", f"{gauges.get('process.rss_bytes', 0) / 2**20:.0f} MB")
+    col2.metric("DB requests", counters.get("db.queries", 0))
+    col3.metric("Rows transferred", counters.get("db.rows", 0))
+    searches = sum(
+        counters.get(f"search_cache.{kind}", 0)
+        for kind in ("hits", "narrowed", "misses")
+    )
+    col4.metric(
+        "Search cache hits",
+        f"{counters.get('search_cache.hits', 0) / searches:.0%}" if searches else "–",
+    )
+
+    if summary["spans"]:
+        spans = pd.DataFrame.from_dict(summary["spans"], orient="index")
+        spans.index.name = "span"
+        st.dataframe(
+            spans.sort_values("total_s", ascending=False).round(2),
+            use_container_width=True,
+        )
+    elif recorder.enabled:
+        st.info("No timings yet. Use the app in another tab to collect some.")
+    else:
+        st.info("Timing is off. Turn on recording to collect timings.")
+
+    with st.expander("Counters and gauges", expanded=False):
+        st.dataframe(
+            pd.Series({**counters, **gauges}, name="value", dtype=float).to_frame(),
+            use_container_width=True,
+        )
+
+    col1, col2, col3 = st.columns(3)
+    col1.download_button(
+        "Download JSON",
+        json.dumps(summary, indent=2),
+        file_name="snowyowl_perf.json",
+        mime="application/json",
+    )
+    col2.download_button(
+        "Download Prometheus",
+        recorder.to_prometheus(),
+        file_name="snowyowl_perf.prom",
+        mime="text/plain",
+    )
+    if col3.button("Reset"):
+        recorder.reset()
+        st.rerun()
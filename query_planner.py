@@ -0,0 +1,148 @@
+import time
+from dataclasses import dataclass
+
+import perf
+from guest_repository import GUEST_SELECT, normalize_guests
+from name_utils import tokenize
+
+LOCAL = "local"
+PUSHDOWN = "pushdown"
+
+STATUS_FILTERS = {"checked-in": "Checked In", "not-checked-in": "Not Checked In"}
+LOCATION_FILTERS = {"on-campus": "On Campus", "off-campus": "Off Campus"}
+# Seconds to search the local snapshot after a pushed-down query failed
+PUSHDOWN_RETRY = 30.0
+
+
+@dataclass(frozen=True)
+class KeysetCursor:
+    """Last row of a page in (name, id) order; the next page starts after it."""
+
+    name: str
+    id: int
+
+
+def _quote(value) -> str:
+    """Double-quote a value for PostgREST logic trees (commas, dots, parens)."""
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+class GuestQueryPlanner:
+    """Evaluates a ``SearchState`` locally or pushes it down to the database.
+
+    While the shared snapshot is fresh (the change feed is connected, or the
+    repository synced within ``max_staleness`` seconds) searches run against
+    it with the fuzzy index. Otherwise each page is one query: every query
+    word becomes an ``ilike '%word%'`` on the guest name (served by the
+    trigram index from ``migrations/004``), status, location and brother
+    become equality filters, and pages follow (name, id) keysets rather
+    than offsets, so a deep page costs the same as the first.
+
+    Pushed-down searches are substring matches on guest names only; typo
+    tolerance and brother-name matching need the local index.
+
+    A stale snapshot is usually stale because the database can't be
+    reached, so pushdown is only planned while it looks reachable: not
+    while the change feed's syncs are failing, nor for ``pushdown_retry``
+    seconds after a pushed-down query failed. Until then a non-empty
+    snapshot, however old, is searched locally.
+    """
+
+    def __init__(
+        self,
+        supabase,
+        repository,
+        change_feed=None,
+        max_staleness=10.0,
+        table="guests",
+        pushdown_retry=PUSHDOWN_RETRY,
+    ):
+        self._supabase = supabase
+        self.repository = repository
+        self.change_feed = change_feed
+        self.max_staleness = max_staleness
+        self._table = table
+        self.pushdown_retry = pushdown_retry
+        self._pushdown_failed_at = None
+
+    def snapshot_is_fresh(self) -> bool:
+        if self.repository.frame.empty:
+            return False
+        if self.change_feed is not None and self.change_feed.healthy:
+            return True
+        staleness = self.repository.staleness
+        return staleness is not None and staleness <= self.max_staleness
+
+    def database_unreachable(self) -> bool:
+        """Whether the last attempt to reach the database failed recently."""
+        if self.change_feed is not None and self.change_feed.needs_sync:
+            return True
+        failed_at = self._pushdown_failed_at
+        return failed_at is not None and (
+            time.monotonic() - failed_at < self.pushdown_retry
+        )
+
+    def plan(self) -> str:
+        if self.repository.frame.empty:
+            return PUSHDOWN
+        if self.snapshot_is_fresh() or self.database_unreachable():
+            return LOCAL
+        return PUSHDOWN
+
+    def build_query(self, search_state, after: KeysetCursor = None, limit=25):
+        query = self._supabase.table(self._table).select(GUEST_SELECT)
+        if self.repository.event_id is not None:
+            query = query.eq("event_id", self.repository.event_id)
+        for token in tokenize(search_state.query):
+            query = query.ilike("name", f"%{token}%")
+        if search_state.status_filter != "all":
+            query = query.eq(
+                "check_in_status", STATUS_FILTERS[search_state.status_filter]
+            )
+        if search_state.location_filter != "all":
+            query = query.eq(
+                "campus_status", LOCATION_FILTERS[search_state.location_filter]
+            )
+        if search_state.brother_filter != "all":
+            # Filters the parent rows because the embed is an inner join
+            query = query.eq("brothers.name", search_state.brother_filter)
+        if after is not None:
+            query = query.or_(
+                f"name.gt.{_quote(after.name)},"
+                f"and(name.eq.{_quote(after.name)},id.gt.{after.id})"
+            )
+        return query.order("name").order("id").limit(limit)
+
+    def fetch_page(self, search_state, after: KeysetCursor = None, page_size=25):
+        """One page of matches and the cursor for the next (None at the end).
+
+        A failure is remembered (see ``plan``) and re-raised.
+        """
+        try:
+            with perf.span("db.page"):
+                query = self.build_query(search_state, after, page_size + 1)
+                rows = query.execute().data
+        except Exception:
+            self._pushdown_failed_at = time.monotonic()
+            raise
+        self._pushdown_failed_at = None
+        perf.count_query(len(rows))
+        page = normalize_guests(rows[:page_size])
+        if len(rows) <= page_size:
+            return page, None
+        last = rows[page_size - 1]
+        return page, KeysetCursor(last["name"], last["id"])
+
+    def explain(self, search_state) -> dict:
+        """The plan chosen and why, for display or logging."""
+        plan = self.plan()
+        if plan == LOCAL and self.snapshot_is_fresh():
+            reason = "snapshot is fresh"
+        elif plan == LOCAL:
+            reason = "database unreachable; searching the last snapshot"
+        elif self.repository.frame.empty:
+            reason = "no local snapshot"
+        else:
+            reason = "snapshot is stale"
+        return {"plan": plan, "reason": reason, "query": search_state.query}
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+
+import perf
+from name_utils import edit_budget
+
+
+def narrows(prefix_tokens, tokens) -> bool:
+    """Whether every match for ``tokens`` also matches ``prefix_tokens``.
+
+    True when each cached word is a prefix of the new word at the same
+    position with the same typo budget (the budget grows with word length,
+    and a bigger budget can match guests the shorter word didn't), and the
+    new query only adds words after them.
+    """
+    if len(prefix_tokens) > len(tokens):
+        return False
+    return all(
+        token.startswith(prefix) and edit_budget(len(token)) == edit_budget(len(prefix))
+        for prefix, token in zip(prefix_tokens, tokens)
+    )
+
+
+class SearchCache:
+    """Per-session LRU of guest list results for search-as-you-type.
+
+    Results (ranked guest ids after filters) are keyed by filters and query
+    words for one data version; a new version clears the cache. A query
+    that misses is searched only among the results of its nearest cached
+    prefix ("jay" among the matches for "ja"), and repeated reruns with an
+    unchanged query are answered without searching at all.
+    """
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self.version = None
+        self._results = OrderedDict()
+        self.hits = 0
+        self.narrowed = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._results.clear()
+            self.version = version
+
+    def get(self, version, filters, tokens):
+        """Cached ids for exactly this search, or None."""
+        self._check_version(version)
+        key = (filters, tuple(tokens))
+        if key not in self._results:
+            return None
+        self._results.move_to_end(key)
+        self.hits += 1
+        perf.count("search_cache.hits")
+        return self._results[key]
+
+    def candidates(self, version, filters, tokens):
+        """Ids of the narrowest cached search this one refines, or None."""
+        self._check_version(version)
+        best = None
+        for (cached_filters, cached_tokens), ids in self._results.items():
+            if cached_filters != filters or not narrows(cached_tokens, tokens):
+                continue
+            if best is None or len(ids) < len(best):
+                best = ids
+        if best is None:
+            self.misses += 1
+            perf.count("search_cache.misses")
+        else:
+            self.narrowed += 1
+            perf.count("search_cache.narrowed")
+        return best
+
+    def put(self, version, filters, tokens, ids):
+        self._check_version(version)
+        key = (filters, tuple(tokens))
+        self._results[key] = ids
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._results),
+            "hits": self.hits,
+            "narrowed": self.narrowed,
+            "misses": self.misses,
+        }
@@ -1,9 +1,22 @@
-import pytz
 import streamlit as st
 import pandas as pd
 from dataclasses import dataclass
 from datetime import datetime
 
+import perf
+from add_guest_component import (
+    GENDER_OPTIONS,
+    add_guest_through_queue,
+    host_params,
+    resolve_gender,
+)
+from checkin_queue import CONFIRMED, FAILED, PENDING, SUPERSEDED
+from name_utils import tokenize
+from query_planner import LOCATION_FILTERS, STATUS_FILTERS
+from search_index import GuestSearchIndex
+
+PAGE_SIZE_OPTIONS = [10, 25, 50, 100]
+
 
 @dataclass(eq=True)
 class SearchState:
@@ -13,124 +26,161 @@ class SearchState:
     brother_filter: str = "all"
 
 
-def _fetch_guest_data(_supabase):
-    """Fetch guest data and store in cache."""
-    try:
-        response = _supabase.table("guests").select("*, brothers!inner(*)").execute()
-        if not response.data:
-            return pd.DataFrame()
-
-        df = pd.DataFrame(response.data)
-        df["name_lower"] = df["name"].str.lower()
-        df["brother_name_lower"] = df["brothers"].apply(
-            lambda x: x["name"].lower() if isinstance(x, dict) and "name" in x else ""
-        )
-
-        return df
-    except Exception as e:
-        st.error(f"Error fetching guest data: {str(e)}")
-        return pd.DataFrame()
-
-
-def refresh_guest_data():
-    """Force refresh of guest data cache."""
-    if "guest_data" in st.session_state:
-        del st.session_state.guest_data
-    st.cache_data.clear()
-
-
-def load_filtered_data(supabase, search_state: SearchState) -> pd.DataFrame:
-    """Apply search and filtering to guest data."""
-    # Check if we need to refresh data
-    if "needs_refresh" in st.session_state and st.session_state.needs_refresh:
-        refresh_guest_data()
-        st.session_state.needs_refresh = False
-
-    # Load or fetch guest data
-    if "guest_data" not in st.session_state:
-        st.session_state.guest_data = _fetch_guest_data(supabase)
-
-    df = st.session_state.guest_data.copy()
+@perf.timed("guest_list.filter")
+def load_filtered_data(
+    guest_df: pd.DataFrame,
+    search_state: SearchState,
+    search_index=None,
+    search_cache=None,
+    version=None,
+) -> pd.DataFrame:
+    """Apply search and filtering to guest data.
+
+    Query matches come ranked from ``search_index``, which should be the
+    shared index kept in step with ``guest_df``; one is built on the fly if
+    not given. With a per-session ``search_cache`` and the snapshot
+    ``version``, repeated searches are served from the cache and a longer
+    query only searches the results of its cached prefix.
+    """
+    df = guest_df
     if df.empty:
         return df
-    df["name_lower"] = df["name"].str.lower()
-    df["brother_name_lower"] = df["brothers"].apply(
-        lambda x: x["name"].lower() if isinstance(x, dict) and "name" in x else ""
+
+    use_cache = search_cache is not None and version is not None
+    filters = (
+        search_state.status_filter,
+        search_state.location_filter,
+        search_state.brother_filter,
     )
+    tokens = tokenize(search_state.query)
+    candidates = None
+    if use_cache:
+        ids = search_cache.get(version, filters, tokens)
+        if ids is not None:
+            return df.loc[ids]
+        candidates = search_cache.candidates(version, filters, tokens)
+        if candidates is not None:
+            # Already filtered; only the search below is left to apply
+            df = df.loc[candidates]
 
     # Apply filters
     if search_state.query:
-        query_lower = search_state.query.lower()
-        df = df[
-            df["name_lower"].str.contains(query_lower, na=False)
-            | df["brother_name_lower"].str.contains(query_lower, na=False)
-        ]
+        if search_index is None:
+            search_index = GuestSearchIndex()
+            search_index.reset(df)
+        with perf.span("guest_list.search"):
+            ids = search_index.search(
+                search_state.query, None if candidates is None else set(candidates)
+            )
+        df = df.loc[[guest_id for guest_id in ids or [] if guest_id in df.index]]
 
     if search_state.status_filter != "all":
-        status_map = {"checked-in": "Checked In", "not-checked-in": "Not Checked In"}
-        df = df[df["check_in_status"] == status_map[search_state.status_filter]]
+        df = df[df["check_in_status"] == STATUS_FILTERS[search_state.status_filter]]
 
     if search_state.location_filter != "all":
-        location_map = {"on-campus": "On Campus", "off-campus": "Off Campus"}
-        df = df[df["campus_status"] == location_map[search_state.location_filter]]
+        df = df[df["campus_status"] == LOCATION_FILTERS[search_state.location_filter]]
 
+    if search_state.brother_filter != "all":
+        df = df[df["brother_name"] == search_state.brother_filter]
+
+    if use_cache:
+        search_cache.put(version, filters, tokens, list(df.index))
     return df
 
 
-def handle_guest_status_update(supabase, guest_name: str, new_status: str):
-    """Update guest check-in status."""
+@perf.timed("checkin.direct_update")
+def handle_guest_status_update(
+    supabase,
+    guest_name: str,
+    new_status: str,
+    guest_repository=None,
+    guest_id=None,
+    version=None,
+):
+    """Update guest check-in status.
+
+    Pass ``guest_id`` to update that guest only, as a compare-and-set on its
+    row ``version`` (the one shown, else the snapshot's): if someone else
+    changed the guest first nothing is written and only that guest is
+    refetched. The updated row comes back with the response and patches the
+    snapshot in place. Matching on ``guest_name`` instead updates every
+    guest of that name (duplicates under other brothers).
+    """
     try:
         update_data = {
             "check_in_status": new_status,
-            "check_in_time": datetime.now().isoformat()
-            if new_status == "Checked In"
-            else None,
+            "check_in_time": (
+                datetime.now().isoformat() if new_status == "Checked In" else None
+            ),
         }
-        response = (
-            supabase.table("guests")
-            .update(update_data)
-            .eq("name", guest_name)
-            .execute()
-        )
+        query = supabase.table("guests").update(update_data)
+        if guest_id is not None:
+            if version is None and guest_repository is not None:
+                version = guest_repository.row_version(guest_id)
+            query = query.eq("id", guest_id)
+            if version is not None:
+                query = query.eq("version", version)
+        else:
+            query = query.eq("name", guest_name)
+        with perf.span("db.write"):
+            response = query.execute()
+        perf.count_query(len(response.data or []))
 
         if response.data:
-            # Mark for refresh on next load
-            st.session_state.needs_refresh = True
+            # Show our own write now rather than waiting for its change event
+            if guest_repository is not None:
+                guest_repository.apply_records(response.data)
             return True
+        if version is not None:
+            st.warning(f"{guest_name} was changed on another device; try again.")
+            if guest_repository is not None:
+                # Only the guest that changed, not the whole table
+                guest_repository.fetch_rows([guest_id])
         return False
     except Exception as e:
         st.error(f"Error updating guest status: {str(e)}")
         return False
 
 
-def quick_add_guest(supabase):
-    """Quick add guest via stored procedure."""
+def quick_add_guest(
+    supabase, gender_index=None, checkin_queue=None, brother_resolver=None
+):
+    """Quick add guest via stored procedure (journaled with a queue, host
+    checked locally with a resolver)."""
     with st.form("quick_add_form"):
         new_guest_name = st.text_input("Guest Name", "")
         host_name = st.text_input("Brother Name (check spelling)", "")
         campus_status = st.selectbox("On/Off Campus", ["On Campus", "Off Campus"])
-        gender_code = st.selectbox("Gender", ["M", "F"])
+        gender_code = st.selectbox("Gender", GENDER_OPTIONS)
         submit_button = st.form_submit_button("Add Guest")
 
         if submit_button and new_guest_name and host_name:
+            gender_code = resolve_gender(gender_code, new_guest_name, gender_index)
+            if gender_code is None:
+                st.error(
+                    "Couldn't tell gender from the first name; please pick M or F."
+                )
+                return
+            host = host_params(brother_resolver, host_name)
+            if host is None:
+                return
+            uppercase_guest_name = new_guest_name.upper()
+            params = {
+                "guest_name": uppercase_guest_name,
+                **host,
+                "campus_status": campus_status,
+                "gender": gender_code,
+                "check_in_time": datetime.utcnow().isoformat(),
+            }
+            if checkin_queue is not None:
+                add_guest_through_queue(checkin_queue, params)
+                return
             try:
-                uppercase_guest_name = new_guest_name.upper()
-
-                response = supabase.rpc(
-                    "add_guest",
-                    {
-                        "guest_name": uppercase_guest_name,
-                        "host_name": host_name,
-                        "campus_status": campus_status,
-                        "gender": gender_code,
-                        "check_in_time": datetime.utcnow().isoformat(),
-                    },
-                ).execute()
+                response = supabase.rpc("add_guest", params).execute()
 
                 if response.data:
+                    # The change feed brings the new guest into the list
                     st.success(f"Guest {uppercase_guest_name} added successfully!")
-                    st.session_state.needs_refresh = True
-                    st.rerun()
                 else:
                     st.error("Failed to add guest. Please try again.")
 
@@ -149,45 +199,289 @@ def quick_add_guest(supabase):
                     st.error("An unexpected error occurred. Please try again.")
 
 
-def create_guest_list_component(supabase, filtered_df: pd.DataFrame):
-    """Guest list component with improved state management."""
-    eastern = pytz.timezone("US/Eastern")
-    if filtered_df.empty:
-        st.info("No guests found.")
-        return
+def _set_guest_status(
+    supabase,
+    guest_id,
+    guest_name,
+    new_status,
+    guest_repository,
+    checkin_queue,
+    version=None,
+):
+    # With a queue the change shows at once and is written in the background;
+    # guests missing from the snapshot (e.g. a pushed-down search) go direct
+    updated = checkin_queue is not None and checkin_queue.submit(
+        guest_id, new_status, version
+    )
+    if not updated:
+        updated = handle_guest_status_update(
+            supabase, guest_name, new_status, guest_repository, guest_id, version
+        )
+    if updated:
+        # Shown by the list itself; elements emitted from a fragment callback
+        # would land at the top of the page
+        st.session_state.guest_list_toast = f"{guest_name} is now {new_status}."
 
-    for index, row in filtered_df.iterrows():
+
+SYNC_LABELS = {
+    PENDING: "⏳ Saving…",
+    CONFIRMED: "✓ Saved",
+    FAILED: "⚠️ Not saved",
+    SUPERSEDED: "↺ Changed on another device",
+}
+
+
+def _sync_label(checkin_queue, guest_id) -> str:
+    """Write-behind state of a guest's last status change, if any."""
+    if checkin_queue is None:
+        return ""
+    return SYNC_LABELS.get(checkin_queue.state(guest_id), "")
+
+
+def _guest_page(filtered_df: pd.DataFrame) -> pd.DataFrame:
+    """Page controls; returns only the rows of the selected page."""
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col2:
+        page_size = st.selectbox(
+            "Per page", PAGE_SIZE_OPTIONS, index=1, key="guest_list_page_size"
+        )
+    page_count = max(1, -(-len(filtered_df) // page_size))
+    # A narrower search can leave the stored page past the end
+    if st.session_state.get("guest_list_page", 1) > page_count:
+        st.session_state.guest_list_page = page_count
+    with col3:
+        page = st.number_input(
+            "Page", min_value=1, max_value=page_count, step=1, key="guest_list_page"
+        )
+    start = (page - 1) * page_size
+    stop = min(start + page_size, len(filtered_df))
+    with col1:
+        st.caption(f"Showing {start + 1}–{stop} of {len(filtered_df)} guests")
+    return filtered_df.iloc[start:stop]
+
+
+def keyset_guest_page(planner, search_state: SearchState):
+    """One page of a pushed-down search, with Previous/Next controls, or
+    None (with nothing rendered) if the database can't be reached.
+
+    The cursors of the pages visited are kept in session state and reset
+    when the search changes.
+    """
+    pages = st.session_state.get("guest_list_keyset")
+    if pages is None or pages["search_state"] != search_state:
+        pages = {"search_state": search_state, "cursors": [None]}
+        st.session_state.guest_list_keyset = pages
+    # Fetched before any widget is drawn, so the caller can fall back to
+    # the local list (which has the same page size control) on failure
+    page_size = st.session_state.get("guest_list_page_size", PAGE_SIZE_OPTIONS[1])
+    try:
+        page_df, next_cursor = planner.fetch_page(
+            search_state, pages["cursors"][-1], page_size
+        )
+    except Exception:
+        return None
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        st.selectbox("Per page", PAGE_SIZE_OPTIONS, index=1, key="guest_list_page_size")
+    col2.button(
+        "← Previous",
+        key="guest_list_previous",
+        disabled=len(pages["cursors"]) == 1,
+        on_click=pages["cursors"].pop,
+    )
+    col3.button(
+        "Next →",
+        key="guest_list_next",
+        disabled=next_cursor is None,
+        on_click=pages["cursors"].append,
+        args=(next_cursor,),
+    )
+    st.caption(f"Page {len(pages['cursors'])}, searched on the server")
+    return page_df
+
+
+def _row_version(row):
+    """The row ``version`` a displayed guest was read at, if known."""
+    version = row.get("version")
+    return None if version is None or pd.isna(version) else int(version)
+
+
+def _render_guest_cards(
+    supabase, page_df: pd.DataFrame, guest_repository, checkin_queue
+):
+    for guest_id, row in page_df.iterrows():
         with st.container():
             col1, col2 = st.columns([4, 1])
 
             with col1:
                 st.markdown(f"### {row['name']}")
                 st.markdown(
-                    f"**Brother:** {row['brothers']['name']}  \n"
+                    f"**Brother:** {row['brother_name']}  \n"
                     f"**Status:** {row['check_in_status']}  \n"
                     f"**Location:** {row['campus_status']}"
                 )
-                if row.get("check_in_time"):
+                if pd.notna(row.get("check_in_time")):
                     st.caption(
-                        f"Last check-in: {pd.to_datetime(row['check_in_time']).strftime('%Y-%m-%d %H:%M:%S')}"
+                        f"Last check-in: {row['check_in_time'].strftime('%Y-%m-%d %H:%M:%S')}"
                     )
+                sync_label = _sync_label(checkin_queue, guest_id)
+                if sync_label:
+                    error = checkin_queue.error(guest_id)
+                    st.caption(f"{sync_label} ({error})" if error else sync_label)
 
             is_checked_in = row["check_in_status"] == "Checked In"
             button_text = "❌ Undo" if is_checked_in else "✅ Check In"
             new_status = "Not Checked In" if is_checked_in else "Checked In"
 
-            if col2.button(
+            # Updating in on_click lets the rerun the click triggers show the
+            # new status, instead of rendering stale rows and rerunning again
+            col2.button(
                 button_text,
-                key=f"button_{row['name']}_{index}",
+                key=f"button_{guest_id}",
                 use_container_width=True,
-            ):
-                if handle_guest_status_update(supabase, row["name"], new_status):
-                    st.toast(f"{row['name']} is now {new_status}.", icon="✅")
-                    st.rerun()
+                on_click=_set_guest_status,
+                args=(
+                    supabase,
+                    guest_id,
+                    row["name"],
+                    new_status,
+                    guest_repository,
+                    checkin_queue,
+                    _row_version(row),
+                ),
+            )
+
+
+def _render_guest_table(
+    supabase, page_df: pd.DataFrame, guest_repository, checkin_queue
+):
+    """One data editor for the page; ticking "In" checks the guest in."""
+    table = pd.DataFrame(
+        {
+            "In": page_df["check_in_status"] == "Checked In",
+            "Name": page_df["name"],
+            "Brother": page_df["brother_name"],
+            "Location": page_df["campus_status"],
+            "Saved": [
+                _sync_label(checkin_queue, guest_id) for guest_id in page_df.index
+            ],
+        },
+        index=page_df.index,
+    )
+    # The editor key follows the statuses shown, so applied edits don't linger
+    key = f"guest_table_{hash(tuple(zip(table.index, table['In'])))}"
+    st.data_editor(
+        table,
+        key=key,
+        hide_index=True,
+        use_container_width=True,
+        disabled=["Name", "Brother", "Location", "Saved"],
+        column_config={"In": st.column_config.CheckboxColumn("In", width="small")},
+        on_change=_apply_table_edits,
+        args=(key, table, supabase, guest_repository, checkin_queue, page_df),
+    )
+
+
+def _apply_table_edits(
+    key, table: pd.DataFrame, supabase, guest_repository, checkin_queue, page_df
+):
+    for position, changes in st.session_state[key]["edited_rows"].items():
+        if "In" in changes:
+            new_status = "Checked In" if changes["In"] else "Not Checked In"
+            guest_id = table.index[position]
+            name = table.iloc[position]["Name"]
+            _set_guest_status(
+                supabase,
+                guest_id,
+                name,
+                new_status,
+                guest_repository,
+                checkin_queue,
+                _row_version(page_df.iloc[position]),
+            )
 
 
-def create_search_component() -> SearchState:
-    """Enhanced search interface with improved state management."""
+@perf.timed("guest_list.render")
+def create_guest_list_component(
+    supabase,
+    filtered_df: pd.DataFrame,
+    guest_repository=None,
+    checkin_queue=None,
+    paginate=True,
+):
+    """Guest list rendered one page at a time, as cards or a compact table.
+
+    With a ``checkin_queue``, clicks are applied locally at once and written
+    in the background, and each row shows whether its change is saved. Pass
+    ``paginate=False`` when ``filtered_df`` is already a single page.
+    """
+    if "guest_list_toast" in st.session_state:
+        st.toast(st.session_state.pop("guest_list_toast"), icon="✅")
+    if filtered_df.empty:
+        st.info("No guests found.")
+        return
+
+    compact = st.toggle("Compact table", key="guest_list_compact")
+    page_df = _guest_page(filtered_df) if paginate else filtered_df
+    if compact:
+        _render_guest_table(supabase, page_df, guest_repository, checkin_queue)
+    else:
+        _render_guest_cards(supabase, page_df, guest_repository, checkin_queue)
+
+
+def _scan_check_in(token_index, guest_repository, checkin_queue):
+    scan = st.session_state.scan_input
+    # Clear the field so the scanner's next code starts from empty
+    st.session_state.scan_input = ""
+    if not scan.strip():
+        return
+    guest_id = token_index.resolve(scan)
+    frame = guest_repository.frame
+    if guest_id is None or guest_id not in frame.index:
+        st.session_state.scan_result = ("error", f"Unknown pass: {scan.strip()}")
+        return
+    guest = frame.loc[guest_id]
+    who = f"{guest['name']} ({guest['brother_name']})"
+    if guest["check_in_status"] == "Checked In":
+        since = guest["check_in_time"]
+        since = f" at {since.strftime('%H:%M')}" if pd.notna(since) else ""
+        st.session_state.scan_result = ("warning", f"{who} already checked in{since}.")
+        return
+    if checkin_queue.submit(guest_id, "Checked In"):
+        st.session_state.scans = st.session_state.get("scans", 0) + 1
+        st.session_state.scan_result = ("success", f"✅ {who} checked in.")
+    else:
+        st.session_state.scan_result = ("error", f"Unknown pass: {scan.strip()}")
+
+
+def create_scan_component(token_index, guest_repository, checkin_queue):
+    """Check guests in by scanning the QR code on their pass.
+
+    A scanner in keyboard mode types the code and presses Enter; the token
+    is looked up in ``token_index`` and the check-in queued in one step, so
+    the field is ready for the next pass straight away.
+    """
+    st.text_input(
+        "Scan pass",
+        key="scan_input",
+        placeholder="Scan a QR code or type the token, then Enter",
+        on_change=_scan_check_in,
+        args=(token_index, guest_repository, checkin_queue),
+    )
+    if "scan_result" in st.session_state:
+        level, message = st.session_state.scan_result
+        getattr(st, level)(message)
+    st.caption(
+        f"{st.session_state.get('scans', 0)} checked in by scan this session · "
+        f"{checkin_queue.stats()['queued']} waiting to save"
+    )
+
+
+def create_search_component(brother_names=()) -> SearchState:
+    """Enhanced search interface with improved state management.
+
+    ``brother_names`` are the choices of the brother filter.
+    """
     # Initialize default search state if not exists
     if "search_state" not in st.session_state:
         st.session_state.search_state = SearchState()
@@ -196,6 +490,7 @@ def create_search_component() -> SearchState:
         st.session_state.search_input = ""
         st.session_state.status_filter = "all"
         st.session_state.location_filter = "all"
+        st.session_state.brother_filter = "all"
         st.session_state.search_state = SearchState()
 
     with st.container():
@@ -231,9 +526,20 @@ def create_search_component() -> SearchState:
                 ),
                 key="location_filter",
             )
+            brother_options = ["all", *brother_names]
+            if st.session_state.get("brother_filter", "all") not in brother_options:
+                st.session_state.brother_filter = "all"
+            brother_filter = st.selectbox(
+                "Brother", brother_options, key="brother_filter"
+            )
 
         # Only show clear filters button if there are active filters
-        if search_query or status_filter != "all" or location_filter != "all":
+        if (
+            search_query
+            or status_filter != "all"
+            or location_filter != "all"
+            or brother_filter != "all"
+        ):
             if st.button("Clear Filters", key="clear_filters", on_click=clear_filters):
                 pass  # The on_click handler will handle the clearing
 
@@ -242,6 +548,7 @@ def create_search_component() -> SearchState:
             query=search_query,
             status_filter=status_filter,
             location_filter=location_filter,
+            brother_filter=brother_filter,
         )
 
         # Only update if there are actual changes
@@ -251,6 +558,7 @@ def create_search_component() -> SearchState:
         active_filters = [
             f"Status: {status_filter}" if status_filter != "all" else "",
             f"Location: {location_filter}" if location_filter != "all" else "",
+            f"Brother: {brother_filter}" if brother_filter != "all" else "",
         ]
         active_filters = [f for f in active_filters if f]
         if active_filters:
@@ -0,0 +1,282 @@
+import bisect
+import threading
+from collections import Counter, defaultdict
+
+import pandas as pd
+
+from name_utils import (
+    edit_budget,
+    one_edit_variants,
+    positional_trigrams,
+    prefix_edit_distance,
+    tokenize,
+)
+
+# Added to a guest's score when a query word only matched their brother
+BROTHER_MATCH_PENALTY = 0.5
+# One-word queries up to this long have their ranked results kept ready
+SHORT_PREFIX = 2
+
+
+def _short_prefixes(fields: dict) -> set:
+    return {
+        word[:length]
+        for words in fields.values()
+        for word in words
+        for length in range(1, SHORT_PREFIX + 1)
+    }
+
+
+class GuestSearchIndex:
+    """Fuzzy word-prefix index over guest and brother names.
+
+    A guest matches when every query word is within ``edit_budget`` typos of
+    the start of one of their name or brother-name words, so "Bailee mckean"
+    finds "Bailey McKean" and "ja" finds "Jayden". Matching words are looked
+    up in a sorted vocabulary (exact prefixes, prefixes of one-typo variants)
+    or, for long words, found through trigram postings and confirmed with an
+    edit distance, so a query never scans every
+    guest. Results are ranked by total typos, then guest-name matches before
+    brother-name matches, then name.
+
+    A one- or two-letter query matches a large share of the guests and would
+    spend its time ranking them, so the ranked results of every such prefix
+    are built with the index and only rebuilt (on their next query) when a
+    guest with a word starting with it is added, renamed or removed.
+
+    The index is a ``GuestRepository`` listener: it is rebuilt on a full
+    resync and patched per guest on delta syncs and change events. It is
+    shared across sessions, so updates and queries take ``lock``.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._docs = {}
+        self._names = {}
+        self._postings = {"name": defaultdict(set), "brother": defaultdict(set)}
+        self._vocabulary = []
+        self._word_counts = Counter()
+        self._prefix_counts = Counter()
+        self._grams = defaultdict(set)
+        self._short = {}
+
+    def __len__(self):
+        return len(self._docs)
+
+    # -- maintenance -------------------------------------------------------
+    def _add_word(self, word: str):
+        self._word_counts[word] += 1
+        if self._word_counts[word] == 1:
+            bisect.insort(self._vocabulary, word)
+            self._prefix_counts.update(word[:i] for i in range(1, len(word) + 1))
+            for gram in positional_trigrams(word):
+                self._grams[gram].add(word)
+
+    def _drop_word(self, word: str):
+        self._word_counts[word] -= 1
+        if self._word_counts[word] == 0:
+            del self._word_counts[word]
+            del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+            for i in range(1, len(word) + 1):
+                self._prefix_counts[word[:i]] -= 1
+                if not self._prefix_counts[word[:i]]:
+                    del self._prefix_counts[word[:i]]
+            for gram in positional_trigrams(word):
+                self._grams[gram].discard(word)
+
+    def add(self, guest_id, name, brother_name=""):
+        fields = {"name": tokenize(name), "brother": tokenize(brother_name)}
+        if self._docs.get(guest_id) == fields and self._names[guest_id] == (name or ""):
+            # e.g. a check-in: nothing searchable changed
+            return
+        self.discard(guest_id)
+        for prefix in _short_prefixes(fields):
+            self._short.pop(prefix, None)
+        self._docs[guest_id] = fields
+        self._names[guest_id] = name or ""
+        for field, words in fields.items():
+            for word in words:
+                self._postings[field][word].add(guest_id)
+                self._add_word(word)
+
+    def discard(self, guest_id):
+        fields = self._docs.pop(guest_id, None)
+        if fields is None:
+            return
+        del self._names[guest_id]
+        for prefix in _short_prefixes(fields):
+            self._short.pop(prefix, None)
+        for field, words in fields.items():
+            for word in words:
+                postings = self._postings[field][word]
+                postings.discard(guest_id)
+                if not postings:
+                    del self._postings[field][word]
+                self._drop_word(word)
+
+    def reset(self, frame: pd.DataFrame):
+        """Rebuild from a full guest frame."""
+        with self.lock:
+            self._clear()
+            if not frame.empty:
+                self._build(frame)
+
+    def _build(self, frame: pd.DataFrame):
+        for guest_id, name, brother_name in zip(
+            frame.index, frame["name"], frame["brother_name"]
+        ):
+            fields = {"name": tokenize(name), "brother": tokenize(brother_name)}
+            self._docs[guest_id] = fields
+            self._names[guest_id] = name or ""
+            for field, words in fields.items():
+                for word in words:
+                    self._postings[field][word].add(guest_id)
+                    self._word_counts[word] += 1
+        self._vocabulary = sorted(self._word_counts)
+        for word in self._vocabulary:
+            self._prefix_counts.update(word[:i] for i in range(1, len(word) + 1))
+            for gram in positional_trigrams(word):
+                self._grams[gram].add(word)
+        # Rank every short prefix once, sorting by a precomputed position
+        position = {
+            guest_id: i
+            for i, guest_id in enumerate(sorted(self._docs, key=self._rank_key))
+        }
+        prefixes = {
+            word[:length]
+            for word in self._vocabulary
+            for length in range(1, SHORT_PREFIX + 1)
+        }
+        for prefix in prefixes:
+            self._short[prefix] = self._rank_prefix(prefix, position.__getitem__)
+
+    def _rank_key(self, guest_id):
+        # Ties on name fall back to id, so order doesn't depend on sets
+        return self._names[guest_id], guest_id
+
+    def upsert(self, rows: pd.DataFrame, previous: pd.DataFrame):
+        with self.lock:
+            for guest_id, name, brother_name in zip(
+                rows.index, rows["name"], rows["brother_name"]
+            ):
+                self.add(guest_id, name, brother_name)
+
+    def remove(self, rows: pd.DataFrame):
+        with self.lock:
+            for guest_id in rows.index:
+                self.discard(guest_id)
+
+    # -- queries -----------------------------------------------------------
+    def _words_starting_with(self, prefix: str) -> list:
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        stop = bisect.bisect_left(self._vocabulary, prefix + "\x7f", lo=start)
+        return self._vocabulary[start:stop]
+
+    def _match_word(self, token: str) -> dict:
+        """Vocabulary words the token could be the start of -> typo count."""
+        matches = dict.fromkeys(self._words_starting_with(token), 0)
+
+        budget = edit_budget(len(token))
+        if budget == 1:
+            # A prefix within one typo is a prefix of some one-edit variant,
+            # so a few hundred bisections replace any distance computation.
+            for variant in one_edit_variants(token) & self._prefix_counts.keys():
+                for word in self._words_starting_with(variant):
+                    matches.setdefault(word, 1)
+        elif budget:
+            # Positional q-gram lemma: each edit destroys at most three
+            # trigrams and shifts the rest by at most ``budget``, so a match
+            # shares all but 3 * budget of them (near their position) and
+            # must contain at least one of the 3 * budget + 1 rarest.
+            postings = sorted(
+                (
+                    set().union(
+                        *(
+                            self._grams.get((gram, shifted), ())
+                            for shifted in range(
+                                position - budget, position + budget + 1
+                            )
+                        )
+                    )
+                    for gram, position in positional_trigrams(token)
+                ),
+                key=len,
+            )
+            needed = len(postings) - 3 * budget
+            candidates = set().union(*postings[: 3 * budget + 1])
+            for word in candidates - matches.keys():
+                if sum(word in words for words in postings) < needed:
+                    continue
+                distance = prefix_edit_distance(token, word, budget)
+                if distance is not None:
+                    matches[word] = distance
+        return matches
+
+    def search(self, query: str, candidates=None):
+        """Ranked guest ids matching ``query``, or None for an empty query.
+
+        ``candidates`` optionally restricts the search to a set of ids.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        with self.lock:
+            return self._search(tokens, candidates)
+
+    def _rank_prefix(self, prefix: str, key) -> list:
+        words = self._words_starting_with(prefix)
+        named = set().union(*(self._postings["name"].get(w, ()) for w in words))
+        hosted = set().union(*(self._postings["brother"].get(w, ()) for w in words))
+        return sorted(named, key=key) + sorted(hosted - named, key=key)
+
+    def _short_prefix(self, prefix: str) -> list:
+        """Ranked ids for a one-word query of up to ``SHORT_PREFIX`` letters
+        (no typos allowed at that length)."""
+        ranked = self._short.get(prefix)
+        if ranked is None:
+            ranked = self._short[prefix] = self._rank_prefix(prefix, self._rank_key)
+        return ranked
+
+    def _search(self, tokens, candidates):
+        if len(tokens) == 1 and len(tokens[0]) <= SHORT_PREFIX:
+            ranked = self._short_prefix(tokens[0])
+            if candidates is None:
+                return list(ranked)
+            return [guest_id for guest_id in ranked if guest_id in candidates]
+
+        scores = None
+        for token in tokens:
+            # Union postings per score in C, then keep each guest's best score
+            groups = defaultdict(list)
+            for word, distance in self._match_word(token).items():
+                for field, penalty in (("name", 0), ("brother", BROTHER_MATCH_PENALTY)):
+                    ids = self._postings[field].get(word)
+                    if ids:
+                        groups[distance + penalty].append(ids)
+            token_scores = {}
+            for score in sorted(groups):
+                ids = set().union(*groups[score])
+                if candidates is not None:
+                    ids &= candidates
+                token_scores.update(dict.fromkeys(ids - token_scores.keys(), score))
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    guest_id: score + token_scores[guest_id]
+                    for guest_id, score in scores.items()
+                    if guest_id in token_scores
+                }
+            if not scores:
+                return []
+
+        by_score = defaultdict(list)
+        for guest_id, score in scores.items():
+            by_score[score].append(guest_id)
+        ranked = []
+        for score in sorted(by_score):
+            ranked.extend(sorted(by_score[score], key=self._rank_key))
+        return ranked
@@ -1,11 +1,31 @@
+import logging
 import streamlit as st
-import pandas as pd
 from supabase import create_client
-from add_guest_component import create_add_guest_component
-from dashboard_component import create_dashboard_component
+from add_guest_component import (
+    create_add_guest_component,
+    create_bulk_import_component,
+    create_duplicates_component,
+    create_pass_export_component,
+)
+from aggregates import GuestAggregates
+from brother_resolver import BrotherLookup
+from change_feed import ChangeFeed, SupabaseRealtimeTransport
+from checkin_queue import CheckInQueue
+from checkin_tokens import TokenIndex
+from event_archive import ARCHIVE_DIR, EventArchive, active_event
+from figure_cache import FigureCache
+from guest_repository import GuestRepository
+from journal import IntentJournal
+import perf
+from query_planner import PUSHDOWN, GuestQueryPlanner
+from rollups import CheckInRollup
+from search_cache import SearchCache
+from search_index import GuestSearchIndex
 from search_component import (
     create_guest_list_component,
+    create_scan_component,
     create_search_component,
+    keyset_guest_page,
     load_filtered_data,
     quick_add_guest,
 )
@@ -14,10 +34,21 @@ from search_component import (
 SUPABASE_URL = st.secrets["supabase"]["url"]
 SUPABASE_KEY = st.secrets["supabase"]["key"]
 
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+@st.cache_resource
+def get_supabase():
+    """One client (and HTTP connection pool) per process, not per script run."""
+    return create_client(SUPABASE_URL, SUPABASE_KEY)
+
+
+supabase = get_supabase()
+
+JOURNAL_PATH = "snowyowl_journal.sqlite3"
 
 USERNAME = "door"
 PASSWORD = "pgd1848"
+# Optional [admin] username/password in secrets; admins also see Performance
+ADMIN = st.secrets.get("admin", {})
 
 
 def check_auth():
@@ -34,6 +65,14 @@ def check_auth():
                 if username == USERNAME and password == PASSWORD:
                     st.session_state.authenticated = True
                     st.rerun()
+                elif (
+                    ADMIN
+                    and username == ADMIN.get("username")
+                    and password == ADMIN.get("password")
+                ):
+                    st.session_state.authenticated = True
+                    st.session_state.admin = True
+                    st.rerun()
                 else:
                     st.error("Invalid credentials")
 
@@ -43,50 +82,317 @@ def check_auth():
 check_auth()
 
 
-# Modified to load initial data without filters
-def load_initial_data():
-    response = (
-        supabase.table("guests")
-        .select("*, brothers!inner(*)")  # Use inner join to get all brothers data
-        .execute()
+@st.cache_resource
+def get_change_feed():
+    """Process-wide guest snapshot kept current by realtime change events.
+
+    Only the open event's guests are loaded; past events live in the archive.
+    """
+    event = active_event(supabase)
+    repository = GuestRepository(supabase, event_id=event and event["id"])
+    transport = SupabaseRealtimeTransport(SUPABASE_URL, SUPABASE_KEY)
+    return ChangeFeed(repository, transport).start()
+
+
+@st.cache_resource
+def get_search_index():
+    """Guest name index shared by all sessions, patched on every change."""
+    return get_change_feed().repository.add_listener(GuestSearchIndex())
+
+
+@st.cache_resource
+def get_journal():
+    """On-disk log of check-ins and adds not yet written to the database."""
+    return IntentJournal(st.secrets.get("journal_path", JOURNAL_PATH))
+
+
+@st.cache_resource
+def get_checkin_queue():
+    """Background writer for check-ins and adds from every session.
+
+    Replays whatever the journal kept from a previous run on start.
+    """
+    return CheckInQueue(
+        supabase, get_change_feed().repository, journal=get_journal()
+    ).start()
+
+
+@st.cache_resource
+def get_token_index():
+    """Pass token -> guest id for scan check-in, patched on every change."""
+    return get_change_feed().repository.add_listener(TokenIndex())
+
+
+@st.cache_resource
+def get_aggregates():
+    """Dashboard counters shared by all sessions, patched on every change."""
+    return get_change_feed().repository.add_listener(GuestAggregates())
+
+
+@st.cache_resource
+def get_checkin_rollup():
+    """Check-ins per time bucket for the arrivals chart, patched on every
+    change."""
+    return get_change_feed().repository.add_listener(CheckInRollup())
+
+
+@st.cache_resource
+def get_figure_cache():
+    """Built dashboard figures, reused across reruns and sessions."""
+    return FigureCache()
+
+
+@st.cache_resource
+def get_query_planner():
+    """Chooses between the shared snapshot and server-side search."""
+    feed = get_change_feed()
+    return GuestQueryPlanner(supabase, feed.repository, feed)
+
+
+@st.cache_resource
+def get_brother_lookup():
+    """Host name lookup for the add forms: the brothers table once it can
+    be read, the bundled roster until then."""
+    return BrotherLookup(supabase)
+
+
+@st.cache_resource
+def get_gender_index():
+    """SSA first-name table, memory-mapped once per process."""
+    from gender_inference import GenderIndex
+
+    return GenderIndex.load()
+
+
+@st.cache_resource
+def get_event_archive():
+    """Parquet files of closed events, read by the History tab. Files the
+    local disk lost since the last deploy are restored first, from the
+    ``archive_bucket`` storage bucket or the rows still in the database."""
+    archive = EventArchive(
+        st.secrets.get("archive_dir", ARCHIVE_DIR), st.secrets.get("archive_bucket")
     )
-    if response.data:
-        df = pd.DataFrame(response.data)
-        return df
-    return pd.DataFrame()
+    try:
+        archive.restore(supabase)
+    except Exception:
+        logging.getLogger(__name__).exception("Could not restore the archive")
+    return archive
 
 
-st.session_state.guest_data = load_initial_data()
+@st.cache_resource
+def get_perf_recorder():
+    """Hot-path timings and counters for the Performance tab. Recording
+    starts on if the ``perf`` secret (or SNOWYOWL_PERF) is set."""
+    if st.secrets.get("perf", False):
+        perf.recorder.enabled = True
+    repository = get_change_feed().repository
+    perf.recorder.add_gauges(
+        "repository",
+        lambda: {
+            "rows": len(repository.frame),
+            "version": repository.version,
+            "full_resyncs": repository.full_resyncs,
+            "delta_syncs": repository.delta_syncs,
+        },
+    )
+    perf.recorder.add_gauges("checkin_queue", get_checkin_queue().stats)
+    perf.recorder.add_gauges("figure_cache", get_figure_cache().stats)
+    return perf.recorder
 
-st.title("SNOWYOWL")
 
-# Auto-refresh every 10 seconds
-# st_autorefresh(interval=10000, key="data_refresh")
-if st.button("Refresh Data 🔄"):
-    st.session_state.guest_data = load_initial_data()
-    st.rerun()
+# Shared by every view; resources only one view needs (gender table, host
+# roster, dashboard modules) are loaded when that view first renders.
+# The recorder comes first so the initial load is timed when enabled.
+perf_recorder = get_perf_recorder()
+change_feed = get_change_feed()
+guest_repository = change_feed.repository
+search_index = get_search_index()
+token_index = get_token_index()
+aggregates = get_aggregates()
+checkin_rollup = get_checkin_rollup()
+figure_cache = get_figure_cache()
+checkin_queue = get_checkin_queue()
+query_planner = get_query_planner()
 
 
-# Create tabs
-tab1, tab2, tab3 = st.tabs(["📊 Dashboard", "📜 Guest List & Check-In", "Add Guest"])
+def current_snapshot():
+    """Latest shared snapshot; no database query while the feed is up.
 
-# ---------------- Dashboard Tab ----------------
-with tab1:
-    if st.session_state.guest_data.empty:
+    Every session reads the same frame by reference; session state only
+    holds view state (search, filters, page, search cache).
+    """
+    return change_feed.snapshot()
+
+
+def current_guest_data():
+    return current_snapshot().frame
+
+
+def get_brother_resolver():
+    """Resolver for the add forms; doesn't wait on the brothers table while
+    the backend is known to be unreachable."""
+    offline = checkin_queue.offline or change_feed.needs_sync
+    return get_brother_lookup().resolver(offline)
+
+
+# Each section is a fragment: a check-in click or a filter change reruns only
+# the guest list, and the other sections refresh themselves on a timer from
+# the shared snapshot instead of rerunning the whole page.
+@st.fragment(run_every="2s")
+@perf.timed("rerun.metrics")
+def live_metrics_fragment():
+    from dashboard_component import create_metrics_component
+
+    guest_data = current_guest_data()
+    if not change_feed.healthy:
+        st.caption("Live updates reconnecting…")
+    if guest_data.empty:
         st.info("Upload guest lists to see the dashboard.")
     else:
-        processed_df = st.session_state.guest_data
-        create_dashboard_component(processed_df)
+        create_metrics_component(aggregates)
+
+
+@st.fragment(run_every="15s")
+@perf.timed("rerun.charts")
+def charts_fragment():
+    # plotly and the chart builders load on the first dashboard render
+    from dashboard_component import create_charts_component
+
+    guest_data = current_guest_data()
+    if not guest_data.empty:
+        create_charts_component(guest_data, aggregates, figure_cache, checkin_rollup)
+
+
+@st.fragment(run_every="3s")
+@perf.timed("rerun.guest_list")
+def guest_list_fragment():
+    st.subheader("Guest List & Check-In")
+    if checkin_queue.offline:
+        stats = checkin_queue.stats()
+        st.warning(
+            f"No connection to the database. {stats['queued']} check-in(s) and "
+            f"{stats['adds_queued']} new guest(s) are saved on this device and "
+            "will be sent when it returns."
+        )
+    elif current_snapshot().stale:
+        st.warning(
+            "No connection to the database. Showing the guest list as of the "
+            "last update; check-ins are saved on this device."
+        )
+    if st.toggle("Scan mode", key="scan_mode"):
+        # Only the scan field: no list to render between passes
+        create_scan_component(token_index, guest_repository, checkin_queue)
+        return
+    with st.expander("Quick Add", expanded=False):
+        quick_add_guest(
+            supabase, get_gender_index(), checkin_queue, get_brother_resolver()
+        )
+    search_state = create_search_component(sorted(aggregates.counts("brother").index))
+    if query_planner.plan() == PUSHDOWN:
+        # No fresh snapshot: query the database one page at a time, or
+        # search the last snapshot if the database can't be reached
+        page_df = keyset_guest_page(query_planner, search_state)
+        if page_df is not None:
+            create_guest_list_component(
+                supabase, page_df, guest_repository, checkin_queue, paginate=False
+            )
+            return
+    snapshot = current_snapshot()
+    if snapshot.frame.empty:
+        st.info("No guest data available.")
+        return
+    if "search_cache" not in st.session_state:
+        st.session_state.search_cache = SearchCache()
+    filtered_data = load_filtered_data(
+        snapshot.frame,
+        search_state,
+        search_index,
+        st.session_state.search_cache,
+        snapshot.version,
+    )
+    create_guest_list_component(
+        supabase, filtered_data, guest_repository, checkin_queue
+    )
+
+
+@st.fragment
+@perf.timed("rerun.add_guest")
+def add_guest_fragment():
+    gender_index = get_gender_index()
+    create_add_guest_component(
+        supabase, gender_index, checkin_queue, get_brother_resolver()
+    )
+    with st.expander("Bulk Import", expanded=False):
+        create_bulk_import_component(
+            supabase, current_guest_data(), gender_index, guest_repository.event_id
+        )
+    with st.expander("Duplicates", expanded=False):
+        create_duplicates_component(current_guest_data())
+    with st.expander("Guest Passes", expanded=False):
+        create_pass_export_component(current_guest_data())
+
+
+@st.fragment
+@perf.timed("rerun.history")
+def history_fragment():
+    # pyarrow loads on the first history render
+    from history_component import (
+        create_close_event_component,
+        create_history_component,
+    )
+
+    create_history_component(get_event_archive())
+    if st.session_state.get("admin"):
+        with st.expander("Close Event", expanded=False):
+            create_close_event_component(
+                supabase,
+                get_event_archive(),
+                guest_repository,
+                checkin_queue,
+                active_event(supabase),
+            )
+
+
+@st.fragment(run_every="5s")
+def performance_fragment():
+    from performance_component import create_performance_component
+
+    create_performance_component(perf_recorder)
+
+
+st.title("SNOWYOWL")
+
+# Create tabs. Switching tabs reruns the script and only the open tab's
+# fragments run, so a hidden tab neither computes nor refreshes itself.
+# The door opens on check-in.
+views = ["📊 Dashboard", "📜 Guest List & Check-In", "Add Guest", "📚 History"]
+if st.session_state.get("admin"):
+    views.append("⏱ Performance")
+tab1, tab2, tab3, tab4, *admin_tabs = st.tabs(
+    views,
+    default="📜 Guest List & Check-In",
+    key="view",
+    on_change="rerun",
+)
+
+# ---------------- Dashboard Tab ----------------
+with tab1:
+    if tab1.open:
+        live_metrics_fragment()
+        charts_fragment()
 # ---------------- Guest List & Check-In Tab ----------------
 with tab2:
-    if st.session_state.guest_data.empty:
-        st.info("No guest data available.")
-    else:
-        st.subheader("Guest List & Check-In")
-        with st.expander("Quick Add", expanded=False):
-            quick_add_guest(supabase)
-        search_state = create_search_component()
-        filtered_data = load_filtered_data(supabase, search_state)
-        create_guest_list_component(supabase, filtered_data)
+    if tab2.open:
+        guest_list_fragment()
 with tab3:
-    create_add_guest_component(supabase)
+    if tab3.open:
+        add_guest_fragment()
+# ---------------- History Tab ----------------
+with tab4:
+    if tab4.open:
+        history_fragment()
+# ---------------- Performance Tab (admins) ----------------
+for tab in admin_tabs:
+    with tab:
+        if tab.open:
+            performance_fragment()
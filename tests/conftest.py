@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The app is a flat set of modules at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_supabase import FakeSupabaseClient  # noqa: E402
+
+BROTHERS = [
+    {"name": "Matt Kerschke", "year": 2025},
+    {"name": "Sam Ortiz", "year": 2026},
+]
+
+
+def guest(name, brother_id=1, **values):
+    return {
+        "name": name,
+        "brother_id": brother_id,
+        "campus_status": "On Campus",
+        "gender": "F",
+        "check_in_status": "Not Checked In",
+        "check_in_time": None,
+        **values,
+    }
+
+
+@pytest.fixture
+def client():
+    """Fake database with two brothers and three guests (ids 1-3)."""
+    return FakeSupabaseClient(
+        BROTHERS,
+        [guest("ADA LOVELACE"), guest("GRACE HOPPER", 2), guest("ALAN TURING")],
+    )
@@ -0,0 +1,51 @@
+import add_guest_component
+from add_guest_component import add_guest_through_queue, host_params
+from brother_resolver import BrotherResolver
+from checkin_queue import FAILED
+
+BROTHERS = [{"id": 7, "name": "Matt Kerschke"}, {"id": 8, "name": "Sam Ortiz"}]
+
+
+class _Streamlit:
+    """Records what a component would show."""
+
+    def __init__(self):
+        self.shown = []
+
+    def __getattr__(self, kind):
+        return lambda text: self.shown.append((kind, text))
+
+
+class _Queue:
+    def __init__(self, result):
+        self.result = result
+        self.params = None
+
+    def add_guest(self, params):
+        self.params = params
+        return 1
+
+    def add_result(self, seq, timeout=0.0):
+        return self.result
+
+
+def test_host_sent_by_id_or_by_name(monkeypatch):
+    monkeypatch.setattr(add_guest_component, "st", _Streamlit())
+    assert host_params(BrotherResolver(BROTHERS), "kerschke") == {"brother_id": 7}
+    # A roster whose ids may not be the database's names the host instead
+    roster = BrotherResolver(BROTHERS, by_id=False)
+    assert host_params(roster, "kerschke") == {"host_name": "Matt Kerschke"}
+    assert host_params(None, "kerschke") == {"host_name": "kerschke"}
+    assert host_params(roster, "nobody at all") is None
+
+
+def test_brother_not_found_names_what_was_sent(monkeypatch):
+    shown = _Streamlit()
+    monkeypatch.setattr(add_guest_component, "st", shown)
+    queue = _Queue((FAILED, "insert failed brother not found"))
+
+    add_guest_through_queue(queue, {"guest_name": "ADA", "brother_id": 7})
+    add_guest_through_queue(queue, {"guest_name": "ADA", "host_name": "Sam Ortiz"})
+    (_, by_id), (_, by_name) = shown.shown
+    assert "brother id 7" in by_id and "None" not in by_id
+    assert "Brother 'Sam Ortiz'" in by_name
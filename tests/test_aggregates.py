@@ -0,0 +1,96 @@
+import random
+
+from aggregates import GuestAggregates
+from benchmarks import synthetic_repository
+from conftest import BROTHERS, guest
+from fake_supabase import FakeSupabaseClient
+from guest_repository import GuestRepository
+from rollups import CheckInRollup
+
+
+def test_patched_counters_match_a_full_recompute():
+    client, repository = synthetic_repository(500)
+    aggregates = repository.add_listener(GuestAggregates())
+    rollup = repository.add_listener(CheckInRollup())
+    rng = random.Random(0)
+    ids = list(repository.frame.index)
+
+    # Local check-ins and undos, as the write queue applies them
+    for guest_id in rng.sample(ids, 100):
+        status = rng.choice(["Checked In", "Not Checked In"])
+        time = "2025-09-06T22:00:00+00:00" if status == "Checked In" else None
+        repository.update_values(
+            guest_id, {"check_in_status": status, "check_in_time": time}
+        )
+    # Changes from other devices, a move between brothers and a delete
+    client.table("guests").update(
+        {"check_in_status": "Checked In", "check_in_time": "2025-09-06T23:00:00+00:00"}
+    ).lt("id", 40).execute()
+    client.table("guests").update({"brother_id": 1, "campus_status": "Off Campus"}).eq(
+        "id", ids[-1]
+    ).execute()
+    repository.sync(force=True)
+    client.table("guests").delete().eq("id", ids[0]).execute()
+    repository.sync(force=True)
+
+    frame = repository.frame
+    assert ids[0] not in frame.index
+    assert aggregates.verify(frame) == []
+    assert rollup.verify(frame)
+    assert aggregates.checked_in == (frame["check_in_status"] == "Checked In").sum()
+    assert rollup.occupancy == aggregates.checked_in
+
+
+def test_counters_follow_a_full_resync(client):
+    repository = GuestRepository(client)
+    aggregates = repository.add_listener(GuestAggregates())
+    repository.full_resync()
+    client.table("guests").update({"check_in_status": "Checked In"}).eq(
+        "id", 1
+    ).execute()
+    repository.full_resync()
+    assert aggregates.verify(repository.frame) == []
+    assert aggregates.checked_in == 1
+
+
+def test_rollup_counts_the_first_guest_of_an_empty_list():
+    client = FakeSupabaseClient(BROTHERS)
+    repository = GuestRepository(client)
+    rollup = repository.add_listener(CheckInRollup())
+    repository.full_resync()
+    client.table("guests").insert(
+        guest(
+            "ADA LOVELACE",
+            check_in_status="Checked In",
+            check_in_time="2025-09-06T22:00:00+00:00",
+        )
+    ).execute()
+    # Merged into the empty snapshot, as a change event would be
+    repository.fetch_rows([1])
+    assert rollup.occupancy == 1
+    assert rollup.verify(repository.frame)
+
+
+def test_rollup_skips_departures_of_uncounted_arrivals(client):
+    # Checked in without a time before the reset: no bucket to count in
+    client.table("guests").update({"check_in_status": "Checked In"}).eq(
+        "id", 1
+    ).execute()
+    repository = GuestRepository(client)
+    rollup = repository.add_listener(CheckInRollup())
+    repository.full_resync()
+    assert rollup.occupancy == 0
+    assert rollup.verify(repository.frame)
+
+    repository.update_values(
+        1, {"check_in_status": "Not Checked In", "check_in_time": None}
+    )
+    repository.update_values(2, {"check_in_status": "Checked In"})
+    assert rollup.occupancy == 0
+    assert rollup.verify(repository.frame)
+    assert rollup.series()["departures"].sum() == 0
+
+    client.table("guests").delete().eq("id", 2).execute()
+    repository.sync(force=True)
+    assert rollup.occupancy == 0
+    assert rollup.verify(repository.frame)
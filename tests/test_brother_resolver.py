@@ -0,0 +1,49 @@
+import random
+
+from benchmarks import load_brothers
+from benchmarks.data import typo
+from brother_resolver import BrotherLookup, BrotherResolver
+
+
+def test_typed_hosts_never_resolve_to_the_wrong_brother():
+    brothers = load_brothers()
+    resolver = BrotherResolver(brothers)
+    rng = random.Random(0)
+    workloads = {
+        "exact": [b["name"] for b in brothers],
+        "lowercase": [b["name"].lower() for b in brothers],
+        "last_name": [b["name"].split()[-1] for b in brothers],
+        "typo": [typo(b["name"], rng) for b in brothers],
+    }
+    for label, typed in workloads.items():
+        for brother, text in zip(brothers, typed):
+            match = resolver.resolve(text)
+            if label in ("exact", "lowercase"):
+                assert match is not None, text
+            if match is None:
+                # Ambiguous: the brother is among the names offered
+                assert brother["name"] in resolver.suggest(text), (label, text)
+            else:
+                assert match["id"] == brother["id"], (label, text)
+
+
+def test_lookup_backs_off_while_the_table_cant_be_read(client):
+    lookup = BrotherLookup(client, retry_min=60)
+    client.offline = True
+    client.reset_counters()
+    roster = lookup.resolver()
+    assert not roster.by_id
+    assert lookup.failures == 1
+
+    client.offline = False
+    # Within the backoff, and while the caller knows it is offline, the
+    # table isn't read again
+    assert lookup.resolver() is roster
+    assert lookup.resolver(offline=True) is roster
+    assert client.query_count == 0
+
+    lookup = BrotherLookup(client, retry_min=0)
+    database = lookup.resolver()
+    assert database.by_id and database.names == ["Matt Kerschke", "Sam Ortiz"]
+    client.offline = True
+    assert lookup.resolver() is database
@@ -0,0 +1,80 @@
+from change_feed import ChangeFeed, InProcessTransport
+from guest_repository import GuestRepository
+
+
+def _feed(client):
+    transport = InProcessTransport()
+    client.add_change_listener(transport.publish)
+    return ChangeFeed(GuestRepository(client), transport, retry_min=0).start()
+
+
+def _check_in(client, guest_id):
+    client.table("guests").update({"check_in_status": "Checked In"}).eq(
+        "id", guest_id
+    ).execute()
+
+
+def test_events_update_the_snapshot_without_queries(client):
+    feed = _feed(client)
+    client.reset_counters()
+    _check_in(client, 1)
+    queries = client.query_count
+
+    frame = feed.snapshot().frame
+    assert frame.at[1, "check_in_status"] == "Checked In"
+    assert client.query_count == queries
+    assert feed.events_applied == 1
+
+
+def test_reconnect_catches_up_on_missed_changes(client):
+    feed = _feed(client)
+    feed.transport.disconnect()
+    _check_in(client, 2)
+    feed.transport.connect()
+
+    # Healthy again, and no longer behind without another sync
+    client.reset_counters()
+    frame = feed.snapshot().frame
+    assert feed.healthy
+    assert frame.at[2, "check_in_status"] == "Checked In"
+    assert client.query_count == 0
+
+
+def test_failed_event_forces_a_sync(client):
+    feed = _feed(client)
+    # A guest of a brother the repository hasn't seen needs a refetch,
+    # which fails while the backend is down
+    client.table("brothers").insert({"name": "New Brother", "year": 2027}).execute()
+    client.offline = True
+    # Written by another client while this one has no connection
+    with client._lock:
+        client._insert_row("guests", {"name": "LATE GUEST", "brother_id": 3})
+    client._notify()
+    assert feed.events_failed == 1
+    assert feed.needs_sync
+
+    client.offline = False
+    frame = feed.snapshot().frame
+    assert not feed.needs_sync
+    assert "LATE GUEST" in set(frame["name"])
+
+
+def test_unreachable_database_serves_the_last_snapshot(client):
+    transport = InProcessTransport()
+    repository = GuestRepository(client, min_sync_interval=0)
+    feed = ChangeFeed(repository, transport, retry_min=60).start()
+    transport.disconnect()
+    client.offline = True
+    client.reset_counters()
+
+    snapshot = feed.snapshot()
+    assert snapshot.stale
+    assert sorted(snapshot.frame.index) == [1, 2, 3]
+    assert feed.needs_sync and feed.sync_failures == 1
+    # Backing off: the next reruns don't wait on the database again
+    assert feed.snapshot().stale
+    assert feed.sync_failures == 1
+
+    client.offline = False
+    assert feed.catch_up()
+    assert not feed.snapshot().stale
@@ -0,0 +1,210 @@
+import time
+
+import pytest
+
+from checkin_queue import CONFIRMED, PENDING, SUPERSEDED, CheckInQueue
+from guest_repository import GuestRepository
+from journal import IntentJournal
+from search_component import _set_guest_status
+
+
+@pytest.fixture
+def repository(client):
+    repository = GuestRepository(client)
+    repository.full_resync()
+    return repository
+
+
+def _server_row(client, guest_id):
+    return next(r for r in client._tables["guests"] if r["id"] == guest_id)
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_submit_applies_locally_and_writes_behind(client, repository):
+    queue = CheckInQueue(client, repository).start()
+    assert queue.submit(1, "Checked In")
+    assert repository.frame.at[1, "check_in_status"] == "Checked In"
+    assert queue.flush(timeout=5)
+    queue.stop()
+    assert _server_row(client, 1)["check_in_status"] == "Checked In"
+    assert queue.state(1) == CONFIRMED
+    assert repository.row_version(1) == _server_row(client, 1)["version"]
+    assert not queue.submit(99, "Checked In")
+
+
+def test_repeated_clicks_coalesce_into_one_write(client, repository):
+    queue = CheckInQueue(client, repository, batch_window=0.5).start()
+    for status in ["Checked In", "Not Checked In", "Checked In"]:
+        queue.submit(2, status)
+    assert queue.flush(timeout=5)
+    queue.stop()
+    assert queue.requests == 1
+    assert queue.stats()["written"] == 1
+    assert _server_row(client, 2)["check_in_status"] == "Checked In"
+    assert _server_row(client, 2)["version"] == 2
+
+
+def test_write_superseded_when_server_row_moved_on(client, repository):
+    # Another device checks the guest in after our snapshot was taken
+    client.table("guests").update({"check_in_status": "Checked In"}).eq(
+        "id", 3
+    ).execute()
+    queue = CheckInQueue(client, repository).start()
+    queue.submit(3, "Not Checked In")
+    assert queue.flush(timeout=5)
+    queue.stop()
+    assert queue.state(3) == SUPERSEDED
+    assert queue.error(3) == "changed on another device"
+    # The newer change wins, on the server and in the snapshot
+    assert _server_row(client, 3)["check_in_status"] == "Checked In"
+    assert repository.frame.at[3, "check_in_status"] == "Checked In"
+
+
+def test_offline_writes_go_to_the_journal(client, repository, tmp_path):
+    journal = IntentJournal(tmp_path / "journal.sqlite3")
+    queue = CheckInQueue(client, repository, backoff=0.01, journal=journal)
+    queue.start()
+    client.offline = True
+    queue.submit(1, "Checked In")
+    seq = queue.add_guest(
+        {
+            "guest_name": "KATHERINE JOHNSON",
+            "brother_id": 1,
+            "campus_status": "On Campus",
+            "gender": "F",
+        }
+    )
+    _wait_until(lambda: queue.offline)
+
+    assert repository.frame.at[1, "check_in_status"] == "Checked In"
+    assert queue.state(1) == PENDING
+    assert queue.add_result(seq) == (PENDING, None)
+    assert [(i.kind, i.key) for i in journal.pending()] == [
+        ("status", 1),
+        ("add_guest", None),
+    ]
+    assert queue.written == 0
+    assert _server_row(client, 1)["check_in_status"] == "Not Checked In"
+    queue.stop(timeout=0.1)
+    journal.close()
+
+
+def test_journal_replays_after_restart(client, tmp_path):
+    path = tmp_path / "journal.sqlite3"
+    repository = GuestRepository(client)
+    repository.full_resync()
+    queue = CheckInQueue(client, repository, journal=IntentJournal(path))
+    queue.start()
+    client.offline = True
+    queue.submit(1, "Checked In")
+    queue.submit(2, "Checked In")
+    queue.add_guest(
+        {
+            "guest_name": "KATHERINE JOHNSON",
+            "brother_id": 2,
+            "campus_status": "Off Campus",
+            "gender": "F",
+        }
+    )
+    # The process dies before the backend comes back
+    queue.stop(timeout=0.1)
+    queue.journal.close()
+
+    client.offline = False
+    repository = GuestRepository(client)
+    repository.full_resync()
+    journal = IntentJournal(path)
+    queue = CheckInQueue(client, repository, journal=journal).start()
+    assert repository.frame.at[1, "check_in_status"] == "Checked In"
+    assert queue.flush(timeout=5)
+    queue.stop()
+
+    assert _server_row(client, 1)["check_in_status"] == "Checked In"
+    assert _server_row(client, 2)["check_in_status"] == "Checked In"
+    assert "KATHERINE JOHNSON" in [r["name"] for r in client._tables["guests"]]
+    assert queue.state(1) == CONFIRMED
+    assert journal.pending() == []
+    assert journal.counts() == {"done": 3}
+    journal.close()
+
+
+def test_two_doors_clicking_one_guest(client):
+    doors = []
+    for _ in range(2):
+        repository = GuestRepository(client)
+        repository.full_resync()
+        doors.append((repository, CheckInQueue(client, repository).start()))
+    (_, first_queue), (second, second_queue) = doors
+
+    first_queue.submit(1, "Checked In")
+    first_queue.submit(2, "Checked In")
+    assert first_queue.flush(timeout=5)
+    # The second door hasn't seen those writes: it undoes one check-in
+    # and repeats the other
+    second_queue.submit(1, "Not Checked In")
+    second_queue.submit(2, "Checked In")
+    assert second_queue.flush(timeout=5)
+    for _, queue in doors:
+        queue.stop()
+
+    assert first_queue.state(1) == CONFIRMED
+    assert second_queue.state(1) == SUPERSEDED
+    # Already has the second door's values, so nothing was lost
+    assert second_queue.state(2) == CONFIRMED
+    for guest_id in (1, 2):
+        assert _server_row(client, guest_id)["check_in_status"] == "Checked In"
+        assert second.frame.at[guest_id, "check_in_status"] == "Checked In"
+    assert _server_row(client, 2)["version"] == 2
+
+
+def test_worker_survives_an_error_while_applying_a_batch(client, repository):
+    apply_records = repository.apply_records
+    calls = []
+
+    def fail_once(records):
+        calls.append(records)
+        if len(calls) == 1:
+            raise ValueError("bad record")
+        return apply_records(records)
+
+    repository.apply_records = fail_once
+    queue = CheckInQueue(client, repository, backoff=0.01).start()
+    queue.submit(1, "Checked In")
+    assert queue.flush(timeout=5)
+    assert queue.worker_errors == 1
+    # The batch was requeued: its write had landed, so it is confirmed
+    assert queue.state(1) == CONFIRMED
+    assert repository.row_version(1) == _server_row(client, 1)["version"]
+
+    # And the worker is still there for the next click
+    queue.submit(2, "Checked In")
+    assert queue.flush(timeout=5)
+    queue.stop()
+    assert queue.state(2) == CONFIRMED
+    assert _server_row(client, 2)["check_in_status"] == "Checked In"
+
+
+def test_click_is_checked_against_the_version_displayed(client, repository):
+    displayed = repository.row_version(3)
+    # Another device checks the guest in; our snapshot catches up before
+    # the list that was clicked is redrawn
+    client.table("guests").update({"check_in_status": "Checked In"}).eq(
+        "id", 3
+    ).execute()
+    repository.sync(force=True)
+    assert repository.row_version(3) != displayed
+
+    queue = CheckInQueue(client, repository).start()
+    _set_guest_status(
+        client, 3, "ALAN TURING", "Not Checked In", repository, queue, displayed
+    )
+    assert queue.flush(timeout=5)
+    queue.stop()
+    assert queue.state(3) == SUPERSEDED
+    assert _server_row(client, 3)["check_in_status"] == "Checked In"
@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+
+import pytest
+
+import search_component
+from checkin_queue import CheckInQueue
+from checkin_tokens import QR_PREFIX, TokenIndex, parse_scan
+from guest_repository import GuestRepository
+from search_component import _scan_check_in
+
+
+class _SessionState(dict):
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+def _row(client, guest_id):
+    return next(r for r in client._tables["guests"] if r["id"] == guest_id)
+
+
+@pytest.fixture
+def repository(client):
+    return GuestRepository(client)
+
+
+@pytest.fixture
+def index(repository):
+    index = repository.add_listener(TokenIndex())
+    repository.full_resync()
+    return index
+
+
+def test_parse_scan():
+    assert parse_scan("SNOWYOWL:0123abcd") == "0123abcd"
+    assert parse_scan("  snowyowl:0123ABCD\n") == "0123abcd"
+    assert parse_scan("0123ABCDEF") == "0123abcdef"
+    # Not one of our codes, or too short to be a token
+    for scan in ["https://example.com", "OTHER:0123abcd", "0123abc", "", None]:
+        assert parse_scan(scan) is None
+
+
+def test_index_follows_the_repository(client, repository, index):
+    assert len(index) == 3
+    token = _row(client, 2)["checkin_token"]
+    for scan in [token, token.upper(), QR_PREFIX + token, f" {QR_PREFIX}{token} "]:
+        assert index.resolve(scan) == 2
+    assert index.resolve("ffffffffffffffff") is None
+
+    # A token changed on the server moves with its guest
+    client.table("guests").update({"checkin_token": "ABCDEF0123456789"}).eq(
+        "id", 2
+    ).execute()
+    repository.sync(force=True)
+    assert index.resolve(token) is None
+    assert index.resolve("abcdef0123456789") == 2
+
+    client.table("guests").delete().eq("id", 2).execute()
+    repository.sync(force=True)
+    assert index.resolve("abcdef0123456789") is None
+    assert len(index) == 2
+
+
+def test_scan_checks_in_once(client, repository, index, monkeypatch):
+    state = _SessionState()
+    monkeypatch.setattr(search_component, "st", SimpleNamespace(session_state=state))
+    queue = CheckInQueue(client, repository).start()
+
+    def scan(text):
+        state.scan_input = text
+        _scan_check_in(index, repository, queue)
+        assert state.scan_input == ""
+        return state.get("scan_result")
+
+    assert scan(QR_PREFIX + _row(client, 1)["checkin_token"]) == (
+        "success",
+        "✅ ADA LOVELACE (Matt Kerschke) checked in.",
+    )
+    level, message = scan(_row(client, 1)["checkin_token"].upper())
+    assert level == "warning" and "already checked in at" in message
+    assert scan("SNOWYOWL:ffffffffffffffff") == (
+        "error",
+        "Unknown pass: SNOWYOWL:ffffffffffffffff",
+    )
+    # An empty scan leaves the last result up
+    assert scan("  ")[0] == "error"
+    assert state.scans == 1
+
+    assert queue.flush(timeout=5)
+    queue.stop()
+    assert repository.frame.at[1, "check_in_status"] == "Checked In"
+    assert _row(client, 1)["check_in_status"] == "Checked In"
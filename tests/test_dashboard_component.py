@@ -0,0 +1,39 @@
+from streamlit.testing.v1 import AppTest
+
+from aggregates import GuestAggregates
+from benchmarks import synthetic_repository
+from figure_cache import FigureCache
+from rollups import CheckInRollup
+
+
+def _render_charts(repository, aggregates, figure_cache, rollup):
+    from dashboard_component import create_charts_component
+
+    create_charts_component(repository.frame, aggregates, figure_cache, rollup)
+
+
+def test_chart_reruns_reuse_figures_until_the_data_changes():
+    client, repository = synthetic_repository(300)
+    aggregates = repository.add_listener(GuestAggregates())
+    rollup = repository.add_listener(CheckInRollup())
+    cache = FigureCache()
+    app = AppTest.from_function(
+        _render_charts,
+        args=(repository, aggregates, cache, rollup),
+        default_timeout=60,
+    ).run()
+    assert not app.exception
+    built = cache.misses
+    assert built > 0 and cache.hits == 0
+
+    app.run()
+    assert cache.misses == built
+    assert cache.hits == built
+
+    client.table("guests").update(
+        {"check_in_status": "Checked In", "check_in_time": "2025-09-06T23:00:00+00:00"}
+    ).lt("id", 50).execute()
+    repository.sync(force=True)
+    app.run()
+    assert not app.exception
+    assert cache.misses > built
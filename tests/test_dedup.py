@@ -0,0 +1,61 @@
+import random
+
+from benchmarks import synthetic_guests
+from benchmarks.data import typo
+from dedup import find_duplicates
+
+
+def _plant(rows, rng, variant, count=40):
+    """Records of ``rows`` plus ``count`` re-entered under ``variant``;
+    returns the records and ``{copy id: original id}``."""
+    records = [(i, row["name"]) for i, row in enumerate(rows)]
+    planted = {}
+    for i in rng.sample(range(len(rows)), count):
+        planted[len(records)] = i
+        records.append((len(records), variant(rows[i]["name"])))
+    return records, planted
+
+
+def _found(report, planted) -> int:
+    group_of = {i: n for n, group in enumerate(report.groups) for i in group.ids}
+    return sum(
+        copy in group_of and group_of[copy] == group_of.get(original)
+        for copy, original in planted.items()
+    )
+
+
+def test_names_differing_in_case_or_spacing_are_always_grouped():
+    rows = synthetic_guests(2000)
+    rng = random.Random(0)
+    for variant in (str.title, lambda name: "  ".join(name.split()).lower()):
+        records, planted = _plant(rows, rng, variant)
+        report = find_duplicates(records)
+        assert _found(report, planted) == len(planted)
+        n = len(records)
+        assert report.comparisons < n * (n - 1) // 2 // 100
+
+
+def test_typos_are_grouped_within_a_block():
+    records = list(
+        enumerate(
+            [
+                "CHRISTOPHER SCHLETZ",
+                "Christopher Schlets",
+                "Cristopher Schletz",
+                "J.D. BUELL",
+                "JD Buell",
+                "MARGARET HAMILTON",
+                "Margaret Hamiltn",
+                # Different people sharing a surname
+                "ANNA SMITH",
+                "OLIVIA SMITH",
+            ]
+        )
+    )
+    report = find_duplicates(records, prefer={6}.__contains__)
+    assert sorted(sorted(group.ids) for group in report.groups) == [
+        [0, 1, 2],
+        [3, 4],
+        [5, 6],
+    ]
+    assert {group.keep for group in report.groups} == {0, 3, 6}
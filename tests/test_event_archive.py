@@ -0,0 +1,145 @@
+import os
+
+import pytest
+
+import fake_supabase
+from conftest import BROTHERS, guest
+from event_archive import (
+    EventArchive,
+    active_event,
+    archive_event,
+    event_path,
+    object_path,
+    start_event,
+)
+from guest_repository import GuestRepository
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def client():
+    """Event 1 with three guests (ids 1-3), then event 2 with two (4-5)."""
+    client = fake_supabase.FakeSupabaseClient(
+        BROTHERS,
+        [
+            guest("ADA LOVELACE", check_in_status="Checked In"),
+            guest("GRACE HOPPER", 2),
+            guest("ALAN TURING"),
+        ],
+        events=[{"name": "Fall Rush"}],
+    )
+    start_event(client, "Spring Rush")
+    client.table("guests").insert(
+        guest("Ada  Lovelace", 2, check_in_status="Checked In")
+    ).execute()
+    client.table("guests").insert(guest("KATHERINE JOHNSON")).execute()
+    return client
+
+
+def _event(client, event_id):
+    return next(e for e in client._tables["events"] if e["id"] == event_id)
+
+
+def _guest_ids(client, event_id):
+    return [r["id"] for r in client._tables["guests"] if r["event_id"] == event_id]
+
+
+def test_archive_keeps_the_rows_by_default(client, tmp_path):
+    assert archive_event(client, _event(client, 1), tmp_path) == 3
+    assert os.path.exists(event_path(tmp_path, 1))
+    assert _event(client, 1)["closed_at"] is not None
+    assert _guest_ids(client, 1) == [1, 2, 3]
+    assert active_event(client)["id"] == 2
+
+
+def test_delete_without_storage_changes_nothing(client, tmp_path):
+    with pytest.raises(ValueError):
+        archive_event(client, _event(client, 1), tmp_path, delete=True)
+    assert not os.path.exists(event_path(tmp_path, 1))
+    assert _event(client, 1)["closed_at"] is None
+    assert _guest_ids(client, 1) == [1, 2, 3]
+
+
+def test_delete_only_after_the_upload(client, tmp_path, monkeypatch):
+    event = _event(client, 1)
+
+    def unreachable(*args, **kwargs):
+        raise ConnectionError("storage unreachable")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(fake_supabase._Bucket, "upload", unreachable)
+        with pytest.raises(ConnectionError):
+            archive_event(client, event, tmp_path, bucket="archive", delete=True)
+    assert _guest_ids(client, 1) == [1, 2, 3]
+    assert event["closed_at"] is None
+
+    archive_event(client, event, tmp_path, bucket="archive", delete=True)
+    assert _guest_ids(client, 1) == []
+    with open(event_path(tmp_path, 1), "rb") as f:
+        assert client.storage.from_("archive").download(object_path(1)) == f.read()
+
+
+def test_scan_reads_only_the_events_and_columns_asked_for(client, tmp_path):
+    for event_id in (1, 2):
+        archive_event(client, _event(client, event_id), tmp_path)
+    archive = EventArchive(tmp_path)
+    assert archive.events()["name"].tolist() == ["Fall Rush", "Spring Rush"]
+    assert archive.events()["guests"].tolist() == [3, 2]
+
+    frame = archive.scan(["name"], event_ids=[2])
+    assert frame.columns.tolist() == ["event_id", "name"]
+    assert sorted(frame["name"]) == ["Ada  Lovelace", "KATHERINE JOHNSON"]
+    assert len(archive.scan(["name"])) == 5
+
+    per_brother = archive.guests_per_brother()
+    assert per_brother.loc["Matt Kerschke", "guests"] == 3
+    assert per_brother.loc["Matt Kerschke", "events"] == 2
+    assert per_brother.loc["Sam Ortiz", "checked_in"] == 1
+    # Matched across events whatever the case and spacing
+    attendance = archive.attendance()
+    assert attendance.loc["ada lovelace", "events"] == 2
+    assert attendance.loc["ada lovelace", "attended"] == 2
+    assert archive.repeat_guests().index.tolist() == ["ada lovelace"]
+
+
+def test_scan_of_an_empty_archive(tmp_path):
+    archive = EventArchive(tmp_path / "missing")
+    assert archive.events().empty
+    assert archive.scan(["name"]).columns.tolist() == ["event_id", "name"]
+
+
+def test_restore_after_the_disk_was_wiped(client, tmp_path):
+    archive_event(
+        client, _event(client, 1), tmp_path / "old", bucket="archive", delete=True
+    )
+    archive = EventArchive(tmp_path / "new", bucket="archive")
+    assert archive.restore(client) == [1]
+    assert archive.events()["guests"].tolist() == [3]
+    assert archive.restore(client) == []
+
+    # Without storage, from the rows still in the database
+    client.table("events").update({"closed_at": "2030-01-01T00:00:00+00:00"}).eq(
+        "id", 2
+    ).execute()
+    archive = EventArchive(tmp_path / "db")
+    assert archive.restore(client) == [2]
+    assert archive.events()["guests"].tolist() == [2]
+
+
+def test_repository_reads_only_its_event(client):
+    repository = GuestRepository(client, event_id=1)
+    assert sorted(repository.full_resync().index) == [1, 2, 3]
+
+    repository.apply_records(
+        [
+            # Another event's guest is dropped
+            {**client._tables["guests"][3], "name": "ELSEWHERE"},
+            # One of ours that moved to another event is removed
+            {**client._tables["guests"][1], "event_id": 2},
+        ]
+    )
+    assert sorted(repository.frame.index) == [1, 3]
+
+    repository.switch_event(2)
+    assert sorted(repository.frame.index) == [4, 5]
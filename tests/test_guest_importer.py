@@ -0,0 +1,76 @@
+import io
+
+import pytest
+
+from brother_resolver import BrotherResolver
+from conftest import guest
+from fake_supabase import FakeSupabaseClient
+from guest_importer import (
+    apply_import,
+    brother_ids,
+    iter_wide_guest_rows,
+    plan_import,
+    unresolved_hosts,
+)
+from guest_repository import GuestRepository
+
+
+def _rows(text, campus_status="On Campus"):
+    return list(iter_wide_guest_rows(io.StringIO(text), campus_status))
+
+
+def _import(client, text, campus_status="On Campus"):
+    repository = GuestRepository(client)
+    hosts = brother_ids(BrotherResolver.from_supabase(client))
+    plan = plan_import(_rows(text, campus_status), hosts, repository.full_resync())
+    apply_import(client, plan)
+    return plan
+
+
+def test_wide_rows_are_normalized():
+    rows = _rows("Brother,Guest1,Guest2\nMatt Kerschke, jane  doe ,\n,ignored\n")
+    assert rows == [("Matt Kerschke", "JANE DOE", "On Campus")]
+
+
+def test_reimport_is_a_no_op(client):
+    text = "Brother,Guest1\nMatt Kerschke,Jane Doe\nSam Ortiz,Jane Doe\n"
+    first = _import(client, text)
+    second = _import(client, text)
+    assert len(first.new) == 2
+    assert second.summary()["already imported"] == 2
+    assert not second.new and not second.moved
+    assert len(client._tables["guests"]) == 5
+
+
+def test_campus_change_updates_a_legacy_mixed_case_row():
+    client = FakeSupabaseClient(
+        [{"name": "Matt Kerschke", "year": 2025}],
+        [guest("Jane Doe", check_in_status="Checked In")],
+    )
+    plan = _import(client, "Brother,Guest1\nMatt Kerschke,JANE DOE\n", "Off Campus")
+
+    assert plan.moved == [
+        {"name": "Jane Doe", "brother_id": 1, "campus_status": "Off Campus"}
+    ]
+    [row] = client._tables["guests"]
+    assert row["campus_status"] == "Off Campus"
+    assert row["check_in_status"] == "Checked In"
+
+
+def test_hosts_resolve_to_the_brothers_table_ids():
+    # The table's ids, not the bundled roster's (where Matt Kerschke isn't 9)
+    client = FakeSupabaseClient()
+    for brother_id, name in [(9, "Matt Kerschke"), (4, "Sam Ortiz")]:
+        client.table("brothers").insert({"id": brother_id, "name": name}).execute()
+    text = "Brother,Guest1\nmatt  KERSCHKE,Jane Doe\nMatt Kershke,John Roe\n"
+    plan = _import(client, text)
+
+    assert [row["brother_id"] for row in plan.new] == [9]
+    assert client._tables["guests"][0]["brother_id"] == 9
+    resolver = BrotherResolver.from_supabase(client)
+    assert unresolved_hosts(plan, resolver) == {"Matt Kershke": ["Matt Kerschke"]}
+
+
+def test_roster_ids_are_refused():
+    with pytest.raises(ValueError):
+        brother_ids(BrotherResolver.from_csv())
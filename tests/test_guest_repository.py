@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+
+from conftest import guest
+from guest_repository import GuestRepository
+
+
+def _backdate(client, guest_id, seconds):
+    """Move a row's ``updated_at`` into the past, as if its transaction
+    stamped it that long before committing."""
+    with client._lock:
+        row = next(r for r in client._tables["guests"] if r["id"] == guest_id)
+        stamp = datetime.fromisoformat(row["updated_at"]) - timedelta(seconds=seconds)
+        row["updated_at"] = stamp.isoformat(timespec="microseconds")
+
+
+def test_first_sync_loads_everything(client):
+    repository = GuestRepository(client)
+    frame = repository.sync()
+    assert repository.full_resyncs == 1
+    assert sorted(frame.index) == [1, 2, 3]
+    assert frame.at[2, "brother_name"] == "Sam Ortiz"
+    assert repository.high_water_mark == frame["updated_at"].max()
+
+
+def test_delta_sync_merges_only_changed_rows(client):
+    repository = GuestRepository(client, sync_overlap=0)
+    repository.full_resync()
+    client.table("guests").update({"check_in_status": "Checked In"}).eq(
+        "id", 2
+    ).execute()
+    client.reset_counters()
+
+    frame = repository.sync(force=True)
+    assert repository.full_resyncs == 1
+    assert repository.delta_syncs == 1
+    assert frame.at[2, "check_in_status"] == "Checked In"
+    assert frame.at[1, "check_in_status"] == "Not Checked In"
+    # The changed row and the one at the old mark, then a count
+    assert client.rows_transferred == 2
+    assert client.query_count == 2
+
+
+def test_unchanged_rows_in_the_overlap_are_not_merged(client):
+    repository = GuestRepository(client)
+    repository.full_resync()
+    version = repository.version
+    repository.sync(force=True)
+    assert repository.delta_syncs == 1
+    assert repository.version == version
+
+
+def test_delete_triggers_full_resync(client):
+    repository = GuestRepository(client)
+    repository.full_resync()
+    client.table("guests").delete().eq("id", 3).execute()
+
+    frame = repository.sync(force=True)
+    assert repository.full_resyncs == 2
+    assert sorted(frame.index) == [1, 2]
+
+
+def test_new_column_triggers_full_resync(client):
+    repository = GuestRepository(client)
+    repository.full_resync()
+    with client._lock:
+        for row in client._tables["guests"]:
+            row["notes"] = ""
+    client.table("guests").update({"notes": "VIP"}).eq("id", 1).execute()
+
+    frame = repository.sync(force=True)
+    assert repository.full_resyncs == 2
+    assert frame.at[1, "notes"] == "VIP"
+
+
+def test_row_count_gap_triggers_full_resync(client):
+    repository = GuestRepository(client, sync_overlap=0)
+    repository.full_resync()
+    client.table("guests").insert(guest("KATHERINE JOHNSON")).execute()
+    _backdate(client, 4, 60)
+
+    frame = repository.sync(force=True)
+    assert repository.full_resyncs == 2
+    assert "KATHERINE JOHNSON" in set(frame["name"])
+
+
+def test_late_commit_within_overlap_is_fetched(client):
+    repository = GuestRepository(client, sync_overlap=5)
+    repository.full_resync()
+    client.table("guests").update({"check_in_status": "Checked In"}).eq(
+        "id", 1
+    ).execute()
+    # Another write moves the high-water mark past the first one's stamp
+    client.table("guests").update({"gender": "M"}).eq("id", 3).execute()
+    _backdate(client, 1, 2)
+    repository.sync(force=True)
+
+    assert repository.full_resyncs == 1
+    assert repository.frame.at[1, "check_in_status"] == "Checked In"
+
+
+def test_late_commit_beyond_overlap_waits_for_full_resync(client):
+    # Documented limitation: an update committed more than sync_overlap
+    # after it was stamped leaves the row count alone and is not seen
+    repository = GuestRepository(client, sync_overlap=1)
+    repository.full_resync()
+    client.table("guests").update({"gender": "M"}).eq("id", 3).execute()
+    repository.sync(force=True)
+    client.table("guests").update({"check_in_status": "Checked In"}).eq(
+        "id", 1
+    ).execute()
+    _backdate(client, 1, 30)
+
+    repository.sync(force=True)
+    assert repository.frame.at[1, "check_in_status"] == "Not Checked In"
+    repository.full_resync()
+    assert repository.frame.at[1, "check_in_status"] == "Checked In"
+
+
+class _Recorder:
+    def __init__(self):
+        self.upserts = []
+
+    def reset(self, frame):
+        pass
+
+    def upsert(self, rows, previous):
+        self.upserts.append((rows, previous))
+
+    def remove(self, rows):
+        pass
+
+
+def test_update_values_changes_one_row_in_place(client):
+    repository = GuestRepository(client)
+    before = repository.full_resync()
+    listener = _Recorder()
+    repository.add_listener(listener)
+    version = repository.version
+
+    assert repository.update_values(
+        2,
+        {"check_in_status": "Checked In", "check_in_time": "2025-09-06T21:00:00+00:00"},
+    )
+    frame = repository.frame
+    assert frame.at[2, "check_in_status"] == "Checked In"
+    assert frame.at[2, "check_in_time"].hour == 21
+    assert frame.at[1, "check_in_status"] == "Not Checked In"
+    assert dict(frame.dtypes) == dict(before.dtypes)
+    assert list(frame.index) == [1, 2, 3]
+    # Readers holding the old snapshot don't see the change
+    assert before.at[2, "check_in_status"] == "Not Checked In"
+    assert repository.version == version + 1
+    ((rows, previous),) = listener.upserts
+    assert list(rows.index) == [2] and list(previous.index) == [2]
+    assert previous.at[2, "check_in_status"] == "Not Checked In"
+    assert not repository.update_values(99, {"check_in_status": "Checked In"})
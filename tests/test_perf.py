@@ -0,0 +1,82 @@
+import re
+
+import pytest
+
+import perf
+from perf import PerfRecorder
+
+
+@pytest.fixture
+def recorder(monkeypatch):
+    """A fresh enabled recorder in place of the process-wide one."""
+    recorder = PerfRecorder(enabled=True)
+    monkeypatch.setattr(perf, "recorder", recorder)
+    return recorder
+
+
+def test_disabled_recorder_does_nothing(monkeypatch):
+    recorder = PerfRecorder()
+    monkeypatch.setattr(perf, "recorder", recorder)
+    with recorder.span("db.sync") as first, perf.span("db.write") as second:
+        pass
+    assert first is second
+    perf.count("cache.hits")
+    perf.count_query(10)
+    perf.timed("rerun")(lambda: None)()
+    summary = recorder.summary()
+    assert not summary["enabled"]
+    assert summary["spans"] == {} and summary["counters"] == {}
+
+
+def test_percentiles_over_the_ring_buffer():
+    recorder = PerfRecorder(capacity=100, enabled=True)
+    # The first 100 samples are pushed out by the last 100
+    for ms in [1000.0] * 100 + [float(ms) for ms in range(1, 101)]:
+        recorder.record("search", ms / 1000)
+    span = recorder.summary()["spans"]["search"]
+    assert span["count"] == 200
+    assert span["total_s"] == pytest.approx(100 + 5.05)
+    assert span["mean_ms"] == pytest.approx(50.5)
+    assert span["p50_ms"] == pytest.approx(51)
+    assert span["p95_ms"] == pytest.approx(96)
+    assert span["p99_ms"] == pytest.approx(100)
+    assert span["max_ms"] == pytest.approx(100)
+
+
+def test_spans_and_query_counters(recorder):
+    with perf.span("db.sync"):
+        pass
+    perf.timed("rerun")(lambda: None)()
+    perf.count_query(25)
+    perf.count_query()
+    perf.count("cache.hits", 3)
+    summary = recorder.summary()
+    assert summary["spans"]["db.sync"]["count"] == 1
+    assert summary["spans"]["rerun"]["count"] == 1
+    assert summary["counters"] == {"cache.hits": 3, "db.queries": 2, "db.rows": 25}
+
+    recorder.reset()
+    assert recorder.summary()["counters"] == {}
+
+
+def test_prometheus_exposition(recorder):
+    recorder.record("db.sync", 0.25)
+    perf.count_query(7)
+    recorder.add_gauges("queue", lambda: {"queued": 4, "state": "ok"})
+    recorder.add_gauges("broken", lambda: 1 / 0)
+    text = recorder.to_prometheus()
+
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert "# TYPE snowyowl_span_seconds summary" in lines
+    assert 'snowyowl_span_seconds{span="db.sync",quantile="0.95"} 0.25' in lines
+    assert 'snowyowl_span_seconds_sum{span="db.sync"} 0.25' in lines
+    assert 'snowyowl_span_seconds_count{span="db.sync"} 1' in lines
+    assert "# TYPE snowyowl_events_total counter" in lines
+    assert 'snowyowl_events_total{name="db.rows"} 7' in lines
+    assert 'snowyowl_gauge{name="queue.queued"} 4' in lines
+    # Non-numeric readings and gauges that fail are left out
+    assert "queue.state" not in text and "broken" not in text
+    sample = re.compile(r'^[a-z_]+\{[a-z]+="[^"]*"(,[a-z]+="[^"]*")*\} \S+$')
+    for line in lines:
+        assert line.startswith("# ") or sample.match(line), line
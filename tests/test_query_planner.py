@@ -0,0 +1,92 @@
+import pytest
+
+from change_feed import ChangeFeed, InProcessTransport
+from guest_repository import GuestRepository
+from query_planner import LOCAL, PUSHDOWN
+
+from benchmarks import synthetic_repository
+from conftest import guest
+from query_planner import GuestQueryPlanner
+from search_component import SearchState
+
+
+@pytest.fixture(scope="module")
+def planner():
+    client, repository = synthetic_repository(600)
+    # Same-name guests make pages split inside a run of equal names
+    for i in range(30):
+        client.table("guests").insert(guest("JORDAN LEE", i % 3 + 1)).execute()
+    repository.sync(force=True)
+    return GuestQueryPlanner(client, repository)
+
+
+def _expected(frame, state):
+    """What the pushed-down query should return, in (name, id) order."""
+    keep = frame["name"].notna()
+    for token in state.query.lower().split():
+        keep &= frame["name"].str.lower().str.contains(token, regex=False)
+    if state.status_filter == "not-checked-in":
+        keep &= frame["check_in_status"] == "Not Checked In"
+    if state.location_filter == "on-campus":
+        keep &= frame["campus_status"] == "On Campus"
+    if state.brother_filter != "all":
+        keep &= frame["brother_name"] == state.brother_filter
+    rows = frame.loc[keep].reset_index(drop=True)
+    return list(rows.sort_values(["name", "id"])["id"])
+
+
+def _all_pages(planner, state, page_size):
+    ids, cursor = [], None
+    while True:
+        page, cursor = planner.fetch_page(state, cursor, page_size)
+        assert len(page) <= page_size
+        ids += list(page.index)
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize(
+    "state",
+    [
+        SearchState(),
+        SearchState(query="lee"),
+        SearchState(query="jordan", location_filter="on-campus"),
+        SearchState(status_filter="not-checked-in", brother_filter="Cam Dorsey"),
+        SearchState(query="zzzz"),
+    ],
+)
+def test_keyset_pages_cover_every_match_once(planner, state):
+    expected = _expected(planner.repository.frame, state)
+    for page_size in (7, 25):
+        assert _all_pages(planner, state, page_size) == expected
+
+
+def test_pushdown_only_while_the_database_is_reachable(client):
+    transport = InProcessTransport()
+    repository = GuestRepository(client, min_sync_interval=0)
+    feed = ChangeFeed(repository, transport, retry_min=60).start()
+    planner = GuestQueryPlanner(client, repository, feed, max_staleness=0)
+    assert planner.plan() == LOCAL
+
+    transport.disconnect()
+    assert planner.plan() == PUSHDOWN
+
+    # The page query fails: search the snapshot for a while
+    client.offline = True
+    with pytest.raises(ConnectionError):
+        planner.fetch_page(SearchState(query="ada"))
+    assert planner.plan() == LOCAL
+    assert planner.explain(SearchState())["reason"].startswith("database unreachable")
+
+    client.offline = False
+    planner._pushdown_failed_at -= planner.pushdown_retry
+    assert planner.plan() == PUSHDOWN
+    # A failed sync says the same
+    client.offline = True
+    assert feed.snapshot().stale
+    assert planner.plan() == LOCAL
+
+
+def test_empty_snapshot_is_never_searched_locally(client):
+    planner = GuestQueryPlanner(client, GuestRepository(client))
+    assert planner.plan() == PUSHDOWN
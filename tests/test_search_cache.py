@@ -0,0 +1,60 @@
+import pytest
+
+from benchmarks import synthetic_repository
+from search_cache import SearchCache
+from search_component import SearchState, load_filtered_data
+from search_index import GuestSearchIndex
+
+
+def _guests():
+    client, repository = synthetic_repository(800)
+    index = repository.add_listener(GuestSearchIndex())
+    return client, repository, index
+
+
+@pytest.fixture(scope="module")
+def guests():
+    return _guests()
+
+
+def _typed(frame, count=15):
+    return list(frame["name"].sample(count, random_state=0).str.lower())
+
+
+@pytest.mark.parametrize("status", ["all", "not-checked-in"])
+def test_cached_keystrokes_match_uncached_search(guests, status):
+    _, repository, index = guests
+    snapshot = repository.snapshot()
+    cache = SearchCache()
+    for name in _typed(snapshot.frame):
+        for end in range(1, len(name) + 1):
+            state = SearchState(query=name[:end], status_filter=status)
+            expected = load_filtered_data(snapshot.frame, state, index)
+            for _ in range(2):
+                cached = load_filtered_data(
+                    snapshot.frame, state, index, cache, snapshot.version
+                )
+                assert list(cached.index) == list(expected.index), state
+    stats = cache.stats()
+    assert stats["hits"] > 0 and stats["narrowed"] > 0
+
+
+def test_cache_follows_a_new_snapshot_version():
+    client, repository, index = _guests()
+    cache = SearchCache()
+    snapshot = repository.snapshot()
+    name = snapshot.frame["name"].iloc[0]
+    state = SearchState(query=name.lower(), status_filter="not-checked-in")
+    before = load_filtered_data(snapshot.frame, state, index, cache, snapshot.version)
+    assert snapshot.frame.index[0] in before.index
+
+    client.table("guests").update({"check_in_status": "Checked In"}).eq(
+        "id", int(snapshot.frame.index[0])
+    ).execute()
+    repository.sync(force=True)
+    snapshot = repository.snapshot()
+    after = load_filtered_data(snapshot.frame, state, index, cache, snapshot.version)
+    assert list(after.index) == list(
+        load_filtered_data(snapshot.frame, state, index).index
+    )
+    assert snapshot.frame.index[0] not in after.index
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+import search_index
+from search_index import GuestSearchIndex
+
+GUESTS = pd.DataFrame(
+    {
+        "name": ["JAYDEN SMITH", "ALMA JONES", "JANE DOE", "BAILEY MCKEAN", "JO ANN"],
+        "brother_name": ["Sam Ortiz", "Jack Hill", "Sam Ortiz", "Jack Hill", "Al Roe"],
+    },
+    index=[1, 2, 3, 4, 5],
+)
+
+
+@pytest.fixture
+def index():
+    index = GuestSearchIndex()
+    index.reset(GUESTS)
+    return index
+
+
+def _ranked_without_shortcut(index, query, monkeypatch):
+    monkeypatch.setattr(search_index, "SHORT_PREFIX", 0)
+    try:
+        return index.search(query)
+    finally:
+        monkeypatch.undo()
+
+
+@pytest.mark.parametrize("query", ["j", "ja", "a", "al", "s", "zz"])
+def test_short_prefixes_rank_like_the_general_search(index, query, monkeypatch):
+    assert index.search(query) == _ranked_without_shortcut(index, query, monkeypatch)
+
+
+def test_short_prefix_results(index):
+    # Guest-name matches by name, then guests whose brother matched
+    assert index.search("ja") == [3, 1, 2, 4]
+    assert index.search("j", candidates={1, 4}) == [1, 4]
+
+
+def test_short_prefixes_follow_adds_renames_and_removes(index, monkeypatch):
+    assert index.search("ja")  # cached
+    index.add(6, "JACK ADAMS", "Al Roe")
+    index.add(2, "ZOE JONES", "Jack Hill")
+    index.discard(3)
+    assert index.search("ja") == [6, 1, 4, 2]
+    assert index.search("ja") == _ranked_without_shortcut(index, "ja", monkeypatch)
+
+
+def test_unchanged_names_keep_the_cache(index):
+    ranked = index.search("ja")
+    cached = index._short["ja"]
+    index.upsert(GUESTS.loc[[1]], GUESTS.loc[[1]])
+    assert index._short["ja"] is cached
+    assert index.search("ja") == ranked
+
+
+def test_typos_and_prefixes(index):
+    assert index.search("bailee mckean") == [4]
+    assert index.search("jay")[0] == 1
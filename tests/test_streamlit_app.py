@@ -0,0 +1,85 @@
+import time
+from pathlib import Path
+
+import pytest
+import streamlit as st
+import supabase
+from streamlit.testing.v1 import AppTest
+
+import change_feed
+
+APP = str(Path(__file__).resolve().parent.parent / "streamlit_app.py")
+CHECKIN_VIEW = "📜 Guest List & Check-In"
+
+
+@pytest.fixture
+def transports(client, monkeypatch):
+    """Serve the app from the fake ``client``; returns the realtime
+    transports it opens."""
+    opened = []
+
+    class Transport(change_feed.InProcessTransport):
+        def __init__(self, *args, **kwargs):
+            super().__init__()
+            client.add_change_listener(self.publish)
+            opened.append(self)
+
+    monkeypatch.setattr(supabase, "create_client", lambda url, key: client)
+    monkeypatch.setattr(change_feed, "SupabaseRealtimeTransport", Transport)
+    st.cache_resource.clear()
+    yield opened
+    st.cache_resource.clear()
+
+
+def _session():
+    app = AppTest.from_file(APP, default_timeout=60)
+    app.secrets["supabase"] = {"url": "http://localhost", "key": "key"}
+    app.secrets["journal_path"] = ":memory:"
+    app.session_state["authenticated"] = True
+    app.session_state["view"] = CHECKIN_VIEW
+    return app
+
+
+def _warnings(app):
+    return [w.value for w in app.warning]
+
+
+def test_check_in_tab_keeps_working_offline(client, transports):
+    app = _session().run()
+    assert not app.exception
+    assert app.button(key="button_1")
+
+    transports[0].disconnect()
+    client.offline = True
+    # Past the repository's minimum sync interval, so the rerun syncs
+    time.sleep(1.1)
+    app.session_state["view"] = CHECKIN_VIEW
+    app.run()
+    assert not app.exception
+    assert any("last update" in text for text in _warnings(app))
+
+    app.button(key="button_1").click()
+    app.session_state["view"] = CHECKIN_VIEW
+    app.run()
+    assert not app.exception
+    app.session_state["view"] = CHECKIN_VIEW
+    app.run()
+    assert not app.exception
+    assert any("saved on this device" in text for text in _warnings(app))
+
+
+def test_stale_snapshot_is_searched_locally_while_offline(
+    client, transports, monkeypatch
+):
+    from guest_repository import GuestRepository
+
+    app = _session().run()
+    transports[0].disconnect()
+    client.offline = True
+    # Long past the planner's max_staleness
+    monkeypatch.setattr(GuestRepository, "staleness", property(lambda self: 60.0))
+    for _ in range(2):
+        app.session_state["view"] = CHECKIN_VIEW
+        app.run()
+        assert not app.exception
+        assert app.button(key="button_2")
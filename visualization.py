@@ -1,32 +1,23 @@
 import plotly.graph_objects as go
-import streamlit as st
 
+# Number of brothers shown per option of the Top-N selector; None shows all
+BROTHER_DISPLAY_OPTIONS = {"Top 5": 5, "Top 10": 10, "Top 15": 15, "All": None}
 
-def plot_brother_guest_distribution(df):
+
+def plot_brother_guest_distribution(guest_counts, selected_display="Top 5"):
     """
-    Create an interactive bar chart showing number of guests per brother with
-    options to display different numbers of brothers.
+    Create a bar chart showing number of guests per brother, limited to one
+    of the ``BROTHER_DISPLAY_OPTIONS``.
 
     Parameters:
-    df (pandas.DataFrame): DataFrame containing 'brother' column
+    guest_counts (pandas.Series): Guest count per brother name, largest first
+    selected_display (str): Key of ``BROTHER_DISPLAY_OPTIONS``
 
     Returns:
     plotly.graph_objects.Figure: Plotly figure object
     """
-    # Calculate guest counts and sort
-    guest_counts = df.groupby("brother").size().sort_values(ascending=False)
-
-    # Create selection box for number of brothers to display
-    display_options = {"Top 5": 5, "Top 10": 10, "Top 15": 15, "All": len(guest_counts)}
-
-    selected_display = st.selectbox(
-        "Select number of brothers to display:",
-        options=list(display_options.keys()),
-        index=0,  # Default to first option
-    )
-
     # Get number of brothers to display
-    n_brothers = display_options[selected_display]
+    n_brothers = BROTHER_DISPLAY_OPTIONS[selected_display] or len(guest_counts)
 
     # Filter data based on selection
     displayed_counts = guest_counts.head(n_brothers)
@@ -56,10 +47,8 @@ def plot_brother_guest_distribution(df):
     return fig
 
 
-def plot_gender_ratio(df):
+def plot_gender_ratio(gender_counts):
     """Create pie chart showing gender distribution"""
-    gender_counts = df["gender"].value_counts()
-
     fig = go.Figure(
         go.Pie(labels=gender_counts.index, values=gender_counts.values, hole=0.4)
     )
@@ -69,8 +58,7 @@ def plot_gender_ratio(df):
     return fig
 
 
-def plot_campus_distribution(df):
-    campus_counts = df["campus_status"].value_counts()
+def plot_campus_distribution(campus_counts):
     fig = go.Figure(
         go.Pie(labels=campus_counts.index, values=campus_counts.values, hole=0.4)
     )
@@ -78,19 +66,12 @@ def plot_campus_distribution(df):
     return fig
 
 
-def plot_class_distribution(df):
+def plot_class_distribution(class_counts):
     """Create bar chart showing number of guests per brother's class."""
-    # Extract year from the brothers nested data
-    if "brothers" in df.columns:
-        # Extract year from the brothers dictionary
-        years = df["brothers"].apply(lambda x: x.get("year") if x else None)
-    else:
-        years = df.get("year")
-
-    if years is None or years.isna().all():
+    if class_counts.empty:
         return go.Figure().update_layout(title="No class year data available")
 
-    class_counts = years.value_counts().sort_index()
+    class_counts = class_counts.sort_index()
 
     fig = go.Figure(go.Bar(x=class_counts.index.astype(str), y=class_counts.values))
     fig.update_layout(